@@ -1,18 +1,78 @@
+import asyncio
+import base64
+import hashlib
+import io
+import json
 import logging
 import os
+import shutil
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
 
-import assemblyai as aai
-import google.generativeai as genai
 from dotenv import load_dotenv
-from fastapi import FastAPI, File, HTTPException, Request, UploadFile
+from fastapi import (
+    FastAPI,
+    File,
+    Form,
+    HTTPException,
+    Request,
+    UploadFile,
+    WebSocket,
+    WebSocketDisconnect,
+)
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import (
+    HTMLResponse,
+    JSONResponse,
+    PlainTextResponse,
+    StreamingResponse,
+)
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from murf.client import Murf
 
-from services.ingestion_service import ingest_upload
-from services.persistence_service import PersistenceService
+from services.answer_cache import AnswerCache, AnswerKey, CachedAnswer
+from services.assemblyai_service import AssemblyAIService
+from services.audio_preprocessing import AudioPreprocessor, AudioSettings, NoSpeechError
+from services.embedding_cache import EmbeddingCache
+from services.executor_service import StageExecutor
+from services.history_cache import SessionHistoryCache
+from services.ingestion_service import IngestionJobQueue, ingest_upload
+from services.lazy_imports import lazy_import, missing_modules
+from services.local_speech import PiperTextToSpeech, VoskSpeechToText
+from services.metrics_service import ServerTimingMiddleware, count_provider_error, metrics
+from services.murf_service import MurfService
+from services.persistence_service import SHARED_NAMESPACE, PersistenceService
+from services.prompt_service import PromptBuilder, SessionSummarizer
+from services.provider_registry import ProviderRegistry
+from services.realtime_stt_service import (
+    create_streaming_transcriber,
+    pcm16_to_wav,
+    threadsafe_event_callback,
+)
+from services.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    ProviderGuard,
+    TurnBudget,
+    breaker_states,
+)
+from services.retrieval_service import HybridRetriever, is_keyword_only
+from services.speech_providers import (
+    SpeechProviderError,
+    SpeechToTextProvider,
+    TextToSpeechProvider,
+)
+from services.streaming_service import SentenceChunker, format_sse
+from services.tts_cache import TTSCache
+from services.vector_server import (
+    RemoteIngestionJobQueue,
+    RemoteVectorService,
+    VectorServer,
+    VectorServiceClient,
+)
 from services.vector_service import VectorService
 
 # Configure logging
@@ -22,8 +82,36 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+# --- Blocking Work Execution Layer ---
+stage_executor = StageExecutor.from_env()
+
+
+# "background" accepts connections immediately and loads the embedding model
+# and provider SDKs on a thread (watch /readyz); "eager" loads them first.
+STARTUP_MODE = os.getenv("STARTUP_MODE", "background")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if STARTUP_MODE == "eager":
+        await asyncio.to_thread(_warm_start)
+    else:
+        threading.Thread(target=_warm_start, name="warm-start", daemon=True).start()
+    yield
+    stage_executor.shutdown(wait=False)
+    # Flushes any write-behind messages before the connections are closed.
+    persistence_service.close()
+    if embedding_cache is not None:
+        embedding_cache.close()
+    if tts_cache is not None:
+        tts_cache.close()
+    if audio_preprocessor is not None:
+        audio_preprocessor.close()
+    providers.close()
+
+
 # Initialize FastAPI
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # --- CORS Middleware Setup ---
 origins = ["*"]
@@ -35,6 +123,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# --- Metrics ---
+# Stage timings feed /metrics and each response's Server-Timing header.
+# Disabled, every instrumentation point is a single flag check.
+metrics.enabled = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+if metrics.enabled:
+    app.add_middleware(ServerTimingMiddleware)
+
 # --- Template and Static File Setup ---
 templates = Jinja2Templates(directory="templates")
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -44,37 +139,330 @@ MURF_API_KEY = os.getenv("MURF_API_KEY")
 ASSEMBLYAI_API_KEY = os.getenv("ASSEMBLYAI_API_KEY")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 RAG_TOP_K = int(os.getenv("RAG_TOP_K", "4"))
+# Batch speech backends: hosted ("assemblyai", "murf") or on-device ("vosk", "piper").
+STT_BACKEND = os.getenv("STT_BACKEND", "assemblyai")
+TTS_BACKEND = os.getenv("TTS_BACKEND", "murf")
+REALTIME_STT_BACKEND = os.getenv("REALTIME_STT_BACKEND", "assemblyai")
+REALTIME_SAMPLE_RATE = int(os.getenv("REALTIME_SAMPLE_RATE", "16000"))
+REALTIME_END_UTTERANCE_MS = int(os.getenv("REALTIME_END_UTTERANCE_MS", "700"))
 
 # Validate API Keys at startup
-if not MURF_API_KEY:
+if not MURF_API_KEY and TTS_BACKEND == "murf":
     logger.warning("Missing API key: MURF_API_KEY")
-if not ASSEMBLYAI_API_KEY:
+if not ASSEMBLYAI_API_KEY and (STT_BACKEND == "assemblyai" or REALTIME_STT_BACKEND == "assemblyai"):
     logger.warning("Missing API key: ASSEMBLYAI_API_KEY")
 if not GEMINI_API_KEY:
     logger.warning("Missing API key: GEMINI_API_KEY")
 
-# Configure APIs
+# Configure APIs. The SDKs are imported on first use (or by the warm start),
+# so the key is applied when the module loads. The global AssemblyAI key is
+# still used by the realtime transcriber.
+aai = lazy_import("assemblyai")
 if ASSEMBLYAI_API_KEY:
-    aai.settings.api_key = ASSEMBLYAI_API_KEY
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-if MURF_API_KEY:
-    murf = Murf(api_key=MURF_API_KEY)
+    aai.on_load(lambda module: setattr(module.settings, "api_key", ASSEMBLYAI_API_KEY))
+
+# Pooled, keep-alive clients reused by every turn instead of per-request
+# transcribers, models and Murf clients.
+providers = ProviderRegistry(
+    assemblyai_api_key=ASSEMBLYAI_API_KEY,
+    gemini_api_key=GEMINI_API_KEY,
+    murf_api_key=MURF_API_KEY,
+    max_connections=int(os.getenv("PROVIDER_MAX_CONNECTIONS", "20")),
+    max_keepalive_connections=int(os.getenv("PROVIDER_MAX_KEEPALIVE_CONNECTIONS", "10")),
+    keepalive_expiry=float(os.getenv("PROVIDER_KEEPALIVE_EXPIRY_SECONDS", "30")),
+    connect_timeout=float(os.getenv("PROVIDER_CONNECT_TIMEOUT_SECONDS", "5")),
+    read_timeout=float(os.getenv("PROVIDER_READ_TIMEOUT_SECONDS", "60")),
+    http2=os.getenv("PROVIDER_HTTP2", "true").lower() == "true",
+    gemini_transport=os.getenv("GEMINI_TRANSPORT", "grpc"),
+    assemblyai_polling_interval=(
+        float(os.environ["ASSEMBLYAI_POLLING_INTERVAL_SECONDS"])
+        if os.getenv("ASSEMBLYAI_POLLING_INTERVAL_SECONDS")
+        else None
+    ),
+    assemblyai_base_url=os.getenv("ASSEMBLYAI_BASE_URL") or None,
+    murf_base_url=os.getenv("MURF_BASE_URL") or None,
+)
+
+
+# --- Audio Preprocessing ---
+# Turn recordings are trimmed to the speech span and re-encoded as 16 kHz
+# mono Opus before STT; recordings without speech never reach the STT backend.
+audio_settings = AudioSettings(
+    ffmpeg_path=os.getenv("FFMPEG_PATH") or shutil.which("ffmpeg"),
+    sample_rate=int(os.getenv("AUDIO_SAMPLE_RATE", "16000")),
+    bitrate=os.getenv("AUDIO_OPUS_BITRATE", "24k"),
+    padding_ms=int(os.getenv("AUDIO_VAD_PADDING_MS", "250")),
+    min_speech_ms=int(os.getenv("AUDIO_MIN_SPEECH_MS", "200")),
+)
+audio_preprocessor = (
+    AudioPreprocessor(audio_settings, workers=int(os.getenv("AUDIO_PREPROCESS_WORKERS", "2")))
+    if os.getenv("AUDIO_PREPROCESSING", "true").lower() == "true"
+    else None
+)
+
+
+# --- Speech Backends ---
+def _build_stt_provider() -> SpeechToTextProvider:
+    if STT_BACKEND == "assemblyai":
+        return AssemblyAIService(providers)
+    if STT_BACKEND == "vosk":
+        return VoskSpeechToText(os.getenv("VOSK_MODEL_PATH", "models/vosk"), audio_settings)
+    raise ValueError(f"Unknown STT backend: {STT_BACKEND}")
+
+
+def _build_tts_provider() -> TextToSpeechProvider:
+    if TTS_BACKEND == "murf":
+        return MurfService(providers)
+    if TTS_BACKEND == "piper":
+        return PiperTextToSpeech(
+            os.getenv("PIPER_MODEL_PATH", "models/piper/en_US-lessac-medium.onnx"),
+            config_path=os.getenv("PIPER_CONFIG_PATH") or None,
+        )
+    raise ValueError(f"Unknown TTS backend: {TTS_BACKEND}")
+
+
+stt_provider = _build_stt_provider()
+tts_provider = _build_tts_provider()
+
+
+def _services_configured() -> bool:
+    return bool(GEMINI_API_KEY) and stt_provider.is_configured() and tts_provider.is_configured()
+
+
+# --- Provider Resilience ---
+# Every provider call goes through a guard: a circuit breaker that fails
+# fast while a provider is down, a per-stage deadline, and (for stages in
+# HEDGED_STAGES) a duplicate request once a call outlives the recent p95.
+# Only TTS is hedged by default: its output is cached by text, while a
+# hedged LLM call is a second billed generation whose loser still runs to
+# completion on the llm pool.
+# Each turn also gets a wall-clock budget; when it runs short the turn
+# skips retrieval, and then TTS (answering text-only), instead of
+# overrunning.
+TURN_BUDGET_SECONDS = float(os.getenv("TURN_BUDGET_SECONDS", "45"))
+TURN_SKIP_RETRIEVAL_BELOW_SECONDS = float(os.getenv("TURN_SKIP_RETRIEVAL_BELOW_SECONDS", "20"))
+TURN_TEXT_ONLY_BELOW_SECONDS = float(os.getenv("TURN_TEXT_ONLY_BELOW_SECONDS", "2"))
+RETRIEVAL_TIMEOUT_SECONDS = float(os.getenv("RETRIEVAL_TIMEOUT_SECONDS", "3"))
+FALLBACK_TTS_TIMEOUT_SECONDS = float(os.getenv("FALLBACK_TTS_TIMEOUT_SECONDS", "3"))
+HEDGED_STAGES = {
+    stage.strip() for stage in os.getenv("HEDGED_STAGES", "tts").split(",") if stage.strip()
+}
+
+
+def _provider_guard(stage: str, provider: str, default_timeout: float) -> ProviderGuard:
+    return ProviderGuard(
+        provider,
+        stage,
+        stage_executor,
+        timeout=float(os.getenv(f"{stage.upper()}_TIMEOUT_SECONDS", str(default_timeout))),
+        breaker=CircuitBreaker(
+            provider,
+            failure_threshold=int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5")),
+            reset_timeout=float(os.getenv("BREAKER_RESET_SECONDS", "30")),
+        ),
+        hedge=stage in HEDGED_STAGES,
+        hedge_quantile=float(os.getenv("HEDGE_QUANTILE", "0.95")),
+        hedge_min_samples=int(os.getenv("HEDGE_MIN_SAMPLES", "20")),
+    )
+
+
+stt_guard = _provider_guard("stt", stt_provider.name, 20.0)
+llm_guard = _provider_guard("llm", "gemini", 20.0)
+tts_guard = _provider_guard("tts", tts_provider.name, 15.0)
+# Background summaries get their own breaker, so their failures never fail
+# user turns fast.
+summary_guard = _provider_guard("llm", "gemini_summary", 20.0)
+provider_guards = (stt_guard, llm_guard, tts_guard, summary_guard)
+
+
+# --- Local Audio Store ---
+# Synthesized audio is downloaded once and served from /audio (with HTTP
+# Range support), so repeated phrases skip the TTS backend and the remote fetch.
+AUDIO_STORE_DIR = os.getenv("AUDIO_STORE_DIR", "data/audio")
+AUDIO_STORE_MAX_BYTES = int(os.getenv("AUDIO_STORE_MAX_BYTES", str(512 * 1024 * 1024)))
+tts_cache = (
+    TTSCache(
+        AUDIO_STORE_DIR,
+        max_bytes=AUDIO_STORE_MAX_BYTES,
+        http_client=providers.download_client(),
+    )
+    if AUDIO_STORE_MAX_BYTES > 0
+    else None
+)
+if tts_cache is not None:
+    app.mount("/audio", StaticFiles(directory=AUDIO_STORE_DIR), name="audio")
 
 # --- Persistence and Retrieval Services ---
-persistence_service = PersistenceService(os.getenv("SQLITE_DB_PATH", "data/app.db"))
+HISTORY_CACHE_MAX_BYTES = int(os.getenv("HISTORY_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+history_cache = (
+    SessionHistoryCache(
+        max_bytes=HISTORY_CACHE_MAX_BYTES,
+        ttl_seconds=float(os.getenv("HISTORY_CACHE_TTL_SECONDS", "1800")),
+    )
+    if HISTORY_CACHE_MAX_BYTES > 0
+    else None
+)
 
-try:
-    vector_service = VectorService(
+persistence_service = PersistenceService(
+    os.getenv("SQLITE_DB_PATH", "data/app.db"),
+    write_behind=os.getenv("PERSISTENCE_WRITE_BEHIND", "false").lower() == "true",
+    flush_interval_ms=int(os.getenv("PERSISTENCE_FLUSH_INTERVAL_MS", "50")),
+    flush_batch_size=int(os.getenv("PERSISTENCE_FLUSH_BATCH_SIZE", "256")),
+    flush_max_retries=int(os.getenv("PERSISTENCE_FLUSH_MAX_RETRIES", "20")),
+    history_cache=history_cache,
+)
+
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "data/embeddings.db")
+embedding_cache = (
+    EmbeddingCache(
+        EMBEDDING_CACHE_PATH,
+        max_entries=int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000")),
+    )
+    if EMBEDDING_CACHE_PATH
+    else None
+)
+
+# Built by _warm_start; vector retrieval and uploads are unavailable until
+# then, while keyword retrieval works from the start. With
+# VECTOR_SERVICE_SOCKET set (multi-worker mode, see main.py) both are
+# proxies to the shared vector service process.
+VECTOR_SERVICE_SOCKET = os.getenv("VECTOR_SERVICE_SOCKET", "")
+VECTOR_SERVICE_AUTHKEY = os.getenv("VECTOR_SERVICE_AUTHKEY", "")
+INGESTION_BATCH_SIZE = int(os.getenv("INGESTION_BATCH_SIZE", "64"))
+vector_service: VectorService | RemoteVectorService | None = None
+ingestion_jobs: IngestionJobQueue | RemoteIngestionJobQueue | None = None
+retriever = HybridRetriever(
+    persistence_service,
+    mode=os.getenv("RETRIEVAL_MODE", "hybrid"),
+    candidates=int(os.getenv("RETRIEVAL_CANDIDATES", "20")),
+    keyword_only_max_terms=int(os.getenv("KEYWORD_ONLY_MAX_TERMS", "0")),
+)
+startup_state = {"vector_service": "pending", "providers": "pending"}
+# Why a component failed to start, reported by /readyz.
+startup_errors: dict[str, str] = {}
+
+
+def _build_vector_service() -> VectorService:
+    return VectorService(
         persist_dir=os.getenv("CHROMA_DIR", "data/chroma"),
         collection_name=os.getenv("CHROMA_COLLECTION", "rag_chunks"),
-        embedding_model=os.getenv(
-            "EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2"
+        embedding_model=os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2"),
+        embedding_cache=embedding_cache,
+        query_batch_size=int(os.getenv("QUERY_BATCH_SIZE", "32")),
+        query_batch_wait_ms=float(os.getenv("QUERY_BATCH_WAIT_MS", "5")),
+        query_cache_size=int(os.getenv("QUERY_CACHE_SIZE", "2048")),
+        snapshot_dir=os.getenv("EMBEDDING_SNAPSHOT_DIR") or None,
+        embedding_backend=os.getenv("EMBEDDING_BACKEND", "torch"),
+        embedding_threads=int(os.getenv("EMBEDDING_THREADS", "0")) or None,
+        max_open_shards=int(os.getenv("VECTOR_MAX_OPEN_SHARDS", "64")),
+        shard_memory_limit_bytes=int(
+            os.getenv("VECTOR_SHARD_MEMORY_LIMIT_BYTES", str(1024 * 1024 * 1024))
         ),
     )
-except Exception as vector_error:
-    logger.error(f"Vector service failed to initialize: {vector_error}")
-    vector_service = None
+
+
+def _vector_service_client() -> VectorServiceClient:
+    return VectorServiceClient(
+        VECTOR_SERVICE_SOCKET, authkey=VECTOR_SERVICE_AUTHKEY.encode("utf-8") or None
+    )
+
+
+def _load_vector_service() -> None:
+    global vector_service, ingestion_jobs
+    startup_state["vector_service"] = "loading"
+    started = time.perf_counter()
+    try:
+        if VECTOR_SERVICE_SOCKET:
+            client = _vector_service_client()
+            service = RemoteVectorService(
+                client,
+                connect_timeout=float(os.getenv("VECTOR_SERVICE_CONNECT_TIMEOUT_SECONDS", "300")),
+            )
+            service.warm_up()
+            job_queue = RemoteIngestionJobQueue(client)
+        else:
+            service = _build_vector_service()
+            service.warm_up()
+            job_queue = IngestionJobQueue(
+                persistence_service,
+                service,
+                stage_executor,
+                batch_size=INGESTION_BATCH_SIZE,
+                on_document_changed=(
+                    answer_cache.invalidate_document if answer_cache is not None else None
+                ),
+            )
+    except Exception as vector_error:
+        logger.error(f"Vector service failed to initialize: {vector_error}")
+        startup_state["vector_service"] = "failed"
+        startup_errors["vector_service"] = str(vector_error)
+        return
+
+    ingestion_jobs = job_queue
+    vector_service = service
+    retriever.vector_service = service
+    startup_state["vector_service"] = "ready"
+    logger.info(f"Vector service ready in {time.perf_counter() - started:.1f}s")
+
+
+def serve_vector_service(address: str) -> None:
+    """
+    Runs this process as the shared vector service for multi-worker mode
+    (see main.py): the only process that loads the embedding model, opens
+    Chroma and runs ingestion jobs.
+    """
+    service = _build_vector_service()
+    service.warm_up()
+    job_queue = IngestionJobQueue(
+        persistence_service, service, stage_executor, batch_size=INGESTION_BATCH_SIZE
+    )
+    VectorServer(
+        address, service, job_queue, authkey=VECTOR_SERVICE_AUTHKEY.encode("utf-8") or None
+    ).serve_forever()
+
+
+def _load_providers() -> None:
+    startup_state["providers"] = "loading"
+    try:
+        for provider in (stt_provider, tts_provider):
+            missing = missing_modules(provider.required_modules)
+            if missing:
+                raise ImportError(
+                    f"Speech backend '{provider.name}' needs {', '.join(missing)} installed "
+                    "(see requirements-optional.txt)."
+                )
+        aai.load()
+        providers.warm_up()
+        for provider in (stt_provider, tts_provider):
+            if provider.is_configured():
+                provider.warm_up()
+    except Exception as provider_error:
+        logger.error(f"Provider SDKs failed to load: {provider_error}")
+        startup_state["providers"] = "failed"
+        startup_errors["providers"] = str(provider_error)
+        return
+    startup_state["providers"] = "ready"
+
+
+def _prewarm_error_audio() -> None:
+    """Synthesizes the fixed error phrases so error paths never call the TTS backend."""
+    if tts_cache is None or not tts_provider.is_configured():
+        return
+    for message in ERROR_RESPONSES.values():
+        try:
+            _synthesize_to_url(message)
+        except Exception as e:
+            logger.warning(f"Could not pre-warm error audio: {str(e)}")
+            return
+
+
+def _warm_start() -> None:
+    _load_providers()
+    if audio_preprocessor is not None:
+        audio_preprocessor.warm_up()
+    _load_vector_service()
+    _prewarm_error_audio()
+
 
 AGENT_PERSONA = (
     "You are 'Nova', a witty, slightly sassy robot assistant. "
@@ -84,79 +472,109 @@ AGENT_PERSONA = (
     "Keep answers concise and actionable."
 )
 
+LLM_MODEL_NAME = "gemini-2.5-flash-lite"
+TTS_VOICE_ID = os.getenv("TTS_VOICE_ID") or tts_provider.default_voice
+
+# --- Answer Cache ---
+# Answers are reused only for the same persona, model and voice.
+ANSWER_PERSONA_KEY = hashlib.sha256(
+    f"{AGENT_PERSONA}|{LLM_MODEL_NAME}|{TTS_VOICE_ID}".encode("utf-8")
+).hexdigest()[:16]
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1024"))
+answer_cache = (
+    AnswerCache(
+        max_entries=ANSWER_CACHE_MAX_ENTRIES,
+        ttl_seconds=float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600")),
+        similarity_threshold=float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.95")),
+    )
+    if ANSWER_CACHE_MAX_ENTRIES > 0
+    else None
+)
+
+# --- Prompt Assembly ---
+# Prompts are built to a token budget; messages older than the most recent
+# HISTORY_SUMMARY_KEEP_RECENT are folded into a per-session rolling summary.
+prompt_builder = PromptBuilder(
+    max_tokens=int(os.getenv("PROMPT_MAX_TOKENS", "2000")),
+    history_tokens=int(os.getenv("PROMPT_HISTORY_TOKENS", "400")),
+    summary_tokens=int(os.getenv("PROMPT_SUMMARY_TOKENS", "250")),
+)
+HISTORY_SUMMARY_KEEP_RECENT = int(os.getenv("HISTORY_SUMMARY_KEEP_RECENT", "6"))
+# Messages read per turn when there is no history cache to size the read.
+HISTORY_PROMPT_WINDOW = 50
+HISTORY_SUMMARY_MAX_WORDS = int(os.getenv("HISTORY_SUMMARY_MAX_WORDS", "150"))
+
+
+def _summarize_history(previous_summary: str, messages: list[dict]) -> str:
+    transcript = "\n".join(
+        f"{message['role'].upper()}: {message['parts'][0]}" for message in messages
+    )
+    prompt = (
+        "Update the running summary of a voice conversation with the new messages. "
+        "Keep names, numbers, decisions and open questions; drop small talk. "
+        f"Reply with the summary only, at most {HISTORY_SUMMARY_MAX_WORDS} words.\n\n"
+        f"Current summary:\n{previous_summary or 'None yet.'}\n\n"
+        f"New messages:\n{transcript}"
+    )
+    response = summary_guard.call_blocking(
+        providers.llm_model(LLM_MODEL_NAME).generate_content,
+        prompt,
+        request_options=providers.llm_request_options(),
+    )
+    return (response.text or "").strip() or previous_summary
+
+
+history_summarizer = (
+    SessionSummarizer(
+        persistence_service,
+        _summarize_history,
+        keep_recent=HISTORY_SUMMARY_KEEP_RECENT,
+        min_batch=int(os.getenv("HISTORY_SUMMARY_BATCH", "6")),
+    )
+    if GEMINI_API_KEY and HISTORY_SUMMARY_KEEP_RECENT > 0
+    else None
+)
+
+
+def _schedule_summary_update(session_id: str) -> None:
+    """Folds aged-out messages into the session summary off the request path."""
+    if history_summarizer is not None:
+        stage_executor.submit("llm", history_summarizer.maybe_update, session_id)
+
+
 # --- Error Response Templates ---
 ERROR_RESPONSES = {
     "stt_error": "I'm having trouble hearing you right now. Could you please try again?",
     "llm_error": "I'm having trouble thinking right now. Please give me a moment and try again.",
     "api_key_error": "My services aren't configured correctly. Please contact support.",
     "general_error": "Something unexpected happened. Please try again in a moment.",
+    "empty_transcript": "I didn't catch that. Could you please speak clearly?",
 }
 
 
 # --- Utility Function for Fallback Audio ---
-def create_fallback_audio_response(error_message: str):
+async def create_fallback_audio_response(error_message: str):
     """Attempts to create a fallback audio response using TTS."""
-    if not MURF_API_KEY:
+    if not tts_provider.is_configured():
         return {"error": True, "message": error_message, "audio_url": None}
 
     try:
-        api_response = murf.text_to_speech.generate(
-            text=error_message, voice_id="en-US-natalie"
+        # Error phrases are pre-warmed into the audio store, so this is
+        # normally a cache hit; a degraded TTS backend gets one short try at
+        # most, and none while its breaker is open.
+        audio_url = await _synthesize_speech(
+            error_message, deadline=time.monotonic() + FALLBACK_TTS_TIMEOUT_SECONDS
         )
         return {
             "error": True,
             "message": error_message,
-            "audio_url": api_response.audio_file,
+            "audio_url": audio_url,
         }
     except Exception as e:
         logger.error(f"Fallback TTS failed: {str(e)}")
         return {"error": True, "message": error_message, "audio_url": None}
 
 
-def _render_recent_history(history_items: list[dict], limit: int = 8) -> str:
-    if not history_items:
-        return "No prior conversation."
-
-    lines = []
-    for item in history_items[-limit:]:
-        role = item.get("role", "user")
-        parts = item.get("parts", [""])
-        content = parts[0] if parts else ""
-        lines.append(f"{role.upper()}: {content}")
-    return "\n".join(lines)
-
-
-def _build_rag_prompt(
-    user_message: str,
-    history_items: list[dict],
-    retrieved_chunks: list[dict],
-) -> str:
-    history_text = _render_recent_history(history_items)
-
-    if retrieved_chunks:
-        context_blocks = []
-        for idx, chunk in enumerate(retrieved_chunks, start=1):
-            meta = chunk.get("metadata") or {}
-            source = meta.get("source", "unknown")
-            chunk_idx = meta.get("chunk_index", "?")
-            context_blocks.append(
-                f"[{idx}] source={source} chunk={chunk_idx}\n{chunk.get('content', '')}"
-            )
-        context_text = "\n\n".join(context_blocks)
-    else:
-        context_text = "No retrieved context available."
-
-    return (
-        "Use this structure:\n"
-        "1) Answer with retrieved context when relevant.\n"
-        "2) If context is insufficient, answer using general knowledge and state that clearly.\n"
-        "3) End with a short helpful follow-up.\n\n"
-        f"Recent conversation:\n{history_text}\n\n"
-        f"Retrieved context:\n{context_text}\n\n"
-        f"User question:\n{user_message}"
-    )
-
-
 def _extract_sources(retrieved_chunks: list[dict]) -> list[dict]:
     seen = set()
     sources = []
@@ -190,132 +608,849 @@ async def read_root(request: Request):
 
 @app.get("/chat/{session_id}")
 async def get_chat_history(session_id: str):
-    history = persistence_service.get_session_messages(session_id=session_id, limit=50)
+    history = await stage_executor.run(
+        "persistence",
+        persistence_service.get_session_messages,
+        session_id=session_id,
+        limit=50,
+    )
     return {"session_id": session_id, "messages": history}
 
 
-@app.get("/documents")
-async def list_documents():
-    return {"documents": persistence_service.list_documents()}
+def _cache_hit_ratios() -> dict[tuple[str, ...], float]:
+    caches = {
+        "history": history_cache,
+        "embedding": embedding_cache,
+        "query_embedding": vector_service.query_embedder if vector_service is not None else None,
+        "answer": answer_cache,
+        "tts_audio": tts_cache,
+    }
+    return {
+        (name,): cache.stats()["hit_ratio"] for name, cache in caches.items() if cache is not None
+    }
+
+
+metrics.gauge(
+    "voice_cache_hit_ratio",
+    "Hit ratio of each in-process cache since startup.",
+    ("cache",),
+    callback=_cache_hit_ratios,
+)
+metrics.gauge(
+    "voice_circuit_state",
+    "Provider circuit breaker state: 0 closed, 1 half-open, 2 open.",
+    ("provider",),
+    callback=lambda: breaker_states(provider_guards),
+)
 
 
-@app.post("/documents/upload")
-async def upload_document(file: UploadFile = File(...)):
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus text exposition of stage latencies, errors and cache ratios."""
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled.")
+    # Rendering reads the query embedder's stats, an RPC in multi-worker mode.
+    body = await asyncio.to_thread(metrics.render)
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+
+@app.get("/healthz")
+async def liveness():
+    """Liveness: the process is up and serving requests."""
+    return {"status": "alive"}
+
+
+@app.get("/readyz")
+async def readiness():
+    """
+    Readiness: 503 until the warm start has finished. A failed embedding
+    model still reports ready (degraded), as the agent answers without RAG.
+    """
+    states = dict(startup_state)
+    if any(state in ("pending", "loading") for state in states.values()):
+        return JSONResponse(status_code=503, content={"status": "starting", **states})
+    degraded = any(state == "failed" for state in states.values())
+    if degraded:
+        return {"status": "degraded", **states, "errors": dict(startup_errors)}
+    return {"status": "ready", **states}
+
+
+def _vector_stats() -> dict[str, Any]:
+    # RPCs to the vector server in multi-worker mode.
     if vector_service is None:
+        return {"query_embedder": None, "vector_shards": None}
+    return {
+        "query_embedder": vector_service.query_embedder.stats(),
+        "vector_shards": vector_service.shard_stats(),
+    }
+
+
+@app.get("/stats")
+async def get_stats():
+    """Cache statistics for sizing the in-memory layers."""
+    vector_stats = await stage_executor.run("retrieval", _vector_stats)
+    return {
+        "history_cache": history_cache.stats() if history_cache is not None else None,
+        "embedding_cache": (
+            embedding_cache.stats() if embedding_cache is not None else None
+        ),
+        "query_embedder": vector_stats["query_embedder"],
+        "retrieval": retriever.stats(),
+        "vector_shards": vector_stats["vector_shards"],
+        "answer_cache": answer_cache.stats() if answer_cache is not None else None,
+        "tts_cache": tts_cache.stats() if tts_cache is not None else None,
+        "prompt": prompt_builder.stats(),
+        "audio": audio_preprocessor.stats() if audio_preprocessor is not None else None,
+        "resilience": {guard.provider: guard.stats() for guard in provider_guards},
+    }
+
+
+MAX_NAMESPACE_LENGTH = 128
+
+
+def _validate_namespace(namespace: str | None) -> str | None:
+    if namespace is None:
+        return None
+    namespace = namespace.strip()
+    if not namespace or len(namespace) > MAX_NAMESPACE_LENGTH:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Namespace must be 1-{MAX_NAMESPACE_LENGTH} characters.",
+        )
+    return namespace
+
+
+def _retrieval_namespaces(session_id: str, namespace: str | None) -> list[str]:
+    """A turn searches its own namespace (the session id unless given) plus the shared one."""
+    return list(dict.fromkeys([namespace or session_id, SHARED_NAMESPACE]))
+
+
+@app.get("/documents")
+async def list_documents(namespace: str | None = None):
+    documents = await stage_executor.run(
+        "persistence", persistence_service.list_documents, _validate_namespace(namespace)
+    )
+    return {"documents": documents}
+
+
+def _require_ingestion_jobs() -> IngestionJobQueue | RemoteIngestionJobQueue:
+    if ingestion_jobs is None:
         raise HTTPException(
             status_code=503,
-            detail="Vector service is not available. Check embedding dependencies.",
+            detail=(
+                "Vector service is still loading."
+                if startup_state["vector_service"] in ("pending", "loading")
+                else "Vector service is not available. Check embedding dependencies."
+            ),
         )
-    result = await ingest_upload(file, persistence_service, vector_service)
-    return result
+    return ingestion_jobs
+
+
+@app.post("/documents/upload", status_code=202)
+async def upload_document(
+    file: UploadFile = File(...),
+    namespace: str | None = Form(None),
+    replace: str | None = Form(None),
+):
+    """
+    Queues a document for ingestion; poll /documents/jobs/{job_id} for progress.
+    Without a namespace the document is shared with every session. Uploads
+    create a new document unless `replace` names the doc_id to update.
+    """
+    namespace = _validate_namespace(namespace) or SHARED_NAMESPACE
+    job_queue = _require_ingestion_jobs()
+    if replace is not None:
+        document = await stage_executor.run(
+            "persistence", persistence_service.get_document, replace
+        )
+        if document is None or document["namespace"] != namespace:
+            raise HTTPException(status_code=404, detail="Document to replace not found.")
+    return await ingest_upload(file, job_queue, namespace, replace_doc_id=replace)
+
+
+@app.post("/documents/upload/bulk", status_code=202)
+async def upload_documents_bulk(
+    files: list[UploadFile] = File(...), namespace: str | None = Form(None)
+):
+    namespace = _validate_namespace(namespace) or SHARED_NAMESPACE
+    job_queue = _require_ingestion_jobs()
+    jobs = []
+    for file in files:
+        try:
+            jobs.append(await ingest_upload(file, job_queue, namespace))
+        except HTTPException as e:
+            jobs.append({"filename": file.filename, "status": "rejected", "error": e.detail})
+    return {"jobs": jobs}
+
+
+@app.get("/documents/jobs/{job_id}")
+async def get_ingestion_job(job_id: str):
+    job = await asyncio.to_thread(_require_ingestion_jobs().get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Ingestion job not found.")
+    return job.to_dict()
 
 
 @app.delete("/documents/{doc_id}")
 async def delete_document(doc_id: str):
+    namespace = await stage_executor.run(
+        "persistence", persistence_service.get_document_namespace, doc_id
+    )
+    if namespace is None:
+        raise HTTPException(status_code=404, detail="Document not found.")
     if vector_service is not None:
-        vector_service.delete_by_doc_id(doc_id)
-    deleted = persistence_service.delete_document(doc_id)
+        await stage_executor.run(
+            "retrieval", vector_service.delete_by_doc_id, doc_id, namespace=namespace
+        )
+    if answer_cache is not None:
+        answer_cache.invalidate_document(doc_id)
+    deleted = await stage_executor.run(
+        "persistence", persistence_service.delete_document, doc_id
+    )
     if not deleted:
         raise HTTPException(status_code=404, detail="Document not found.")
     return {"deleted": True, "doc_id": doc_id}
 
 
+class _TurnError(Exception):
+    """Raised when a turn must end early with a spoken error message."""
+
+    def __init__(self, message: str):
+        super().__init__(message)
+        self.message = message
+
+
+def _transcribe_bytes(audio: bytes) -> str:
+    # A fresh file object per attempt, as a hedged duplicate reads in parallel.
+    return stt_provider.transcribe_audio(io.BytesIO(audio))
+
+
+async def _transcribe_turn_audio(audio: bytes, budget: TurnBudget) -> str:
+    if audio_preprocessor is not None:
+        try:
+            audio = (await audio_preprocessor.process(audio)).data
+        except NoSpeechError:
+            logger.info("No speech detected; skipping transcription.")
+            raise _TurnError(ERROR_RESPONSES["empty_transcript"])
+
+    logger.info("Starting transcription...")
+    try:
+        text = await stt_guard.call(_transcribe_bytes, audio, deadline=budget.deadline)
+    except (SpeechProviderError, CircuitOpenError, TimeoutError) as e:
+        logger.error(f"STT Error: {str(e)}")
+        raise _TurnError(ERROR_RESPONSES["stt_error"])
+
+    if not text or text.strip() == "":
+        logger.warning("STT returned empty transcript.")
+        raise _TurnError(ERROR_RESPONSES["empty_transcript"])
+
+    user_message = text.strip()
+    logger.info(f"Transcription successful: {user_message[:50]}...")
+    return user_message
+
+
+def _transcribe_realtime_utterance(pcm: bytes) -> str:
+    """Batch STT for utterances cut by the "local" realtime backend."""
+    return stt_guard.call_blocking(_transcribe_bytes, pcm16_to_wav(pcm, REALTIME_SAMPLE_RATE))
+
+
+def _unsummarized_history(session_id: str, summary: dict | None) -> list[dict]:
+    """
+    Every message not yet folded into the session summary, oldest first, so
+    a message only leaves the prompt once the summarizer has covered it
+    (the prompt's token budget still applies). Served from the recent
+    window, and so the history cache, when that reaches back far enough.
+    """
+    window = history_cache.window if history_cache is not None else HISTORY_PROMPT_WINDOW
+    recent = persistence_service.get_session_messages(session_id, limit=window)
+    whole_session = len(recent) < window
+    if summary is not None:
+        through = summary["summarized_through"]
+        if whole_session or recent[0].get("created_at", "") <= through:
+            return [item for item in recent if item.get("created_at", "") > through]
+        return persistence_service.get_session_messages_since(
+            session_id, summary["summarized_count"]
+        )
+    if history_summarizer is None or whole_session:
+        # Without a summarizer nothing is ever folded; the newest turns that
+        # fit the token budget are used.
+        return recent
+    return persistence_service.get_session_messages_since(session_id, 0)
+
+
+async def _prepare_turn_context(
+    session_id: str, user_message: str, namespace: str | None, budget: TurnBudget
+) -> tuple[str, list[dict]]:
+    """
+    Loads history, persists the user message and retrieves context for the
+    prompt. Returns the prompt and the retrieved chunks it actually includes.
+    Retrieval is skipped when the turn budget is running short.
+    """
+    summary = await stage_executor.run(
+        "persistence", persistence_service.get_session_summary, session_id
+    )
+    prior_history = await stage_executor.run(
+        "persistence", _unsummarized_history, session_id, summary
+    )
+    await stage_executor.run(
+        "persistence", persistence_service.save_message, session_id, "user", user_message
+    )
+
+    retrieved_chunks = []
+    if not budget.allows(TURN_SKIP_RETRIEVAL_BELOW_SECONDS):
+        budget.degrade("retrieval_skipped")
+    else:
+        try:
+            retrieved_chunks = await asyncio.wait_for(
+                stage_executor.run(
+                    "retrieval",
+                    retriever.retrieve,
+                    user_message,
+                    top_k=RAG_TOP_K,
+                    namespaces=_retrieval_namespaces(session_id, namespace),
+                ),
+                RETRIEVAL_TIMEOUT_SECONDS,
+            )
+        except asyncio.TimeoutError:
+            budget.degrade("retrieval_timeout")
+        except Exception as retrieval_error:
+            logger.error(f"Retrieval failed: {retrieval_error}")
+
+    prompt = prompt_builder.build(
+        user_message,
+        prior_history,
+        retrieved_chunks,
+        summary=summary["summary"] if summary is not None else None,
+    )
+    logger.info(
+        f"Prompt built: ~{prompt.tokens} tokens, "
+        f"{len(prompt.chunks)}/{len(retrieved_chunks)} chunks"
+    )
+    return prompt.prompt, prompt.chunks
+
+
+def _get_llm_model():
+    return providers.llm_model(LLM_MODEL_NAME, system_instruction=AGENT_PERSONA)
+
+
+def _synthesize_to_url(text: str, voice_id: str = TTS_VOICE_ID) -> str:
+    """Blocking TTS through the local audio store, for warm-up threads."""
+    if tts_cache is not None:
+        local_url = tts_cache.get(text, voice_id)
+        if local_url is not None:
+            return local_url
+    return tts_guard.call_blocking(_synthesize_uncached, text, voice_id)
+
+
+def _synthesize_uncached(text: str, voice_id: str) -> str:
+    speech = tts_provider.generate_speech(text, voice_id)
+    if speech.audio is not None:
+        if tts_cache is None:
+            encoded = base64.b64encode(speech.audio).decode("ascii")
+            return f"data:audio/{speech.extension.lstrip('.')};base64,{encoded}"
+        return tts_cache.store_bytes(text, voice_id, speech.audio, speech.extension)
+
+    remote_url = speech.audio_url
+    if tts_cache is None:
+        return remote_url
+    try:
+        return tts_cache.store_from_url(text, voice_id, remote_url)
+    except Exception as e:
+        count_provider_error(f"{tts_provider.name}_audio")
+        logger.warning(f"Audio store download failed, serving remote URL: {str(e)}")
+        return remote_url
+
+
+async def _synthesize_speech(text: str, deadline: float | None = None) -> str:
+    if tts_cache is not None:
+        # Local sqlite lookup, kept off the tts pool so hung provider calls
+        # cannot delay cached audio.
+        local_url = await stage_executor.run("persistence", tts_cache.get, text, TTS_VOICE_ID)
+        if local_url is not None:
+            return local_url
+    return await tts_guard.call(_synthesize_uncached, text, TTS_VOICE_ID, deadline=deadline)
+
+
+async def _synthesize_turn_audio(text: str, budget: TurnBudget) -> str | None:
+    """Audio for the reply, or None when the turn degrades to text-only."""
+    if not budget.allows(TURN_TEXT_ONLY_BELOW_SECONDS):
+        budget.degrade("text_only")
+        return None
+    try:
+        return await _synthesize_speech(text, deadline=budget.deadline)
+    except Exception as e:
+        logger.error(f"TTS failed, answering text-only: {str(e)}")
+        budget.degrade("text_only")
+        return None
+
+
+async def _lookup_cached_answer(
+    user_message: str, retrieved_chunks: list[dict], variant: str
+) -> tuple[CachedAnswer | None, AnswerKey | None]:
+    """
+    Returns a cached answer (or None) and the key under which a freshly
+    generated answer should be stored. `variant` separates whole-answer
+    audio from per-sentence segments.
+    """
+    if answer_cache is None:
+        return None, None
+    key = AnswerKey(
+        query_text=user_message,
+        embedding=None,
+        chunk_ids=AnswerCache.chunk_ids(retrieved_chunks),
+        persona_key=f"{ANSWER_PERSONA_KEY}:{variant}",
+        embeddable=not is_keyword_only(retrieved_chunks),
+    )
+    # Embed only when there are cached answers to compare against, and never
+    # after keyword-only retrieval, which answered without running the model.
+    # Otherwise the lookup is an exact-text match.
+    if (
+        key.embeddable
+        and vector_service is not None
+        and answer_cache.has_candidates(key.chunk_ids, key.persona_key)
+    ):
+        try:
+            # Usually served from the query embedder's LRU, as retrieval
+            # has just embedded the same text.
+            key.embedding = await stage_executor.run(
+                "retrieval", vector_service.embed_query, user_message
+            )
+        except Exception as embed_error:
+            logger.error(f"Query embedding for answer cache failed: {embed_error}")
+    cached = await stage_executor.run(
+        "persistence",
+        answer_cache.lookup,
+        key.query_text,
+        key.embedding,
+        key.chunk_ids,
+        key.persona_key,
+        validate=_answer_audio_available,
+    )
+    return cached, key
+
+
+def _answer_audio_available(answer: CachedAnswer) -> bool:
+    """Keeps a cached answer's audio from being evicted, or rejects it if already gone."""
+    if tts_cache is None:
+        return True
+    return tts_cache.touch([audio_url for _, audio_url in answer.segments if audio_url])
+
+
+def _store_answer(key: AnswerKey, **answer: Any) -> None:
+    """
+    Stores a generated answer; runs on the retrieval pool after the turn.
+    The embedding skipped at lookup is computed here, so later paraphrases
+    can still match semantically.
+    """
+    if any(audio_url and audio_url.startswith("data:") for _, audio_url in answer["segments"]):
+        # Inline audio (no local audio store) would put whole clips in the
+        # cache and in every replayed response.
+        return
+    embedding = key.embedding
+    if embedding is None and key.embeddable and vector_service is not None:
+        try:
+            embedding = vector_service.embed_query(key.query_text)
+        except Exception as embed_error:
+            logger.error(f"Query embedding for answer cache failed: {embed_error}")
+    answer_cache.store(key.query_text, embedding, key.chunk_ids, key.persona_key, **answer)
+
+
 # --- Robust Conversational Agent Endpoint ---
 @app.post("/agent/chat/{session_id}")
-async def agent_chat(session_id: str, audio: UploadFile = File(...)):
+async def agent_chat(
+    session_id: str, audio: UploadFile = File(...), namespace: str | None = None
+):
     """
     Handles a full conversational turn with error handling:
     Audio (user) -> STT -> History -> LLM -> History -> TTS -> Audio (bot)
     """
     logger.info(f"Processing chat request for session: {session_id}")
+    namespace = _validate_namespace(namespace)
+    budget = TurnBudget(TURN_BUDGET_SECONDS)
     # Check for API key availability
-    if not ASSEMBLYAI_API_KEY or not GEMINI_API_KEY or not MURF_API_KEY:
+    if not _services_configured():
         logger.error("One or more API keys are not configured.")
-        return create_fallback_audio_response(ERROR_RESPONSES["api_key_error"])
+        return await create_fallback_audio_response(ERROR_RESPONSES["api_key_error"])
 
     try:
         # 1. TRANSCRIPTION PHASE
-        logger.info("Starting transcription...")
-        transcriber = aai.Transcriber()
-        transcript = transcriber.transcribe(audio.file)
-
-        if transcript.status == aai.TranscriptStatus.error:
-            logger.error(f"STT Error: {transcript.error}")
-            return create_fallback_audio_response(ERROR_RESPONSES["stt_error"])
-
-        if not transcript.text or transcript.text.strip() == "":
-            logger.warning("STT returned empty transcript.")
-            return create_fallback_audio_response(
-                "I didn't catch that. Could you please speak clearly?"
-            )
-
-        user_message = transcript.text.strip()
-        logger.info(f"Transcription successful: {user_message[:50]}...")
+        # UploadFile.read runs on a worker thread; the upload may have
+        # spilled to disk.
+        user_message = await _transcribe_turn_audio(await audio.read(), budget)
 
         # 2. CHAT HISTORY MANAGEMENT + USER MESSAGE PERSISTENCE
-        prior_history = persistence_service.get_session_messages(session_id=session_id)
-        persistence_service.save_message(session_id, "user", user_message)
-
         # 3. RETRIEVAL PHASE
-        retrieved_chunks = []
-        if vector_service is not None:
-            try:
-                retrieved_chunks = vector_service.query(user_message, top_k=RAG_TOP_K)
-            except Exception as retrieval_error:
-                logger.error(f"Retrieval failed: {retrieval_error}")
-                retrieved_chunks = []
+        rag_prompt, retrieved_chunks = await _prepare_turn_context(
+            session_id, user_message, namespace, budget
+        )
+        sources = _extract_sources(retrieved_chunks)
 
-        rag_prompt = _build_rag_prompt(user_message, prior_history, retrieved_chunks)
+        cached, cache_key = await _lookup_cached_answer(
+            user_message, retrieved_chunks, "single"
+        )
+        if cached is not None:
+            logger.info("Answer cache hit; skipping LLM and TTS.")
+            await stage_executor.run(
+                "persistence",
+                persistence_service.save_message,
+                session_id,
+                "model",
+                cached.text,
+                metadata={"sources": sources, "retrieval_count": len(retrieved_chunks)},
+            )
+            _schedule_summary_update(session_id)
+            return {
+                "audio_url": cached.segments[0][1],
+                "text": cached.text,
+                "sources": sources,
+                "retrieval_count": len(retrieved_chunks),
+                "cached": True,
+                "degraded": budget.degraded,
+                "error": False,
+            }
 
         # 4. LLM RESPONSE GENERATION
         logger.info("Generating LLM response...")
-        model = genai.GenerativeModel(
-            "gemini-2.5-flash-lite", system_instruction=AGENT_PERSONA
-        )
+        generation_started = time.perf_counter()
+        model = _get_llm_model()
 
-        llm_response = model.generate_content(rag_prompt)
+        try:
+            llm_response = await llm_guard.call(
+                model.generate_content,
+                rag_prompt,
+                request_options=providers.llm_request_options(),
+                deadline=budget.deadline,
+            )
+        except (CircuitOpenError, TimeoutError) as llm_error:
+            logger.error(f"LLM unavailable: {str(llm_error)}")
+            raise _TurnError(ERROR_RESPONSES["llm_error"])
         llm_text = (llm_response.text or "").strip()
         if not llm_text:
             llm_text = ERROR_RESPONSES["llm_error"]
         logger.info(f"LLM response generated: {llm_text[:50]}...")
 
-        sources = _extract_sources(retrieved_chunks)
-        persistence_service.save_message(
+        await stage_executor.run(
+            "persistence",
+            persistence_service.save_message,
             session_id,
             "model",
             llm_text,
             metadata={"sources": sources, "retrieval_count": len(retrieved_chunks)},
         )
+        _schedule_summary_update(session_id)
 
         # 5. TEXT-TO-SPEECH GENERATION
         logger.info("Generating TTS response...")
 
-        # Handle Murf's 3000 character limit
+        # Handle Murf's 3000 character limit (kept for every TTS backend)
         if len(llm_text) > 3000:
             llm_text = (
                 llm_text[:2950] + "... I have more to say, but I'll keep it brief."
             )
             logger.warning("LLM response truncated for TTS.")
 
-        murf_response = murf.text_to_speech.generate(
-            text=llm_text, voice_id="en-US-natalie"  # You can change this voice
-        )
+        audio_url = await _synthesize_turn_audio(llm_text, budget)
+        if audio_url is not None:
+            logger.info("TTS generation successful.")
 
-        logger.info("TTS generation successful.")
+        # Degraded answers (no sources, no audio) are not worth replaying.
+        if (
+            cache_key is not None
+            and not budget.degraded
+            and llm_text != ERROR_RESPONSES["llm_error"]
+        ):
+            stage_executor.submit(
+                "retrieval",
+                _store_answer,
+                cache_key,
+                text=llm_text,
+                segments=[(llm_text, audio_url)],
+                generation_seconds=time.perf_counter() - generation_started,
+            )
         return {
-            "audio_url": murf_response.audio_file,
+            "audio_url": audio_url,
             "text": llm_text,
             "sources": sources,
             "retrieval_count": len(retrieved_chunks),
+            "degraded": budget.degraded,
             "error": False,
         }
 
+    except _TurnError as turn_error:
+        return await create_fallback_audio_response(turn_error.message)
     except Exception as e:
         logger.error(f"Unexpected error in agent_chat: {str(e)}")
-        return create_fallback_audio_response(ERROR_RESPONSES["general_error"])
+        return await create_fallback_audio_response(ERROR_RESPONSES["general_error"])
     finally:
         try:
             if audio and hasattr(audio, "file") and not audio.file.closed:
                 audio.file.close()
         except Exception as e:
             logger.error(f"Error closing audio file: {str(e)}")
+
+
+async def _stream_llm_to_speech(
+    session_id: str, user_message: str, namespace: str | None, budget: TurnBudget
+) -> AsyncIterator[tuple[str, dict]]:
+    """
+    Streams the LLM answer, synthesizing each sentence as soon as it is complete.
+    TTS requests run concurrently but audio events are always emitted in order.
+    Sentences whose audio cannot be produced in time are sent text-only.
+    """
+    rag_prompt, retrieved_chunks = await _prepare_turn_context(
+        session_id, user_message, namespace, budget
+    )
+    sources = _extract_sources(retrieved_chunks)
+    yield "sources", {"sources": sources, "retrieval_count": len(retrieved_chunks)}
+
+    cached, cache_key = await _lookup_cached_answer(
+        user_message, retrieved_chunks, "segments"
+    )
+    if cached is not None:
+        logger.info("Answer cache hit; skipping LLM and TTS.")
+        for index, (sentence, audio_url) in enumerate(cached.segments):
+            yield "audio", {"index": index, "text": sentence, "audio_url": audio_url}
+        await stage_executor.run(
+            "persistence",
+            persistence_service.save_message,
+            session_id,
+            "model",
+            cached.text,
+            metadata={"sources": sources, "retrieval_count": len(retrieved_chunks)},
+        )
+        _schedule_summary_update(session_id)
+        yield "done", {
+            "text": cached.text,
+            "segments": len(cached.segments),
+            "cached": True,
+            "degraded": budget.degraded,
+        }
+        return
+
+    generation_started = time.perf_counter()
+    chunker = SentenceChunker()
+    pending: deque[tuple[str, asyncio.Task]] = deque()
+    segment_index = 0
+    text_parts: list[str] = []
+    segments: list[tuple[str, str]] = []
+
+    def schedule(sentences: list[str]) -> None:
+        for sentence in sentences:
+            pending.append(
+                (sentence, asyncio.create_task(_synthesize_turn_audio(sentence, budget)))
+            )
+
+    async def drain(wait: bool) -> AsyncIterator[tuple[str, dict]]:
+        nonlocal segment_index
+        while pending and (wait or pending[0][1].done()):
+            sentence, task = pending.popleft()
+            audio_url = await task
+            segments.append((sentence, audio_url))
+            yield "audio", {
+                "index": segment_index,
+                "text": sentence,
+                "audio_url": audio_url,
+            }
+            segment_index += 1
+
+    try:
+        logger.info("Streaming LLM response...")
+        model = _get_llm_model()
+        try:
+            async for llm_chunk in llm_guard.stream(
+                model.generate_content,
+                rag_prompt,
+                stream=True,
+                request_options=providers.llm_request_options(),
+                deadline=budget.deadline,
+            ):
+                piece = llm_chunk.text or ""
+                text_parts.append(piece)
+                schedule(chunker.feed(piece))
+                async for event in drain(wait=False):
+                    yield event
+        except (CircuitOpenError, TimeoutError) as llm_error:
+            # Keep whatever arrived in time; with nothing, the error reply is used.
+            logger.error(f"LLM unavailable: {str(llm_error)}")
+            if text_parts:
+                budget.degrade("answer_truncated")
+
+        llm_text = "".join(text_parts).strip()
+        if not llm_text:
+            llm_text = ERROR_RESPONSES["llm_error"]
+            schedule([llm_text])
+        else:
+            schedule(chunker.flush())
+        async for event in drain(wait=True):
+            yield event
+    finally:
+        for _, task in pending:
+            task.cancel()
+
+    await stage_executor.run(
+        "persistence",
+        persistence_service.save_message,
+        session_id,
+        "model",
+        llm_text,
+        metadata={"sources": sources, "retrieval_count": len(retrieved_chunks)},
+    )
+    _schedule_summary_update(session_id)
+    if cache_key is not None and llm_text != ERROR_RESPONSES["llm_error"] and not budget.degraded:
+        stage_executor.submit(
+            "retrieval",
+            _store_answer,
+            cache_key,
+            text=llm_text,
+            segments=segments,
+            generation_seconds=time.perf_counter() - generation_started,
+        )
+    yield "done", {"text": llm_text, "segments": segment_index, "degraded": budget.degraded}
+
+
+async def _agent_stream_events(
+    session_id: str, audio: bytes, namespace: str | None = None
+) -> AsyncIterator[str]:
+    budget = TurnBudget(TURN_BUDGET_SECONDS)
+    try:
+        user_message = await _transcribe_turn_audio(audio, budget)
+        yield format_sse("transcript", {"text": user_message})
+        async for event, data in _stream_llm_to_speech(
+            session_id, user_message, namespace, budget
+        ):
+            yield format_sse(event, data)
+    except _TurnError as turn_error:
+        yield format_sse("error", await create_fallback_audio_response(turn_error.message))
+    except Exception as e:
+        logger.error(f"Unexpected error in agent_chat_stream: {str(e)}")
+        yield format_sse(
+            "error", await create_fallback_audio_response(ERROR_RESPONSES["general_error"])
+        )
+
+
+@app.post("/agent/chat/{session_id}/stream")
+async def agent_chat_stream(
+    session_id: str, audio: UploadFile = File(...), namespace: str | None = None
+):
+    """
+    Streaming variant of agent_chat. Emits server-sent events:
+    transcript -> sources -> audio (one per sentence, in order) -> done
+    """
+    logger.info(f"Processing streaming chat request for session: {session_id}")
+    namespace = _validate_namespace(namespace)
+    if not _services_configured():
+        logger.error("One or more API keys are not configured.")
+        return await create_fallback_audio_response(ERROR_RESPONSES["api_key_error"])
+
+    # The upload is closed once this handler returns, so buffer it for the stream.
+    audio_bytes = await audio.read()
+    await audio.close()
+    return StreamingResponse(
+        _agent_stream_events(session_id, audio_bytes, namespace),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# --- Real-time WebSocket Agent Endpoint ---
+@app.websocket("/ws/agent/{session_id}")
+async def agent_realtime(
+    websocket: WebSocket, session_id: str, namespace: str | None = None
+):
+    """
+    Real-time conversational turns over a WebSocket. The client streams
+    16-bit mono PCM frames; each detected end of utterance starts the
+    retrieval + LLM + TTS pipeline immediately. Messages sent back mirror
+    the SSE events of agent_chat_stream as {"type": <event>, ...}.
+    """
+    await websocket.accept()
+    logger.info(f"Realtime session opened: {session_id}")
+    try:
+        namespace = _validate_namespace(namespace)
+    except HTTPException as e:
+        await websocket.close(code=1008, reason=e.detail)
+        return
+    if not _services_configured() or (
+        REALTIME_STT_BACKEND == "assemblyai" and not ASSEMBLYAI_API_KEY
+    ):
+        logger.error("One or more API keys are not configured.")
+        fallback = await create_fallback_audio_response(ERROR_RESPONSES["api_key_error"])
+        await websocket.send_json({"type": "error", **fallback})
+        await websocket.close()
+        return
+
+    events: asyncio.Queue = asyncio.Queue()
+    transcriber = create_streaming_transcriber(
+        REALTIME_STT_BACKEND,
+        threadsafe_event_callback(asyncio.get_running_loop(), events),
+        sample_rate=REALTIME_SAMPLE_RATE,
+        end_utterance_silence_ms=REALTIME_END_UTTERANCE_MS,
+        transcribe_fn=_transcribe_realtime_utterance,
+    )
+    try:
+        await stage_executor.run("stt", transcriber.connect)
+    except Exception as e:
+        logger.error(f"Realtime STT connection failed: {str(e)}")
+        fallback = await create_fallback_audio_response(ERROR_RESPONSES["stt_error"])
+        await websocket.send_json({"type": "error", **fallback})
+        await websocket.close()
+        return
+
+    async def forward_audio() -> None:
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message.get("bytes"):
+                    await stage_executor.run(
+                        "stt", transcriber.send_audio, message["bytes"]
+                    )
+                elif message.get("text"):
+                    control = json.loads(message["text"])
+                    if control.get("type") == "end_utterance":
+                        await stage_executor.run("stt", transcriber.end_utterance)
+        finally:
+            await events.put(("closed", ""))
+
+    receiver = asyncio.create_task(forward_audio())
+    try:
+        while True:
+            kind, text = await events.get()
+            if kind == "closed":
+                break
+            if kind == "partial":
+                await websocket.send_json({"type": "partial", "text": text})
+            elif kind == "empty":
+                # Lets a client waiting on a manual stop return to ready.
+                await websocket.send_json({"type": "empty"})
+            elif kind == "error":
+                fallback = await create_fallback_audio_response(
+                    ERROR_RESPONSES["stt_error"]
+                )
+                await websocket.send_json({"type": "error", **fallback})
+            elif kind == "final":
+                logger.info(f"Realtime utterance: {text[:50]}...")
+                await websocket.send_json({"type": "transcript", "text": text})
+                try:
+                    async for event, data in _stream_llm_to_speech(
+                        session_id, text, namespace, TurnBudget(TURN_BUDGET_SECONDS)
+                    ):
+                        await websocket.send_json({"type": event, **data})
+                except WebSocketDisconnect:
+                    raise
+                except Exception as e:
+                    logger.error(f"Unexpected error in agent_realtime: {str(e)}")
+                    fallback = await create_fallback_audio_response(
+                        ERROR_RESPONSES["general_error"]
+                    )
+                    await websocket.send_json({"type": "error", **fallback})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        try:
+            await stage_executor.run("stt", transcriber.close)
+        except Exception as e:
+            logger.error(f"Error closing realtime transcriber: {str(e)}")
+        logger.info(f"Realtime session closed: {session_id}")
@@ -0,0 +1,174 @@
+"""
+Runs a fixture set of turn recordings through the audio preprocessing
+stage and reports, per recording and in total, the upload bytes and audio
+seconds before and after, the preprocessing time, and which recordings
+were rejected as silent.
+
+Without --fixtures it generates recordings shaped like browser captures:
+48 kHz stereo, 0.5-2.5 s of room noise around 1-6 s of speech-like
+syllable bursts, plus a few silent ones. Synthetic fixtures are WAV; pass
+a directory of real webm/ogg recordings to measure those (needs ffmpeg).
+
+STT wall time is modelled, not measured: upload time at --upload-mbps plus
+--stt-rtf seconds of provider processing per second of audio, and a
+rejected recording costs no STT call at all.
+
+Usage: python benchmarks/audio_preprocessing.py --count 20 --upload-mbps 5
+"""
+
+import argparse
+import array
+import asyncio
+import io
+import math
+import os
+import random
+import shutil
+import sys
+import time
+import wave
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.audio_preprocessing import (  # noqa: E402
+    AudioPreprocessor,
+    AudioSettings,
+    NoSpeechError,
+    decode_to_pcm,
+)
+
+CAPTURE_RATE = 48000
+
+
+def _to_wav(samples: list[int], rate: int, channels: int) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        interleaved = array.array("h", (s for s in samples for _ in range(channels)))
+        wav.writeframes(interleaved.tobytes())
+    return buffer.getvalue()
+
+
+def synth_recording(rng: random.Random, speech_seconds: float) -> bytes:
+    """Noise, then pitched syllable bursts at ~4 Hz, then noise again."""
+    lead, tail = rng.uniform(0.5, 2.5), rng.uniform(0.5, 2.5)
+    pitch = rng.uniform(110, 220)
+    samples = []
+    for i in range(int((lead + speech_seconds + tail) * CAPTURE_RATE)):
+        t = i / CAPTURE_RATE
+        value = rng.gauss(0, 60)
+        if lead <= t < lead + speech_seconds:
+            envelope = max(0.0, math.sin(math.pi * 4 * (t - lead))) ** 2
+            value += envelope * 8000 * (
+                math.sin(2 * math.pi * pitch * t) + 0.5 * math.sin(4 * math.pi * pitch * t)
+            )
+        samples.append(max(-32768, min(32767, int(value))))
+    return _to_wav(samples, CAPTURE_RATE, channels=2)
+
+
+def build_fixtures(count: int, silent: int) -> list[tuple[str, bytes]]:
+    rng = random.Random(11)
+    fixtures = [
+        (f"speech_{i:02d}.wav", synth_recording(rng, rng.uniform(1.0, 6.0)))
+        for i in range(count)
+    ]
+    fixtures += [(f"silent_{i:02d}.wav", synth_recording(rng, 0.0)) for i in range(silent)]
+    return fixtures
+
+
+def load_fixtures(directory: str) -> list[tuple[str, bytes]]:
+    fixtures = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if os.path.isfile(path):
+            with open(path, "rb") as recording:
+                fixtures.append((name, recording.read()))
+    return fixtures
+
+
+def stt_seconds(size: int, audio_seconds: float, upload_mbps: float, rtf: float) -> float:
+    return size * 8 / (upload_mbps * 1_000_000) + audio_seconds * rtf
+
+
+async def run(args: argparse.Namespace) -> None:
+    settings = AudioSettings(
+        ffmpeg_path=None if args.no_ffmpeg else shutil.which("ffmpeg"),
+        bitrate=args.bitrate,
+    )
+    fixtures = load_fixtures(args.fixtures) if args.fixtures else build_fixtures(
+        args.count, args.silent
+    )
+    preprocessor = AudioPreprocessor(settings, workers=args.workers)
+    preprocessor.warm_up()
+    print(f"ffmpeg: {settings.ffmpeg_path or 'not found (WAV fallback, no Opus)'}")
+    print(
+        f"{'recording':<18} {'in KB':>8} {'out KB':>8} {'in s':>6} {'out s':>6} "
+        f"{'prep ms':>8} {'stt s before':>12} {'stt s after':>11}"
+    )
+
+    totals = {"in": 0, "out": 0, "in_s": 0.0, "out_s": 0.0, "before": 0.0, "after": 0.0}
+    rejected = 0
+    for name, data in fixtures:
+        seconds_in = len(decode_to_pcm(data, settings)) / (settings.sample_rate * 2)
+        before = stt_seconds(len(data), seconds_in, args.upload_mbps, args.stt_rtf)
+        started = time.perf_counter()
+        try:
+            result = await preprocessor.process(data)
+            out_bytes, seconds_out = len(result.data), result.speech_seconds or seconds_in
+            after = stt_seconds(out_bytes, seconds_out, args.upload_mbps, args.stt_rtf)
+            note = ""
+        except NoSpeechError:
+            out_bytes, seconds_out, after, note = 0, 0.0, 0.0, "  rejected: no speech"
+            rejected += 1
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        # Preprocessing sits on the request path, so it counts against the saving.
+        after += elapsed_ms / 1000
+        print(
+            f"{name:<18} {len(data) / 1024:>8.1f} {out_bytes / 1024:>8.1f} "
+            f"{seconds_in:>6.2f} {seconds_out:>6.2f} {elapsed_ms:>8.1f} "
+            f"{before:>12.2f} {after:>11.2f}{note}"
+        )
+        for key, value in (
+            ("in", len(data)), ("out", out_bytes), ("in_s", seconds_in),
+            ("out_s", seconds_out), ("before", before), ("after", after),
+        ):
+            totals[key] += value
+    preprocessor.close()
+
+    def reduction(before: float, after: float) -> str:
+        return f"{(1 - after / before) * 100:.1f}%" if before else "n/a"
+
+    print()
+    print(f"recordings: {len(fixtures)}  rejected locally: {rejected}")
+    print(
+        f"upload bytes: {totals['in'] / 1024:.0f} KB -> {totals['out'] / 1024:.0f} KB "
+        f"({reduction(totals['in'], totals['out'])} less)"
+    )
+    print(
+        f"audio seconds: {totals['in_s']:.1f} -> {totals['out_s']:.1f} "
+        f"({reduction(totals['in_s'], totals['out_s'])} less)"
+    )
+    print(
+        f"modelled STT wall time: {totals['before']:.1f}s -> {totals['after']:.1f}s "
+        f"({reduction(totals['before'], totals['after'])} less)"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fixtures", help="directory of recordings (default: synthetic WAVs)")
+    parser.add_argument("--count", type=int, default=20)
+    parser.add_argument("--silent", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--bitrate", default="24k")
+    parser.add_argument("--upload-mbps", type=float, default=5.0)
+    parser.add_argument("--stt-rtf", type=float, default=0.3)
+    parser.add_argument("--no-ffmpeg", action="store_true", help="force the WAV fallback")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
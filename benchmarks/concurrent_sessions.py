@@ -0,0 +1,90 @@
+"""
+Drives N concurrent voice turns through /agent/chat/{session_id} against
+stubbed providers and compares the wall time with a single turn.
+
+Usage: python benchmarks/concurrent_sessions.py --sessions 16 --latency 0.5
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("ASSEMBLYAI_API_KEY", "bench")
+os.environ.setdefault("GEMINI_API_KEY", "bench")
+os.environ.setdefault("MURF_API_KEY", "bench")
+os.environ["SQLITE_DB_PATH"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+# Every turn asks the same question; measure the pipeline, not the caches.
+os.environ["ANSWER_CACHE_MAX_ENTRIES"] = "0"
+os.environ["AUDIO_STORE_MAX_BYTES"] = "0"
+
+import httpx  # noqa: E402
+
+import app as app_module  # noqa: E402
+
+
+def install_stub_providers(latency: float) -> None:
+    """Replaces the provider SDKs with blocking stand-ins that sleep for `latency`."""
+
+    class StubTranscriber:
+        def transcribe(self, _audio):
+            time.sleep(latency)
+            return SimpleNamespace(status="completed", text="What is the plan?", error=None)
+
+    class StubModel:
+        def __init__(self, *_args, **_kwargs):
+            pass
+
+        def generate_content(self, _prompt, **_kwargs):
+            time.sleep(latency)
+            return SimpleNamespace(text="Here is the plan. It is a good plan.")
+
+    def stub_tts(text: str, voice_id: str):
+        time.sleep(latency)
+        return SimpleNamespace(audio_file=f"https://example.invalid/{abs(hash(text))}.mp3")
+
+    app_module.providers.transcriber = StubTranscriber
+    app_module.providers.llm_model = StubModel
+    app_module.providers.murf_client = lambda: SimpleNamespace(
+        text_to_speech=SimpleNamespace(generate=stub_tts)
+    )
+    app_module.vector_service = None
+
+
+async def run_turns(sessions: int) -> float:
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def turn(idx: int) -> None:
+            files = {"audio": (f"turn-{idx}.webm", b"\x00" * 1024, "audio/webm")}
+            response = await client.post(f"/agent/chat/bench-{idx}", files=files)
+            response.raise_for_status()
+            if response.json().get("error"):
+                raise RuntimeError(response.json())
+
+        started = time.perf_counter()
+        await asyncio.gather(*(turn(idx) for idx in range(sessions)))
+        return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.3)
+    args = parser.parse_args()
+
+    install_stub_providers(args.latency)
+    single = asyncio.run(run_turns(1))
+    concurrent = asyncio.run(run_turns(args.sessions))
+
+    print(f"1 session:  {single:.3f}s")
+    print(f"{args.sessions} sessions: {concurrent:.3f}s ({concurrent / single:.2f}x single)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Compares embedding backends on a fixed synthetic corpus: embeddings/sec,
+peak memory, and retrieval-recall drift (overlap of each backend's top-k
+chunks with the torch backend's top-k for the same queries).
+
+Each backend runs in its own subprocess so memory figures are not polluted
+by the others. Backends whose dependencies are missing are reported as such.
+
+Usage: python benchmarks/embedding_backends.py --chunks 2000 --threads 4
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.vector_service import EMBEDDING_BACKENDS, create_embedding_backend  # noqa: E402
+
+TOPICS = [
+    "refund policy", "password reset", "shipping times", "invoice disputes",
+    "account deletion", "data export", "two factor login", "api rate limits",
+    "billing cycle", "team permissions", "webhook retries", "sso setup",
+]
+TEMPLATES = [
+    "How the {topic} works for customers on the {tier} plan.",
+    "Troubleshooting {topic} when the request fails with error {code}.",
+    "The {topic} changed in release {code}; {tier} accounts are affected first.",
+    "Support agents escalate {topic} tickets after {code} minutes without reply.",
+]
+
+
+def make_corpus(chunks: int, queries: int) -> tuple[list[str], list[str]]:
+    rng = random.Random(13)
+    corpus = [
+        rng.choice(TEMPLATES).format(
+            topic=rng.choice(TOPICS),
+            tier=rng.choice(["free", "pro", "enterprise"]),
+            code=rng.randrange(100, 999),
+        )
+        for _ in range(chunks)
+    ]
+    questions = [
+        f"{rng.choice(['how do I', 'why does', 'what is'])} {rng.choice(TOPICS)}"
+        f" {rng.choice(['fail', 'work', 'change', 'cost'])}"
+        for _ in range(queries)
+    ]
+    return corpus, questions
+
+
+def run_worker(args: argparse.Namespace) -> None:
+    import numpy as np
+
+    corpus, questions = make_corpus(args.chunks, args.queries)
+    load_started = time.perf_counter()
+    backend = create_embedding_backend(
+        args.worker, args.model, threads=args.threads or None
+    )
+    load_seconds = time.perf_counter() - load_started
+    backend(corpus[: args.batch_size])  # warm up
+
+    started = time.perf_counter()
+    vectors = []
+    for start in range(0, len(corpus), args.batch_size):
+        vectors.extend(backend(corpus[start : start + args.batch_size]))
+    encode_seconds = time.perf_counter() - started
+
+    np.save(args.output, np.array(vectors + backend(questions), dtype=np.float32))
+    print(
+        json.dumps(
+            {
+                "load_s": load_seconds,
+                "per_sec": len(corpus) / encode_seconds,
+                # ru_maxrss is reported in KiB on Linux.
+                "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            }
+        )
+    )
+
+
+def top_k(vectors, chunks: int, k: int):
+    import numpy as np
+
+    corpus, questions = vectors[:chunks], vectors[chunks:]
+    return np.argsort(-(questions @ corpus.T), axis=1)[:, :k]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--backends", default=",".join(EMBEDDING_BACKENDS))
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--top-k", type=int, default=4)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    import numpy as np
+
+    workdir = tempfile.mkdtemp()
+    results = {}
+    for backend in args.backends.split(","):
+        output = os.path.join(workdir, f"{backend}.npy")
+        completed = subprocess.run(
+            [
+                sys.executable, __file__,
+                "--worker", backend, "--output", output,
+                "--model", args.model,
+                "--chunks", str(args.chunks), "--queries", str(args.queries),
+                "--batch-size", str(args.batch_size), "--threads", str(args.threads),
+            ],
+            capture_output=True,
+            text=True,
+        )
+        if completed.returncode != 0:
+            error = completed.stderr.strip().splitlines() or ["unknown error"]
+            results[backend] = {"error": error[-1]}
+            continue
+        results[backend] = json.loads(completed.stdout.strip().splitlines()[-1])
+        results[backend]["ranking"] = top_k(np.load(output), args.chunks, args.top_k)
+
+    reference = results.get("torch", {}).get("ranking")
+    print(f"{'backend':<11} {'load s':>7} {'emb/s':>8} {'peak MB':>8} {'recall@k':>9}")
+    for backend, result in results.items():
+        if "error" in result:
+            print(f"{backend:<11} unavailable: {result['error']}")
+            continue
+        if reference is None:
+            recall = "n/a"
+        else:
+            overlap = [
+                len(set(ours) & set(theirs)) / args.top_k
+                for ours, theirs in zip(result["ranking"], reference)
+            ]
+            recall = f"{sum(overlap) / len(overlap):.3f}"
+        print(
+            f"{backend:<11} {result['load_s']:>7.1f} {result['per_sec']:>8.0f} "
+            f"{result['peak_rss_mb']:>8.0f} {recall:>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+"""
+Offline load test of the HTTP API. AssemblyAI, Gemini and Murf are replaced
+by in-process fakes with configurable latency and failure rates, and the
+embedding model by a hashing embedder (or the configured model with
+--embeddings model), so the numbers cover this service's own code: the
+stage executor, PersistenceService, VectorService and ingestion.
+
+A weighted mix of requests runs against
+  chat       POST /agent/chat/{session_id}
+  history    GET  /chat/{session_id}
+  documents  GET  /documents
+  upload     POST /documents/upload (timed until the ingestion job finishes)
+at a fixed concurrency, and reports throughput, p50/p95/p99 latency per
+endpoint and peak RSS. Results can be saved as a baseline and later runs
+compared against it; --fail-on-regression exits non-zero when p95 latency,
+throughput or memory moves past --tolerance.
+
+Usage:
+  python benchmarks/load_test.py --requests 400 --concurrency 16 --save-baseline base.json
+  python benchmarks/load_test.py --requests 400 --concurrency 16 --baseline base.json \
+      --fail-on-regression
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import platform
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ENDPOINTS = ("chat", "history", "documents", "upload")
+TOPICS = [
+    "refund policy", "password reset", "shipping times", "invoice disputes",
+    "account deletion", "data export", "two factor login", "api rate limits",
+]
+FILLER = (
+    "the customer team reviews each request and replies with the steps needed to "
+    "resolve it while keeping a record of every change made to the account"
+).split()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument(
+        "--mix",
+        default="chat=6,history=2,documents=1,upload=1",
+        help="Relative weights per endpoint.",
+    )
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--doc-words", type=int, default=1500)
+    parser.add_argument("--stt-latency", type=float, default=0.2)
+    parser.add_argument("--llm-latency", type=float, default=0.4)
+    parser.add_argument("--tts-latency", type=float, default=0.15)
+    parser.add_argument("--stt-failure-rate", type=float, default=0.0)
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0)
+    parser.add_argument("--tts-failure-rate", type=float, default=0.0)
+    parser.add_argument("--embeddings", choices=("hash", "model", "none"), default="hash")
+    parser.add_argument(
+        "--answer-cache",
+        action="store_true",
+        help="Keep the answer cache on (off by default, as questions repeat).",
+    )
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--save-baseline")
+    parser.add_argument("--baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--verbose", action="store_true", help="Keep the app's request logs.")
+    return parser.parse_args()
+
+
+def configure_environment(args: argparse.Namespace) -> None:
+    """Points every store at a scratch directory; must run before importing app."""
+    workdir = tempfile.mkdtemp(prefix="load-test-")
+    os.environ.setdefault("ASSEMBLYAI_API_KEY", "load-test")
+    os.environ.setdefault("GEMINI_API_KEY", "load-test")
+    os.environ.setdefault("MURF_API_KEY", "load-test")
+    os.environ["SQLITE_DB_PATH"] = os.path.join(workdir, "app.db")
+    os.environ["CHROMA_DIR"] = os.path.join(workdir, "chroma")
+    os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(workdir, "embeddings.db")
+    # Fake audio URLs cannot be downloaded into the local audio store.
+    os.environ["AUDIO_STORE_MAX_BYTES"] = "0"
+    if not args.answer_cache:
+        os.environ["ANSWER_CACHE_MAX_ENTRIES"] = "0"
+
+
+class HashingEmbedding:
+    """Deterministic bag-of-words vectors; shares words, shares direction."""
+
+    name = "hash"
+
+    def __init__(self, dimensions: int = 384):
+        self.dimensions = dimensions
+
+    def __call__(self, input: list[str]) -> list[list[float]]:
+        vectors = []
+        for text in input:
+            vector = [0.0] * self.dimensions
+            for word in text.lower().split():
+                digest = hashlib.blake2b(word.encode("utf-8"), digest_size=4).digest()
+                vector[int.from_bytes(digest, "little") % self.dimensions] += 1.0
+            norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+            vectors.append([value / norm for value in vector])
+        return vectors
+
+
+def install_fake_providers(app_module, args: argparse.Namespace, rng: random.Random) -> None:
+    def provider_delay(latency: float, failure_rate: float, provider: str) -> None:
+        # +-20% jitter so concurrent calls do not finish in lockstep.
+        time.sleep(latency * rng.uniform(0.8, 1.2))
+        if rng.random() < failure_rate:
+            raise RuntimeError(f"Injected {provider} failure")
+
+    class FakeTranscriber:
+        def transcribe(self, audio_file):
+            provider_delay(args.stt_latency, args.stt_failure_rate, "assemblyai")
+            topic = rng.choice(TOPICS)
+            return SimpleNamespace(
+                status="completed", text=f"How does the {topic} work?", error=None
+            )
+
+    class FakeModel:
+        def __init__(self, *_args, **_kwargs):
+            pass
+
+        def generate_content(self, prompt, stream=False, **_kwargs):
+            if not stream:
+                provider_delay(args.llm_latency, args.llm_failure_rate, "gemini")
+                return SimpleNamespace(text="Here is how it works. Ask me for more detail.")
+
+            def chunks():
+                for piece in ("Here is how it works. ", "Ask me for more detail."):
+                    provider_delay(args.llm_latency / 2, args.llm_failure_rate / 2, "gemini")
+                    yield SimpleNamespace(text=piece)
+
+            return chunks()
+
+    def fake_generate(text: str, voice_id: str, **_kwargs):
+        provider_delay(args.tts_latency, args.tts_failure_rate, "murf")
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+        return SimpleNamespace(audio_file=f"https://audio.invalid/{digest}.mp3")
+
+    transcriber = FakeTranscriber()
+    app_module.providers.transcriber = lambda: transcriber
+    app_module.providers.llm_model = FakeModel
+    app_module.providers.murf_client = lambda: SimpleNamespace(
+        text_to_speech=SimpleNamespace(generate=fake_generate)
+    )
+
+
+def make_document(rng: random.Random, words: int) -> bytes:
+    topic = rng.choice(TOPICS)
+    body = [rng.choice(FILLER) if rng.random() > 0.1 else topic for _ in range(words)]
+    return f"Guide to the {topic}.\n\n{' '.join(body)}\n".encode("utf-8")
+
+
+def current_rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def run_load(app_module, args: argparse.Namespace, rng: random.Random) -> dict:
+    import httpx
+
+    weights = {}
+    for part in args.mix.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ENDPOINTS:
+            raise SystemExit(f"Unknown endpoint '{name}' in --mix; expected {ENDPOINTS}")
+        weights[name] = float(weight or 1)
+    if weights.get("upload") and app_module.ingestion_jobs is None:
+        raise SystemExit("Uploads need the vector service; use --embeddings hash or model.")
+    names = list(weights)
+    schedule = rng.choices(names, weights=[weights[name] for name in names], k=args.requests)
+    warmup = rng.choices(names, weights=[weights[name] for name in names], k=args.warmup)
+
+    latencies: dict[str, list[float]] = {name: [] for name in names}
+    failures = {name: 0 for name in names}
+    degraded = {name: 0 for name in names}
+    peak_rss = current_rss_mb()
+    sampling = True
+
+    async def sample_memory() -> None:
+        nonlocal peak_rss
+        while sampling:
+            peak_rss = max(peak_rss, current_rss_mb())
+            await asyncio.sleep(0.05)
+
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://load-test", timeout=120
+    ) as client:
+
+        async def request(name: str) -> tuple[bool, bool]:
+            """Returns (ok, degraded); degraded turns fell back to an error reply."""
+            session_id = f"load-{rng.randrange(args.sessions)}"
+            if name == "chat":
+                files = {"audio": ("turn.webm", b"\x00" * 2048, "audio/webm")}
+                response = await client.post(f"/agent/chat/{session_id}", files=files)
+                return response.status_code == 200, bool(response.json().get("error"))
+            if name == "history":
+                response = await client.get(f"/chat/{session_id}")
+                return response.status_code == 200, False
+            if name == "documents":
+                response = await client.get("/documents")
+                return response.status_code == 200, False
+
+            document = make_document(rng, args.doc_words)
+            files = {"file": (f"guide-{rng.randrange(10**9)}.txt", document, "text/plain")}
+            response = await client.post("/documents/upload", files=files)
+            if response.status_code != 202:
+                return False, False
+            job_id = response.json()["job_id"]
+            while True:
+                job = (await client.get(f"/documents/jobs/{job_id}")).json()
+                if job["status"] in ("completed", "failed"):
+                    return job["status"] == "completed", False
+                await asyncio.sleep(0.02)
+
+        async def worker(queue: list[str], record: bool) -> None:
+            while queue:
+                name = queue.pop()
+                started = time.perf_counter()
+                try:
+                    ok, fell_back = await request(name)
+                except Exception:
+                    ok, fell_back = False, False
+                elapsed = time.perf_counter() - started
+                if not record:
+                    continue
+                latencies[name].append(elapsed)
+                failures[name] += not ok
+                degraded[name] += fell_back
+
+        await asyncio.gather(*(worker(warmup, False) for _ in range(args.concurrency)))
+        sampler = asyncio.create_task(sample_memory())
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(schedule, True) for _ in range(args.concurrency)))
+        wall = time.perf_counter() - started
+        sampling = False
+        await sampler
+
+    def percentile(values: list[float], q: int) -> float:
+        if len(values) < 2:
+            return values[0] * 1000 if values else 0.0
+        return statistics.quantiles(values, n=100, method="inclusive")[q - 1] * 1000
+
+    endpoints = {
+        name: {
+            "count": len(values),
+            "failures": failures[name],
+            "degraded": degraded[name],
+            "throughput": len(values) / wall,
+            "p50_ms": percentile(values, 50),
+            "p95_ms": percentile(values, 95),
+            "p99_ms": percentile(values, 99),
+        }
+        for name, values in latencies.items()
+    }
+    return {
+        "config": {
+            key: getattr(args, key)
+            for key in (
+                "requests", "concurrency", "mix", "sessions", "doc_words",
+                "stt_latency", "llm_latency", "tts_latency", "stt_failure_rate",
+                "llm_failure_rate", "tts_failure_rate", "embeddings", "answer_cache",
+            )
+        },
+        "python": platform.python_version(),
+        "wall_seconds": wall,
+        "throughput": args.requests / wall,
+        "peak_rss_mb": max(peak_rss, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024),
+        "endpoints": endpoints,
+    }
+
+
+def print_results(results: dict) -> None:
+    print(
+        f"{results['throughput']:.1f} req/s over {results['wall_seconds']:.1f}s, "
+        f"peak RSS {results['peak_rss_mb']:.0f} MB"
+    )
+    print(
+        f"{'endpoint':<10} {'count':>6} {'fail':>5} {'degr':>5} {'req/s':>7} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    )
+    for name, stats in results["endpoints"].items():
+        print(
+            f"{name:<10} {stats['count']:>6} {stats['failures']:>5} {stats['degraded']:>5} "
+            f"{stats['throughput']:>7.1f} {stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} "
+            f"{stats['p99_ms']:>8.1f}"
+        )
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Prints the deltas and returns descriptions of regressions past `tolerance`."""
+    if baseline.get("config") != results["config"]:
+        print("warning: baseline was recorded with a different configuration")
+    regressions = []
+
+    def check(label: str, old: float, new: float, higher_is_worse: bool) -> None:
+        if not old:
+            return
+        change = (new - old) / old
+        worse = change > tolerance if higher_is_worse else change < -tolerance
+        marker = "  REGRESSION" if worse else ""
+        print(f"  {label:<22} {old:>9.1f} -> {new:>9.1f} ({change:+.0%}){marker}")
+        if worse:
+            regressions.append(f"{label} {change:+.0%}")
+
+    print("vs baseline:")
+    check("throughput req/s", baseline["throughput"], results["throughput"], False)
+    check("peak RSS MB", baseline["peak_rss_mb"], results["peak_rss_mb"], True)
+    for name, stats in results["endpoints"].items():
+        old = baseline["endpoints"].get(name)
+        if old is not None:
+            check(f"{name} p95 ms", old["p95_ms"], stats["p95_ms"], True)
+    return regressions
+
+
+def main() -> None:
+    args = parse_args()
+    configure_environment(args)
+    rng = random.Random(args.seed)
+
+    import app as app_module
+    from services import vector_service as vector_module
+
+    if not args.verbose:
+        # Injected failures would otherwise log an error per degraded turn.
+        logging.disable(logging.ERROR)
+    install_fake_providers(app_module, args, rng)
+    if args.embeddings == "hash":
+        vector_module.create_embedding_backend = lambda *_args, **_kwargs: HashingEmbedding()
+    if args.embeddings != "none":
+        app_module._load_vector_service()
+        if app_module.vector_service is None:
+            raise SystemExit("Vector service failed to load; see the log above.")
+
+    results = asyncio.run(run_load(app_module, args, rng))
+    app_module.stage_executor.shutdown(wait=True)
+    app_module.persistence_service.close()
+    print_results(results)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+        print(f"baseline saved to {args.save_baseline}")
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.tolerance)
+        if regressions and args.fail_on_regression:
+            print(f"regressions: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Shows that history fetch and document listing stay flat as the message and
+chunk tables grow (default: up to 1M messages and 100k chunks).
+
+Usage: python benchmarks/persistence_scaling.py --messages 1000000 --chunks 100000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.persistence_service import PersistenceService  # noqa: E402
+
+DOCUMENTS = 200
+SESSIONS = 10_000
+
+
+def fill(service: PersistenceService, messages: int, chunks: int, doc_ids: list[str]) -> None:
+    """Bulk-loads rows directly so setup time does not dominate the run."""
+    now = service._utc_now()
+    with service._write() as conn:
+        conn.executemany(
+            "INSERT INTO messages (session_id, role, content, metadata_json, created_at)"
+            " VALUES (?, 'user', 'filler message', '{}', ?)",
+            ((f"session-{idx % SESSIONS}", now) for idx in range(messages)),
+        )
+        conn.executemany(
+            "INSERT INTO chunks (doc_id, chunk_index, content, metadata_json, created_at)"
+            " VALUES (?, ?, 'filler chunk', '{}', ?)",
+            ((doc_ids[idx % DOCUMENTS], idx, now) for idx in range(chunks)),
+        )
+        conn.execute(
+            "UPDATE documents SET chunk_count = chunk_count + ?", (chunks // DOCUMENTS,)
+        )
+
+
+def timed(fn, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--chunks", type=int, default=100_000)
+    parser.add_argument("--steps", type=int, default=4)
+    args = parser.parse_args()
+
+    service = PersistenceService(os.path.join(tempfile.mkdtemp(), "bench.db"))
+    doc_ids = [service.create_document(f"doc-{idx}.txt", "text/plain") for idx in range(DOCUMENTS)]
+
+    print(f"{'messages':>10} {'chunks':>8} {'history ms':>11} {'list docs ms':>13}")
+    loaded_messages = loaded_chunks = 0
+    for step in range(1, args.steps + 1):
+        target_messages = args.messages * step // args.steps
+        target_chunks = args.chunks * step // args.steps
+        fill(
+            service,
+            target_messages - loaded_messages,
+            target_chunks - loaded_chunks,
+            doc_ids,
+        )
+        loaded_messages, loaded_chunks = target_messages, target_chunks
+
+        probe = f"session-{uuid.uuid4().int % SESSIONS}"
+        history_ms = timed(lambda: service.get_session_messages(probe, limit=12), 200)
+        listing_ms = timed(service.list_documents, 50)
+        print(f"{loaded_messages:>10,} {loaded_chunks:>8,} {history_ms:>11.3f} {listing_ms:>13.3f}")
+
+    service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Reports messages/sec for PersistenceService.save_message and
+get_session_messages under concurrent load.
+
+Usage: python benchmarks/persistence_throughput.py --threads 8 --messages 2000 [--write-behind]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.persistence_service import PersistenceService  # noqa: E402
+
+
+def measure(threads: int, per_thread: int, fn) -> float:
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(fn, range(threads)))
+    elapsed = time.perf_counter() - started
+    return threads * per_thread / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--messages", type=int, default=2000, help="per thread")
+    parser.add_argument("--write-behind", action="store_true")
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    service = PersistenceService(db_path, write_behind=args.write_behind)
+
+    def save(worker: int) -> None:
+        for idx in range(args.messages):
+            service.save_message(
+                f"session-{worker}", "user", f"message {idx}", metadata={"i": idx}
+            )
+
+    def fetch(worker: int) -> None:
+        for _ in range(args.messages):
+            service.get_session_messages(f"session-{worker}", limit=12)
+
+    save_rate = measure(args.threads, args.messages, save)
+    fetch_rate = measure(args.threads, args.messages, fetch)
+    service.close()
+
+    print(
+        f"threads={args.threads} messages/thread={args.messages} "
+        f"write_behind={args.write_behind}"
+    )
+    print(f"save_message:         {save_rate:,.0f} msg/s")
+    print(f"get_session_messages: {fetch_rate:,.0f} fetch/s")
+
+
+if __name__ == "__main__":
+    main()
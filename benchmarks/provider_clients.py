@@ -0,0 +1,173 @@
+"""
+Measures per-call overhead of the provider clients against a local mock of
+the Murf and AssemblyAI HTTP APIs, for three client strategies:
+
+  fresh     a new SDK client per call (new connection every time)
+  default   the SDKs' own shared clients (a per-call aai.Transcriber)
+  registry  ProviderRegistry's pooled keep-alive clients
+
+The mock sleeps --handshake-ms once per new connection to stand in for the
+TCP + TLS setup a remote provider costs; it is loopback otherwise, so the
+numbers isolate client-side overhead rather than provider latency.
+
+Usage: python benchmarks/provider_clients.py --calls 200 --handshake-ms 30
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.provider_registry import ProviderRegistry  # noqa: E402
+
+TRANSCRIPT = {"id": "bench", "status": "completed", "text": "hello", "audio_url": "x"}
+
+
+def start_mock_server(
+    handshake_seconds: float, response_seconds: float = 0.0
+) -> tuple[ThreadingHTTPServer, dict]:
+    """`response_seconds` stands in for provider-side processing on every request."""
+    counters = {"connections": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body are separate writes; without this, delayed ACKs
+        # add ~40 ms to every response.
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            counters["connections"] += 1
+            time.sleep(handshake_seconds)
+            super().setup()
+
+        def log_message(self, *_args):
+            pass
+
+        def _reply(self, payload: dict) -> None:
+            time.sleep(response_seconds)
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            if self.path.startswith("/v2/upload"):
+                self._reply({"upload_url": f"http://{self.headers['Host']}/upload/bench"})
+            elif self.path.startswith("/v2/transcript"):
+                self._reply(TRANSCRIPT)
+            else:
+                self._reply(
+                    {
+                        "audioFile": f"http://{self.headers['Host']}/audio/bench.mp3",
+                        "audioLengthInSeconds": 1.0,
+                        "consumedCharacterCount": 5,
+                        "remainingCharacterCount": 1000,
+                        "wordDurations": [],
+                    }
+                )
+
+        def do_GET(self):
+            self._reply(TRANSCRIPT)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, counters
+
+
+def make_clients(strategy: str, base_url: str):
+    """Returns (transcribe, synthesize) callables for the strategy."""
+    import assemblyai as aai
+    from murf.client import Murf
+    from murf.environment import MurfEnvironment
+
+    aai.settings.api_key = "bench"
+    aai.settings.base_url = base_url
+    environment = MurfEnvironment(base=base_url, production="ws://unused")
+
+    if strategy == "registry":
+        registry = ProviderRegistry(
+            assemblyai_api_key="bench",
+            murf_api_key="bench",
+            assemblyai_base_url=base_url,
+            murf_base_url=base_url,
+        )
+        return (
+            lambda audio: registry.transcriber().transcribe(audio),
+            lambda text: registry.murf_client().text_to_speech.generate(
+                text=text, voice_id="en-US-natalie"
+            ),
+        )
+
+    if strategy == "default":
+        murf = Murf(api_key="bench", environment=environment)
+        return (
+            lambda audio: aai.Transcriber().transcribe(audio),
+            lambda text: murf.text_to_speech.generate(text=text, voice_id="en-US-natalie"),
+        )
+
+    def fresh_transcribe(audio):
+        client = aai.Client(settings=aai.settings.copy())
+        try:
+            return aai.Transcriber(client=client).transcribe(audio)
+        finally:
+            client.http_client.close()
+
+    def fresh_synthesize(text):
+        murf = Murf(api_key="bench", environment=environment)
+        try:
+            return murf.text_to_speech.generate(text=text, voice_id="en-US-natalie")
+        finally:
+            murf._client_wrapper.httpx_client.httpx_client.close()
+
+    return fresh_transcribe, fresh_synthesize
+
+
+def measure(fn, arg, calls: int) -> list[float]:
+    fn(arg)  # warm up imports and the first connection
+    timings = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        fn(arg)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--handshake-ms", type=float, default=30.0)
+    parser.add_argument("--strategies", default="fresh,default,registry")
+    args = parser.parse_args()
+
+    server, counters = start_mock_server(args.handshake_ms / 1000)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    audio = os.path.join(os.path.dirname(os.path.abspath(__file__)), "provider_clients.py")
+
+    print(f"{'strategy':<9} {'provider':<11} {'p50 ms':>8} {'p95 ms':>8} {'conns':>6}")
+    for strategy in args.strategies.split(","):
+        transcribe, synthesize = make_clients(strategy, base_url)
+        for provider, fn, arg in (
+            ("assemblyai", transcribe, audio),
+            ("murf", synthesize, "Hello there."),
+        ):
+            before = counters["connections"]
+            timings = measure(fn, arg, args.calls)
+            print(
+                f"{strategy:<9} {provider:<11} {statistics.median(timings):>8.2f} "
+                f"{statistics.quantiles(timings, n=20)[18]:>8.2f} "
+                f"{counters['connections'] - before:>6}"
+            )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
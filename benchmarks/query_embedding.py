@@ -0,0 +1,103 @@
+"""
+Compares per-query encoding with MicroBatchEmbedder at 1, 8 and 64
+concurrent callers, reporting p50/p99 latency and queries/sec.
+
+By default the encoder is simulated (fixed per-call overhead plus a small
+per-item cost, the shape of a CPU transformer forward pass). Pass --model
+to use a real SentenceTransformer instead.
+
+Usage: python benchmarks/query_embedding.py --queries 512 [--model all-MiniLM-L6-v2]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.vector_service import MicroBatchEmbedder  # noqa: E402
+
+PHRASES = [
+    "what is the refund policy",
+    "how do I reset my password",
+    "tell me about order {n}",
+    "what does error code E{n} mean",
+    "summarize the onboarding guide",
+    "who owns project {n}",
+]
+
+
+class SimulatedEncoder:
+    def __init__(self, call_ms: float, item_ms: float):
+        self.call_ms = call_ms
+        self.item_ms = item_ms
+        self._lock = threading.Lock()
+
+    def __call__(self, input: list[str]) -> list[list[float]]:
+        # One forward pass at a time, as on a single CPU-bound model.
+        with self._lock:
+            time.sleep((self.call_ms + self.item_ms * len(input)) / 1000)
+        return [[float(len(text))] for text in input]
+
+
+def make_queries(count: int, repeat_ratio: float) -> list[str]:
+    rng = random.Random(3)
+    queries = []
+    for idx in range(count):
+        if queries and rng.random() < repeat_ratio:
+            queries.append(rng.choice(queries))
+        else:
+            queries.append(rng.choice(PHRASES).format(n=idx))
+    return queries
+
+
+def run(embed, queries: list[str], concurrency: int) -> tuple[float, float, float]:
+    latencies: list[float] = []
+
+    def one(query: str) -> None:
+        started = time.perf_counter()
+        embed(query)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, queries))
+    elapsed = time.perf_counter() - started
+    cuts = statistics.quantiles(latencies, n=100)
+    return cuts[49], cuts[98], len(queries) / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=512)
+    parser.add_argument("--repeat-ratio", type=float, default=0.3)
+    parser.add_argument("--call-ms", type=float, default=8.0)
+    parser.add_argument("--item-ms", type=float, default=0.4)
+    parser.add_argument("--model", help="SentenceTransformer model name to use instead of the simulation")
+    args = parser.parse_args()
+
+    if args.model:
+        from services.vector_service import _SentenceTransformerEmbeddingFunction
+
+        encoder = _SentenceTransformerEmbeddingFunction(args.model)
+    else:
+        encoder = SimulatedEncoder(args.call_ms, args.item_ms)
+
+    queries = make_queries(args.queries, args.repeat_ratio)
+    print(f"{'mode':<12} {'callers':>7} {'p50 ms':>8} {'p99 ms':>8} {'qps':>8}")
+    for concurrency in (1, 8, 64):
+        p50, p99, qps = run(lambda text: encoder([text])[0], queries, concurrency)
+        print(f"{'unbatched':<12} {concurrency:>7} {p50:>8.1f} {p99:>8.1f} {qps:>8.0f}")
+
+        embedder = MicroBatchEmbedder(encoder)
+        p50, p99, qps = run(embedder.embed, queries, concurrency)
+        print(f"{'microbatch':<12} {concurrency:>7} {p50:>8.1f} {p99:>8.1f} {qps:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Ingests a synthetic corpus, then re-ingests it with a fraction of documents
+edited, and reports how many chunks had to be embedded each time. The
+encoder is simulated with a fixed per-text cost so the benchmark runs
+without downloading a model.
+
+Usage: python benchmarks/reingestion.py --docs 10000 --edited 0.05
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.embedding_cache import EmbeddingCache  # noqa: E402
+from services.executor_service import StageExecutor  # noqa: E402
+from services.ingestion_service import IngestionJobQueue  # noqa: E402
+from services.persistence_service import PersistenceService  # noqa: E402
+from services.vector_service import _CachedEmbeddingFunction  # noqa: E402
+
+
+class SimulatedEncoder:
+    def __init__(self, seconds_per_text: float):
+        self.seconds_per_text = seconds_per_text
+        self.encoded = 0
+
+    def __call__(self, input: list[str]) -> list[list[float]]:
+        time.sleep(self.seconds_per_text * len(input))
+        self.encoded += len(input)
+        return [[float(len(text)), 0.0, 1.0] for text in input]
+
+
+class InMemoryVectorService:
+    def __init__(self, embedding_function):
+        self.embedding_function = embedding_function
+        self.vectors: dict[str, list[float]] = {}
+
+    def upsert_chunks(self, ids, chunks, metadatas, namespace=None) -> None:
+        self.vectors.update(zip(ids, self.embedding_function(chunks)))
+
+    def delete_chunks(self, ids, namespace=None) -> None:
+        for chunk_id in ids:
+            self.vectors.pop(chunk_id, None)
+
+    def delete_by_doc_id(self, doc_id, namespace=None) -> None:
+        for chunk_id in [key for key in self.vectors if key.startswith(f"{doc_id}:")]:
+            del self.vectors[chunk_id]
+
+
+def make_document(rng: random.Random, words: int = 600) -> str:
+    return " ".join(f"term{rng.randrange(5000)}" for _ in range(words))
+
+
+def ingest_all(
+    queue: IngestionJobQueue,
+    workdir: str,
+    corpus: dict[str, str],
+    doc_ids: dict[str, str] | None = None,
+) -> tuple[float, dict[str, str]]:
+    """Ingests every document, as a new revision of `doc_ids[name]` when given."""
+    doc_ids = doc_ids or {}
+    started = time.perf_counter()
+    jobs = []
+    for name, text in corpus.items():
+        raw = text.encode("utf-8")
+        spool_path = os.path.join(workdir, f"{name}.spool")
+        with open(spool_path, "wb") as spool:
+            spool.write(raw)
+        jobs.append(
+            queue.submit(
+                name,
+                "text/plain",
+                spool_path,
+                len(raw),
+                hashlib.sha256(raw).hexdigest(),
+                replace_doc_id=doc_ids.get(name),
+            )
+        )
+    while any(job.status in ("queued", "running") for job in jobs):
+        time.sleep(0.01)
+    failed = [job for job in jobs if job.status == "failed"]
+    if failed:
+        raise RuntimeError(failed[0].error)
+    return time.perf_counter() - started, {job.filename: job.doc_id for job in jobs}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=10_000)
+    parser.add_argument("--edited", type=float, default=0.05)
+    parser.add_argument("--encode-ms", type=float, default=2.0, help="simulated cost per chunk")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    encoder = SimulatedEncoder(args.encode_ms / 1000)
+    embedding_function = _CachedEmbeddingFunction(
+        encoder, EmbeddingCache(os.path.join(workdir, "embeddings.db")), "simulated"
+    )
+    queue = IngestionJobQueue(
+        PersistenceService(os.path.join(workdir, "app.db")),
+        InMemoryVectorService(embedding_function),
+        StageExecutor(),
+    )
+
+    rng = random.Random(11)
+    corpus = {f"doc-{idx}.txt": make_document(rng) for idx in range(args.docs)}
+    first, doc_ids = ingest_all(queue, workdir, corpus)
+    first_encoded = encoder.encoded
+
+    for name in rng.sample(sorted(corpus), int(args.docs * args.edited)):
+        words = corpus[name].split()
+        words[rng.randrange(len(words))] = "edited"
+        corpus[name] = " ".join(words)
+    second, _ = ingest_all(queue, workdir, corpus, doc_ids)
+
+    print(f"initial ingest:  {first:.1f}s, {first_encoded:,} chunks embedded")
+    print(
+        f"re-ingest ({args.edited:.0%} edited): {second:.1f}s, "
+        f"{encoder.encoded - first_encoded:,} chunks embedded"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Compares the STT and TTS backends per stage: wall-clock latency (p50/p95),
+CPU time spent in this process per call, and the cold first call (model
+load or connection setup).
+
+Hosted backends (AssemblyAI, Murf) run against the mock provider server
+from provider_clients.py in a separate process, so its CPU is not counted;
+--handshake-ms and --provider-ms stand in for connection setup and
+provider-side processing. Local backends (Vosk, Piper) run when their
+package is installed and a model path is given, and are skipped otherwise.
+
+The default input is a synthetic 16 kHz WAV; pass --audio with a real
+recording to get meaningful Vosk transcripts (timings hold either way).
+
+Usage: python benchmarks/speech_backends.py --calls 30 \\
+    --vosk-model models/vosk --piper-model models/piper/en_US-lessac-medium.onnx
+"""
+
+import argparse
+import importlib.util
+import io
+import multiprocessing
+import os
+import shutil
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from provider_clients import start_mock_server  # noqa: E402
+from services.assemblyai_service import AssemblyAIService  # noqa: E402
+from services.audio_preprocessing import AudioSettings  # noqa: E402
+from services.local_speech import PiperTextToSpeech, VoskSpeechToText  # noqa: E402
+from services.murf_service import MurfService  # noqa: E402
+from services.provider_registry import ProviderRegistry  # noqa: E402
+from services.realtime_stt_service import pcm16_to_wav  # noqa: E402
+
+REPLY = "Sure. Your order shipped this morning and should arrive on Thursday."
+
+
+def _serve(port_queue, handshake_seconds: float, response_seconds: float) -> None:
+    server, _ = start_mock_server(handshake_seconds, response_seconds)
+    port_queue.put(server.server_address[1])
+    while True:
+        time.sleep(3600)
+
+
+def synth_audio(seconds: float = 3.0, sample_rate: int = 16000) -> bytes:
+    import array
+    import math
+
+    samples = array.array("h")
+    for i in range(int(seconds * sample_rate)):
+        t = i / sample_rate
+        samples.append(int(6000 * math.sin(2 * math.pi * 180 * t) * abs(math.sin(8 * t))))
+    return pcm16_to_wav(samples.tobytes(), sample_rate)
+
+
+def measure(fn, calls: int) -> dict[str, float]:
+    started = time.perf_counter()
+    fn()
+    cold_ms = (time.perf_counter() - started) * 1000
+    wall, cpu = [], []
+    for _ in range(calls):
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        fn()
+        wall.append((time.perf_counter() - wall_start) * 1000)
+        cpu.append((time.process_time() - cpu_start) * 1000)
+    return {
+        "cold": cold_ms,
+        "p50": statistics.median(wall),
+        "p95": statistics.quantiles(wall, n=20)[18] if len(wall) > 1 else wall[0],
+        "cpu": statistics.mean(cpu),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=30)
+    parser.add_argument("--handshake-ms", type=float, default=30.0)
+    parser.add_argument("--provider-ms", type=float, default=150.0)
+    parser.add_argument("--audio", help="WAV (or any format, with ffmpeg) to transcribe")
+    parser.add_argument("--vosk-model")
+    parser.add_argument("--piper-model")
+    args = parser.parse_args()
+
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(
+        target=_serve,
+        args=(port_queue, args.handshake_ms / 1000, args.provider_ms / 1000),
+        daemon=True,
+    )
+    server.start()
+    base_url = f"http://127.0.0.1:{port_queue.get(timeout=10)}"
+
+    if args.audio:
+        with open(args.audio, "rb") as recording:
+            audio = recording.read()
+    else:
+        audio = synth_audio()
+
+    registry = ProviderRegistry(
+        assemblyai_api_key="bench",
+        murf_api_key="bench",
+        assemblyai_base_url=base_url,
+        murf_base_url=base_url,
+    )
+    assemblyai = AssemblyAIService(registry)
+    murf = MurfService(registry)
+
+    def murf_turn() -> None:
+        # The app downloads hosted audio into its store, so that is part of the stage.
+        speech = murf.generate_speech(REPLY, murf.default_voice)
+        registry.download_client().get(speech.audio_url).read()
+
+    stages: list[tuple[str, str, object]] = [
+        ("stt", "assemblyai", lambda: assemblyai.transcribe_audio(io.BytesIO(audio))),
+        ("tts", "murf", murf_turn),
+    ]
+    skipped = []
+    if args.vosk_model and importlib.util.find_spec("vosk"):
+        settings = AudioSettings(ffmpeg_path=shutil.which("ffmpeg"))
+        vosk = VoskSpeechToText(args.vosk_model, settings)
+        stages.append(("stt", "vosk", lambda: vosk.transcribe_audio(io.BytesIO(audio))))
+    else:
+        skipped.append("vosk (needs the vosk package and --vosk-model)")
+    if args.piper_model and importlib.util.find_spec("piper"):
+        piper = PiperTextToSpeech(args.piper_model)
+        stages.append(("tts", "piper", lambda: piper.generate_speech(REPLY, piper.default_voice)))
+    else:
+        skipped.append("piper (needs the piper-tts package and --piper-model)")
+
+    print(f"{'stage':<5} {'backend':<11} {'cold ms':>9} {'p50 ms':>8} {'p95 ms':>8} {'cpu ms':>8}")
+    for stage, backend, fn in stages:
+        result = measure(fn, args.calls)
+        print(
+            f"{stage:<5} {backend:<11} {result['cold']:>9.1f} {result['p50']:>8.1f} "
+            f"{result['p95']:>8.1f} {result['cpu']:>8.2f}"
+        )
+    for note in skipped:
+        print(f"skipped: {note}")
+    registry.close()
+    server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Measures cold start: the import time of app.py in a fresh interpreter, and,
+for each STARTUP_MODE, how long a uvicorn process takes to answer /healthz
+(accepting connections) and /readyz (model and SDKs loaded).
+
+Usage: python benchmarks/startup_time.py --runs 5 [--port 8765]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = (
+    "import time; started = time.perf_counter(); import app; "
+    "print(time.perf_counter() - started)"
+)
+
+
+def measure_import(env: dict[str, str]) -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET],
+        cwd=REPO_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def wait_for(url: str, deadline: float, ok_status: int = 200) -> float | None:
+    while time.perf_counter() < deadline:
+        try:
+            if httpx.get(url, timeout=0.5).status_code == ok_status:
+                return time.perf_counter()
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.02)
+    return None
+
+
+def measure_server(env: dict[str, str], port: int, timeout: float) -> tuple[float, float | None]:
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(port), "--log-level", "warning"],
+        cwd=REPO_ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = started + timeout
+        live = wait_for(f"http://127.0.0.1:{port}/healthz", deadline)
+        if live is None:
+            raise RuntimeError("server never became live")
+        ready = wait_for(f"http://127.0.0.1:{port}/readyz", deadline)
+        return live - started, (ready - started) if ready is not None else None
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def fmt(values: list[float | None]) -> str:
+    measured = [value for value in values if value is not None]
+    if not measured:
+        return "   timeout"
+    return f"{statistics.median(measured):>10.2f}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    env = {
+        **os.environ,
+        "SQLITE_DB_PATH": os.path.join(workdir, "app.db"),
+        "EMBEDDING_CACHE_PATH": os.path.join(workdir, "embeddings.db"),
+        "CHROMA_DIR": os.path.join(workdir, "chroma"),
+    }
+
+    imports = [measure_import(env) for _ in range(args.runs)]
+    print(f"import app: median {statistics.median(imports):.2f}s over {args.runs} runs")
+
+    print(f"{'mode':<12} {'live s':>10} {'ready s':>10}")
+    for mode in ("background", "eager"):
+        live, ready = [], []
+        for _ in range(args.runs):
+            live_s, ready_s = measure_server(
+                {**env, "STARTUP_MODE": mode}, args.port, args.timeout
+            )
+            live.append(live_s)
+            ready.append(ready_s)
+        print(f"{mode:<12} {fmt(live)} {fmt(ready)}")
+
+
+if __name__ == "__main__":
+    main()
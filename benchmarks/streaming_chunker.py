@@ -0,0 +1,92 @@
+"""
+Streams a large generated text file through iter_text_chunks and reports
+chunks/sec and peak RSS at each tenth of the file. Peak RSS should stay flat
+and throughput constant regardless of file size.
+
+Usage: python benchmarks/streaming_chunker.py --size-mb 500
+"""
+
+import argparse
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.ingestion_service import iter_file_blocks, iter_text_chunks  # noqa: E402
+
+VOCABULARY = [
+    "voice", "agent", "retrieval", "latency", "sqlite", "embedding", "chunk",
+    "über", "naïve", "café", "token", "stream", "budget", "session", "murf",
+]
+
+
+def write_corpus(path: str, size_mb: int) -> None:
+    rng = random.Random(7)
+    target = size_mb * 1024 * 1024
+    written = 0
+    with open(path, "w", encoding="utf-8") as corpus:
+        while written < target:
+            line = " ".join(rng.choice(VOCABULARY) for _ in range(120)) + "\n"
+            corpus.write(line)
+            written += len(line.encode("utf-8"))
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=int, default=500)
+    parser.add_argument("--path", help="existing text file to chunk instead of generating one")
+    args = parser.parse_args()
+
+    path = args.path
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(), "corpus.txt")
+        print(f"Generating {args.size_mb} MB corpus at {path}...")
+        write_corpus(path, args.size_mb)
+
+    total_bytes = os.path.getsize(path)
+    checkpoint = total_bytes // 10
+    bytes_read = 0
+    next_report = checkpoint
+    chunks = 0
+    started = last_time = time.perf_counter()
+    last_chunks = 0
+
+    print(f"{'read MB':>8} {'chunks':>10} {'chunks/s (interval)':>20} {'peak RSS MB':>12}")
+    with open(path, "rb") as source:
+
+        def tracked_blocks():
+            nonlocal bytes_read
+            for block in iter_file_blocks(source):
+                bytes_read += len(block)
+                yield block
+
+        for _ in iter_text_chunks(tracked_blocks()):
+            chunks += 1
+            if bytes_read >= next_report:
+                now = time.perf_counter()
+                rate = (chunks - last_chunks) / (now - last_time)
+                print(
+                    f"{bytes_read / 2**20:>8.0f} {chunks:>10,} {rate:>20,.0f} {peak_rss_mb():>12.1f}"
+                )
+                last_time, last_chunks = now, chunks
+                next_report += checkpoint
+
+    elapsed = time.perf_counter() - started
+    print(f"total: {chunks:,} chunks in {elapsed:.1f}s ({chunks / elapsed:,.0f}/s)")
+
+    if args.path is None:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 import uvicorn
-from app import app  # Import the FastAPI app instance from app.py
 import logging
+import multiprocessing
+import os
+import secrets
 
 # Configure basic logging for the entry point
 logging.basicConfig(
@@ -8,12 +10,49 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+WORKERS = int(os.getenv("WORKERS", "1"))
+
+
+def _run_vector_service(address: str) -> None:
+    import app
+
+    app.serve_vector_service(address)
+
+
+def _start_vector_service() -> multiprocessing.Process:
+    """
+    Starts the process that owns the embedding model and the Chroma store
+    for every API worker, so neither is duplicated or written concurrently.
+    """
+    address = os.path.abspath(os.getenv("VECTOR_SERVICE_SOCKET", "data/vector.sock"))
+    os.environ.setdefault("VECTOR_SERVICE_AUTHKEY", secrets.token_hex(16))
+    # The process is spawned, not forked, so it does not inherit loaded
+    # model or sqlite state; it must not see the socket variable itself.
+    os.environ.pop("VECTOR_SERVICE_SOCKET", None)
+    process = multiprocessing.get_context("spawn").Process(
+        target=_run_vector_service, args=(address,), name="vector-service", daemon=True
+    )
+    process.start()
+    os.environ["VECTOR_SERVICE_SOCKET"] = address
+    # Per-worker caches would serve stale data once another worker writes.
+    os.environ.setdefault("HISTORY_CACHE_MAX_BYTES", "0")
+    os.environ.setdefault("ANSWER_CACHE_MAX_ENTRIES", "0")
+    return process
+
+
 if __name__ == "__main__":
     logger.info("Starting Uvicorn server for AI Voice Agent.")
-    uvicorn.run(
-        "app:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=False,
-        log_level="info",
-    )
+    vector_process = _start_vector_service() if WORKERS > 1 else None
+    try:
+        uvicorn.run(
+            "app:app",
+            host="0.0.0.0",
+            port=8000,
+            reload=False,
+            log_level="info",
+            workers=WORKERS,
+        )
+    finally:
+        if vector_process is not None:
+            vector_process.terminate()
+            vector_process.join(timeout=10)
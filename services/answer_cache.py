@@ -0,0 +1,198 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _unit(vector: list[float] | None) -> list[float] | None:
+    if vector is None:
+        return None
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / norm for value in vector]
+
+
+@dataclass
+class AnswerKey:
+    """Where a turn looks up, and after a miss stores, its answer."""
+
+    query_text: str
+    # None when the lookup matched on exact text only.
+    embedding: list[float] | None
+    chunk_ids: frozenset[str]
+    persona_key: str
+    # False after keyword-only retrieval, which never ran the embedding model.
+    embeddable: bool = True
+
+
+@dataclass
+class CachedAnswer:
+    text: str
+    # (sentence, audio_url) pairs in playback order.
+    segments: list[tuple[str, str]]
+    query: str
+    embedding: list[float] | None
+    bucket: tuple[str, frozenset[str]]
+    doc_ids: frozenset[str]
+    generation_seconds: float
+    expires_at: float
+
+
+class AnswerCache:
+    """
+    LRU/TTL cache of finished answers (LLM text plus synthesized audio).
+    Entries are bucketed by (persona key, retrieved chunk ids), so a change
+    in what retrieval returns is a miss by construction. Within a bucket a
+    query matches when its embedding's cosine similarity to the cached one
+    reaches `similarity_threshold`, or, without embeddings, when the
+    normalized text is identical. Entries are indexed by the documents
+    their chunks came from so re-ingesting or deleting one drops them.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 3600,
+        similarity_threshold: float = 0.95,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._entries: OrderedDict[int, CachedAnswer] = OrderedDict()
+        self._buckets: dict[tuple[str, frozenset[str]], set[int]] = {}
+        self._by_doc: dict[str, set[int]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.saved_seconds = 0.0
+
+    @staticmethod
+    def chunk_ids(retrieved_chunks: list[dict[str, Any]]) -> frozenset[str]:
+        return frozenset(chunk["id"] for chunk in retrieved_chunks if chunk.get("id"))
+
+    def has_candidates(self, chunk_ids: frozenset[str], persona_key: str) -> bool:
+        """Whether any answer is cached for this retrieval result (expired ones included)."""
+        with self._lock:
+            return (persona_key, chunk_ids) in self._buckets
+
+    @staticmethod
+    def _doc_id(chunk_id: str) -> str:
+        return chunk_id.rsplit(":", 1)[0]
+
+    def lookup(
+        self,
+        query_text: str,
+        embedding: list[float] | None,
+        chunk_ids: frozenset[str],
+        persona_key: str,
+        validate: Callable[[CachedAnswer], bool] | None = None,
+    ) -> CachedAnswer | None:
+        """
+        `validate` can reject the best match (e.g. its audio is gone); a
+        rejected entry is dropped and the lookup is a miss.
+        """
+        query = _normalize(query_text)
+        embedding = _unit(embedding)
+        now = time.monotonic()
+        with self._lock:
+            best_id, best_score = None, self.similarity_threshold
+            for entry_id in list(self._buckets.get((persona_key, chunk_ids), ())):
+                entry = self._entries[entry_id]
+                if entry.expires_at <= now:
+                    self._remove(entry_id)
+                    continue
+                if embedding is not None and entry.embedding is not None:
+                    score = sum(a * b for a, b in zip(embedding, entry.embedding))
+                else:
+                    score = 1.0 if entry.query == query else 0.0
+                if score >= best_score:
+                    best_id, best_score = entry_id, score
+
+            if best_id is not None and validate is not None:
+                if not validate(self._entries[best_id]):
+                    self._remove(best_id)
+                    best_id = None
+            if best_id is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_id)
+            entry = self._entries[best_id]
+            self.hits += 1
+            self.saved_seconds += entry.generation_seconds
+            return entry
+
+    def store(
+        self,
+        query_text: str,
+        embedding: list[float] | None,
+        chunk_ids: frozenset[str],
+        persona_key: str,
+        text: str,
+        segments: list[tuple[str, str]],
+        generation_seconds: float,
+    ) -> None:
+        if self.max_entries <= 0:
+            return
+        bucket = (persona_key, chunk_ids)
+        entry = CachedAnswer(
+            text=text,
+            segments=segments,
+            query=_normalize(query_text),
+            embedding=_unit(embedding),
+            bucket=bucket,
+            doc_ids=frozenset(self._doc_id(chunk_id) for chunk_id in chunk_ids),
+            generation_seconds=generation_seconds,
+            expires_at=time.monotonic() + self.ttl_seconds,
+        )
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = entry
+            self._buckets.setdefault(bucket, set()).add(entry_id)
+            for doc_id in entry.doc_ids:
+                self._by_doc.setdefault(doc_id, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_document(self, doc_id: str) -> int:
+        """Drops every answer built from the document's chunks."""
+        with self._lock:
+            entry_ids = list(self._by_doc.get(doc_id, ()))
+            for entry_id in entry_ids:
+                self._remove(entry_id)
+            self.invalidations += len(entry_ids)
+            return len(entry_ids)
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id)
+        bucket = self._buckets[entry.bucket]
+        bucket.discard(entry_id)
+        if not bucket:
+            del self._buckets[entry.bucket]
+        for doc_id in entry.doc_ids:
+            doc_entries = self._by_doc[doc_id]
+            doc_entries.discard(entry_id)
+            if not doc_entries:
+                del self._by_doc[doc_id]
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "saved_seconds": round(self.saved_seconds, 3),
+                "avg_saved_ms": (
+                    self.saved_seconds * 1000 / self.hits if self.hits else 0.0
+                ),
+            }
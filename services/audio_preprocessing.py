@@ -0,0 +1,281 @@
+import array
+import asyncio
+import io
+import logging
+import math
+import multiprocessing
+import subprocess
+import sys
+import threading
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+from services.metrics_service import metrics
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_WIDTH = 2  # 16-bit PCM throughout
+FRAME_MS = 30
+# Frames quieter than this never count as speech, whatever the noise floor;
+# a recording that never gets this loud is rejected as silent.
+MIN_SPEECH_DBFS = -45.0
+# A frame is speech when it is this much louder than the recording's noise floor.
+SPEECH_OVER_NOISE_DB = 12.0
+
+
+class NoSpeechError(Exception):
+    """The recording contains no detectable speech."""
+
+
+class UnsupportedAudioError(Exception):
+    """The recording cannot be decoded here (no ffmpeg and not 16-bit WAV)."""
+
+
+@dataclass
+class AudioSettings:
+    ffmpeg_path: str | None = None
+    sample_rate: int = 16000
+    bitrate: str = "24k"
+    padding_ms: int = 250
+    min_speech_ms: int = 200
+    timeout_seconds: float = 30.0
+
+
+@dataclass
+class PreprocessedAudio:
+    data: bytes
+    content_type: str | None
+    original_bytes: int
+    original_seconds: float | None = None
+    speech_seconds: float | None = None
+    transcoded: bool = False
+
+
+def _run_ffmpeg(settings: AudioSettings, args: list[str], data: bytes) -> bytes:
+    result = subprocess.run(
+        [settings.ffmpeg_path, "-hide_banner", "-loglevel", "error", "-nostdin", *args],
+        input=data,
+        capture_output=True,
+        timeout=settings.timeout_seconds,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {result.stderr.decode('utf-8', 'replace').strip()}")
+    return result.stdout
+
+
+def _resample(samples: array.array, source_rate: int, target_rate: int) -> array.array:
+    """Linear interpolation; adequate for speech headed to an STT model."""
+    if source_rate == target_rate or not samples:
+        return samples
+    out_len = int(len(samples) * target_rate / source_rate)
+    step = source_rate / target_rate
+    last = len(samples) - 1
+    out = array.array("h", bytes(out_len * SAMPLE_WIDTH))
+    for i in range(out_len):
+        pos = i * step
+        left = int(pos)
+        right = left + 1 if left < last else last
+        frac = pos - left
+        out[i] = int(samples[left] + (samples[right] - samples[left]) * frac)
+    return out
+
+
+def _decode_wav(data: bytes, sample_rate: int) -> bytes:
+    try:
+        with wave.open(io.BytesIO(data), "rb") as wav:
+            channels = wav.getnchannels()
+            width = wav.getsampwidth()
+            source_rate = wav.getframerate()
+            frames = wav.readframes(wav.getnframes())
+    except (wave.Error, EOFError) as e:
+        raise UnsupportedAudioError(f"Not a readable WAV file: {e}")
+    if width != SAMPLE_WIDTH:
+        raise UnsupportedAudioError(f"Unsupported WAV sample width: {width * 8} bits")
+    samples = array.array("h", frames)
+    if sys.byteorder == "big":
+        samples.byteswap()
+    if channels > 1:
+        samples = array.array(
+            "h",
+            (
+                sum(frame) // channels
+                for frame in zip(*(samples[channel::channels] for channel in range(channels)))
+            ),
+        )
+    return _resample(samples, source_rate, sample_rate).tobytes()
+
+
+def decode_to_pcm(data: bytes, settings: AudioSettings) -> bytes:
+    """Decodes any input to mono 16-bit PCM at settings.sample_rate."""
+    if settings.ffmpeg_path:
+        return _run_ffmpeg(
+            settings,
+            ["-i", "pipe:0", "-ac", "1", "-ar", str(settings.sample_rate), "-f", "s16le", "pipe:1"],
+            data,
+        )
+    return _decode_wav(data, settings.sample_rate)
+
+
+def detect_speech(pcm: bytes, settings: AudioSettings) -> tuple[int, int] | None:
+    """
+    Energy-based voice activity detection over FRAME_MS frames. Returns the
+    (start, end) byte offsets of the speech span, padded by padding_ms, or
+    None when no frame reaches MIN_SPEECH_DBFS. When speech cannot be told
+    apart from the rest of the recording (e.g. a clip cut tightly around
+    the speech, with no silence to estimate the noise floor from) the whole
+    recording is returned untrimmed rather than rejected.
+    """
+    samples = array.array("h", pcm)
+    frame_len = settings.sample_rate * FRAME_MS // 1000
+    levels = []
+    for start in range(0, len(samples) - frame_len + 1, frame_len):
+        frame = samples[start : start + frame_len]
+        rms = math.sqrt(sum(value * value for value in frame) / frame_len)
+        levels.append(20 * math.log10(max(rms, 1.0) / 32768))
+    if not levels or max(levels) < MIN_SPEECH_DBFS:
+        return None
+
+    untrimmed = (0, len(samples) * SAMPLE_WIDTH)
+    ordered = sorted(levels)
+    noise_floor = ordered[len(ordered) // 10]
+    loud = ordered[len(ordered) * 9 // 10]
+    if loud - noise_floor < SPEECH_OVER_NOISE_DB:
+        return untrimmed
+    threshold = max(MIN_SPEECH_DBFS, noise_floor + SPEECH_OVER_NOISE_DB)
+    speech = [index for index, level in enumerate(levels) if level >= threshold]
+    if len(speech) * FRAME_MS < settings.min_speech_ms:
+        return untrimmed
+
+    pad = settings.padding_ms // FRAME_MS
+    first = max(0, speech[0] - pad) * frame_len
+    last = min(len(samples), (speech[-1] + 1 + pad) * frame_len)
+    return first * SAMPLE_WIDTH, last * SAMPLE_WIDTH
+
+
+def encode_pcm(pcm: bytes, settings: AudioSettings) -> tuple[bytes, str]:
+    """Opus in Ogg with ffmpeg; 16 kHz mono WAV otherwise."""
+    if settings.ffmpeg_path:
+        encoded = _run_ffmpeg(
+            settings,
+            [
+                "-f", "s16le", "-ar", str(settings.sample_rate), "-ac", "1", "-i", "pipe:0",
+                "-c:a", "libopus", "-b:a", settings.bitrate, "-application", "voip",
+                "-f", "ogg", "pipe:1",
+            ],
+            pcm,
+        )
+        return encoded, "audio/ogg"
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(SAMPLE_WIDTH)
+        wav.setframerate(settings.sample_rate)
+        wav.writeframes(pcm)
+    return buffer.getvalue(), "audio/wav"
+
+
+def preprocess_audio(data: bytes, settings: AudioSettings) -> PreprocessedAudio:
+    """Decode, trim to the speech span and re-encode. Runs in a pool process."""
+    pcm = decode_to_pcm(data, settings)
+    bytes_per_second = settings.sample_rate * SAMPLE_WIDTH
+    span = detect_speech(pcm, settings)
+    if span is None:
+        raise NoSpeechError("No speech detected in the recording.")
+    trimmed = pcm[span[0] : span[1]]
+    encoded, content_type = encode_pcm(trimmed, settings)
+    return PreprocessedAudio(
+        data=encoded,
+        content_type=content_type,
+        original_bytes=len(data),
+        original_seconds=len(pcm) / bytes_per_second,
+        speech_seconds=len(trimmed) / bytes_per_second,
+        transcoded=True,
+    )
+
+
+class AudioPreprocessor:
+    """
+    Trims silence from turn recordings and re-encodes them as 16 kHz mono
+    (Opus when ffmpeg is available) before they are uploaded for STT.
+    Decoding, VAD and encoding are CPU-bound, so they run in a small
+    process pool rather than on the stage thread pools. Recordings that
+    cannot be decoded are passed through unchanged; recordings without
+    speech raise NoSpeechError so the caller can skip STT entirely.
+    """
+
+    def __init__(self, settings: AudioSettings, workers: int = 2):
+        self.settings = settings
+        self.workers = max(1, workers)
+        self._pool: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._stats = {
+            "processed": 0,
+            "rejected_no_speech": 0,
+            "passed_through": 0,
+            "bytes_in": 0,
+            "bytes_out": 0,
+            "seconds_in": 0.0,
+            "seconds_out": 0.0,
+        }
+        if not settings.ffmpeg_path:
+            logger.warning("ffmpeg not found; only 16-bit WAV turns will be preprocessed.")
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # Spawned, not forked: the server process runs threads and
+                # provider clients that are not fork-safe.
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+    def warm_up(self) -> None:
+        """Starts the pool processes so the first turn does not pay for it."""
+        pool = self._get_pool()
+        for future in [pool.submit(int) for _ in range(self.workers)]:
+            future.result()
+
+    async def process(self, data: bytes) -> PreprocessedAudio:
+        if not self.settings.ffmpeg_path and not data.startswith(b"RIFF"):
+            with self._lock:
+                self._stats["passed_through"] += 1
+            return PreprocessedAudio(data=data, content_type=None, original_bytes=len(data))
+        loop = asyncio.get_running_loop()
+        try:
+            with metrics.stage("audio"):
+                result = await loop.run_in_executor(
+                    self._get_pool(), preprocess_audio, data, self.settings
+                )
+        except NoSpeechError:
+            with self._lock:
+                self._stats["rejected_no_speech"] += 1
+            raise
+        except Exception as e:
+            logger.warning(f"Audio preprocessing failed; sending the original audio: {e}")
+            result = PreprocessedAudio(data=data, content_type=None, original_bytes=len(data))
+        with self._lock:
+            if result.transcoded:
+                self._stats["processed"] += 1
+                self._stats["bytes_in"] += result.original_bytes
+                self._stats["bytes_out"] += len(result.data)
+                self._stats["seconds_in"] += result.original_seconds
+                self._stats["seconds_out"] += result.speech_seconds
+            else:
+                self._stats["passed_through"] += 1
+        return result
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["byte_reduction"] = (
+            1 - stats["bytes_out"] / stats["bytes_in"] if stats["bytes_in"] else 0.0
+        )
+        return stats
+
+    def close(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,139 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Persistent (model name, sha256 of text) -> float32 vector store. Kept in
+    its own sqlite file so cache traffic never contends with the app database.
+    Holds at most `max_entries` vectors; past that, the least recently used
+    are pruned, with some slack so pruning does not run on every write.
+    """
+
+    PRUNE_SLACK = 0.1
+
+    def __init__(self, db_path: str = "data/embeddings.db", max_entries: int = 200_000):
+        self.db_path = db_path
+        self.max_entries = max(1, max_entries)
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL;")
+            self._conn.execute("PRAGMA synchronous=NORMAL;")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    model TEXT NOT NULL,
+                    text_hash TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    last_used REAL NOT NULL DEFAULT 0,
+                    PRIMARY KEY (model, text_hash)
+                ) WITHOUT ROWID
+                """)
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(embeddings)")}
+            if "last_used" not in columns:
+                # Caches written before the size bound; their rows go first.
+                self._conn.execute(
+                    "ALTER TABLE embeddings ADD COLUMN last_used REAL NOT NULL DEFAULT 0"
+                )
+            self._conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_embeddings_last_used
+                ON embeddings (last_used)
+                """)
+            # An upper bound: replacing an existing vector is counted as new.
+            self._entries = self._count()
+        self._prune()
+
+    def _count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def get_many(self, model: str, hashes: list[str]) -> dict[str, list[float]]:
+        found: dict[str, list[float]] = {}
+        unique = list(dict.fromkeys(hashes))
+        with self._lock:
+            # Stay under sqlite's bound-parameter limit.
+            for start in range(0, len(unique), 500):
+                batch = unique[start : start + 500]
+                placeholders = ",".join("?" for _ in batch)
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings "
+                    f"WHERE model = ? AND text_hash IN ({placeholders})",
+                    (model, *batch),
+                ).fetchall()
+                for digest, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[digest] = vector.tolist()
+            if found:
+                now = time.time()
+                with self._conn:
+                    self._conn.executemany(
+                        "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+                        [(now, model, digest) for digest in found],
+                    )
+            self.hits += sum(1 for digest in hashes if digest in found)
+            self.misses += sum(1 for digest in hashes if digest not in found)
+        return found
+
+    def put_many(self, model: str, vectors: dict[str, list[float]]) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                [
+                    (model, digest, array("f", vector).tobytes(), now)
+                    for digest, vector in vectors.items()
+                ],
+            )
+            self._entries += len(vectors)
+        self._prune()
+
+    def _prune(self) -> None:
+        with self._lock:
+            if self._entries <= self.max_entries:
+                return
+            self._entries = self._count()
+            excess = self._entries - self.max_entries
+            if excess <= 0:
+                return
+            excess += int(self.max_entries * self.PRUNE_SLACK)
+            with self._conn:
+                deleted = self._conn.execute(
+                    """
+                    DELETE FROM embeddings WHERE (model, text_hash) IN (
+                        SELECT model, text_hash FROM embeddings ORDER BY last_used LIMIT ?
+                    )
+                    """,
+                    (excess,),
+                ).rowcount
+            self._entries -= deleted
+            self.evictions += deleted
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            hits, misses = self.hits, self.misses
+            entries, evictions = self._entries, self.evictions
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "evictions": evictions,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,151 @@
+import asyncio
+import functools
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Iterable, TypeVar
+
+from services.metrics_service import (
+    metrics,
+    stage_in_flight,
+    stage_queue_seconds,
+    stage_seconds,
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Each pipeline stage gets its own pool so a slow provider cannot starve the
+# others (e.g. a backed-up TTS queue never blocks history reads).
+DEFAULT_STAGE_LIMITS = {
+    "stt": 8,
+    "persistence": 4,
+    "retrieval": 4,
+    "llm": 8,
+    "tts": 8,
+    "ingestion": 2,
+}
+
+
+class StageExecutor:
+    def __init__(self, limits: dict[str, int] | None = None):
+        self.limits = dict(DEFAULT_STAGE_LIMITS)
+        self.limits.update(limits or {})
+        self._pools = {
+            stage: ThreadPoolExecutor(
+                max_workers=max(1, limit), thread_name_prefix=f"stage-{stage}"
+            )
+            for stage, limit in self.limits.items()
+        }
+        logger.info(f"Stage executor initialized with limits: {self.limits}")
+
+    @classmethod
+    def from_env(cls) -> "StageExecutor":
+        """Reads per-stage limits from STAGE_CONCURRENCY_<STAGE> variables."""
+        limits = {}
+        for stage in DEFAULT_STAGE_LIMITS:
+            value = os.getenv(f"STAGE_CONCURRENCY_{stage.upper()}")
+            if value:
+                limits[stage] = int(value)
+        return cls(limits)
+
+    @staticmethod
+    def _record_queue_wait(stage: str, fn: Callable[..., T]) -> Callable[..., T]:
+        queued = time.perf_counter()
+
+        def call(*args: Any, **kwargs: Any) -> T:
+            stage_queue_seconds.observe(time.perf_counter() - queued, stage)
+            return fn(*args, **kwargs)
+
+        return call
+
+    async def run(self, stage: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Runs a blocking callable on the stage's pool without blocking the event loop."""
+        pool = self._pools.get(stage)
+        if pool is None:
+            raise ValueError(f"Unknown pipeline stage: {stage}")
+        loop = asyncio.get_running_loop()
+        if not metrics.enabled:
+            return await loop.run_in_executor(pool, functools.partial(fn, *args, **kwargs))
+        with metrics.stage(stage):
+            return await loop.run_in_executor(
+                pool, functools.partial(self._record_queue_wait(stage, fn), *args, **kwargs)
+            )
+
+    def submit(self, stage: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> "Future[T]":
+        """Schedules background work on the stage's pool without awaiting it."""
+        pool = self._pools.get(stage)
+        if pool is None:
+            raise ValueError(f"Unknown pipeline stage: {stage}")
+        if not metrics.enabled:
+            return pool.submit(fn, *args, **kwargs)
+
+        started = time.perf_counter()
+        call = self._record_queue_wait(stage, fn)
+        stage_in_flight.inc(stage)
+
+        def run_and_record() -> T:
+            try:
+                return call(*args, **kwargs)
+            finally:
+                stage_in_flight.dec(stage)
+                stage_seconds.observe(time.perf_counter() - started, stage)
+
+        return pool.submit(run_and_record)
+
+    async def stream(
+        self, stage: str, fn: Callable[..., Iterable[T]], *args: Any, **kwargs: Any
+    ) -> AsyncIterator[T]:
+        """Iterates a blocking iterator on the stage's pool, yielding items as they arrive."""
+        pool = self._pools.get(stage)
+        if pool is None:
+            raise ValueError(f"Unknown pipeline stage: {stage}")
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+        cancelled = threading.Event()
+
+        def emit(item: Any, error: Exception | None = None) -> None:
+            if cancelled.is_set():
+                return
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, (item, error))
+            except RuntimeError:
+                # The loop closed while this producer was still running.
+                cancelled.set()
+
+        def produce() -> None:
+            try:
+                for item in fn(*args, **kwargs):
+                    if cancelled.is_set():
+                        return
+                    emit(item)
+            except Exception as exc:
+                emit(done, exc)
+                return
+            emit(done)
+
+        with metrics.stage(stage):
+            producer = loop.run_in_executor(pool, produce)
+            try:
+                while True:
+                    item, error = await queue.get()
+                    if error is not None:
+                        raise error
+                    if item is done:
+                        break
+                    yield item
+            finally:
+                # A producer blocked inside `fn` cannot be interrupted; it
+                # stops at its next item. Waiting for it here would hold the
+                # consumer, and any deadline around it, until then.
+                cancelled.set()
+                if producer.done():
+                    await producer
+
+    def shutdown(self, wait: bool = True) -> None:
+        for pool in self._pools.values():
+            pool.shutdown(wait=wait)
@@ -0,0 +1,152 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any
+
+# Rough per-message bookkeeping overhead (dicts, lists, timestamps) on top of
+# the content itself, used to keep the cache inside its memory budget.
+_MESSAGE_OVERHEAD_BYTES = 400
+
+
+def _message_size(message: dict[str, Any]) -> int:
+    parts = message.get("parts") or [""]
+    return _MESSAGE_OVERHEAD_BYTES + sum(sys.getsizeof(part) for part in parts)
+
+
+@dataclass
+class _Entry:
+    messages: list[dict[str, Any]]
+    # True when `messages` holds the session's entire history, so requests
+    # for more messages than are cached can still be served.
+    complete: bool
+    expires_at: float
+    size: int = field(default=0)
+
+
+class SessionHistoryCache:
+    """
+    Bounded LRU/TTL cache of the most recent `window` messages per session.
+    Entries are filled on the first read and kept current by `append` on every
+    save, so active conversations are served without touching sqlite.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 16 * 1024 * 1024,
+        ttl_seconds: float = 1800,
+        window: int = 50,
+    ):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.window = window
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # Sessions with a read in flight, and how often they were appended to
+        # meanwhile; a load that raced with a save is not cached.
+        self._loaders: dict[str, int] = {}
+        self._load_generations: dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, session_id: str, limit: int) -> list[dict[str, Any]] | None:
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None and entry.expires_at <= time.monotonic():
+                self._remove(session_id)
+                entry = None
+            if entry is None or (len(entry.messages) < limit and not entry.complete):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(session_id)
+            entry.expires_at = time.monotonic() + self.ttl_seconds
+            self.hits += 1
+            return entry.messages[-limit:] if limit > 0 else []
+
+    def begin_load(self, session_id: str) -> int:
+        with self._lock:
+            self._loaders[session_id] = self._loaders.get(session_id, 0) + 1
+            return self._load_generations.get(session_id, 0)
+
+    def finish_load(
+        self,
+        session_id: str,
+        generation: int,
+        messages: list[dict[str, Any]] | None,
+        complete: bool = False,
+    ) -> None:
+        """Stores a history read from disk unless a save raced with the read."""
+        with self._lock:
+            current_generation = self._load_generations.get(session_id, 0)
+            remaining = self._loaders.get(session_id, 1) - 1
+            if remaining <= 0:
+                self._loaders.pop(session_id, None)
+                self._load_generations.pop(session_id, None)
+            else:
+                self._loaders[session_id] = remaining
+
+            if messages is None or generation != current_generation:
+                return
+            self._remove(session_id)
+            entry = _Entry(
+                messages=list(messages[-self.window :]),
+                complete=complete and len(messages) <= self.window,
+                expires_at=time.monotonic() + self.ttl_seconds,
+            )
+            entry.size = sum(_message_size(message) for message in entry.messages)
+            self._entries[session_id] = entry
+            self._bytes += entry.size
+            self._evict()
+
+    def append(self, session_id: str, message: dict[str, Any]) -> None:
+        with self._lock:
+            if session_id in self._loaders:
+                self._load_generations[session_id] = (
+                    self._load_generations.get(session_id, 0) + 1
+                )
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return
+            entry.messages.append(message)
+            size = _message_size(message)
+            entry.size += size
+            self._bytes += size
+            while len(entry.messages) > self.window:
+                dropped = entry.messages.pop(0)
+                dropped_size = _message_size(dropped)
+                entry.size -= dropped_size
+                self._bytes -= dropped_size
+                entry.complete = False
+            self._entries.move_to_end(session_id)
+            self._evict()
+
+    def invalidate(self, session_id: str) -> None:
+        with self._lock:
+            self._remove(session_id)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "sessions": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _remove(self, session_id: str) -> None:
+        entry = self._entries.pop(session_id, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def _evict(self) -> None:
+        while self._bytes > self.max_bytes and self._entries:
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size
+            self.evictions += 1
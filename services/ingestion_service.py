@@ -1,35 +1,379 @@
+import asyncio
+import codecs
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from itertools import islice
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO, Callable, Iterable, Iterator
 
 from fastapi import HTTPException, UploadFile
 
-from services.persistence_service import PersistenceService
+from services.embedding_cache import text_hash
+from services.executor_service import StageExecutor
+from services.metrics_service import timed
+from services.persistence_service import SHARED_NAMESPACE, PersistenceService
 from services.vector_service import VectorService
 
+logger = logging.getLogger(__name__)
+
 ALLOWED_EXTENSIONS = {".txt", ".md"}
+READ_BLOCK_SIZE = 1024 * 1024
+
 
+def iter_file_blocks(file: BinaryIO, block_size: int = READ_BLOCK_SIZE) -> Iterator[bytes]:
+    while True:
+        block = file.read(block_size)
+        if not block:
+            return
+        yield block
 
-def _chunk_text(text: str, chunk_size: int = 180, overlap: int = 40) -> list[str]:
-    words = text.split()
-    if not words:
-        return []
 
-    chunks: list[str] = []
+def iter_text_chunks(
+    blocks: Iterable[bytes], chunk_size: int = 180, overlap: int = 40
+) -> Iterator[str]:
+    """
+    Yields overlapping word windows (chunk_size words, advancing by
+    chunk_size - overlap) from a stream of UTF-8 byte blocks. Only the current
+    window and one block are held in memory, whatever the document size.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
     step = max(1, chunk_size - overlap)
-    for start in range(0, len(words), step):
-        section = words[start : start + chunk_size]
-        if not section:
-            continue
-        chunks.append(" ".join(section))
+    window: deque[str] = deque()
+    carry = ""
+
+    def take_full_windows() -> Iterator[str]:
+        while len(window) >= chunk_size:
+            yield " ".join(islice(window, chunk_size))
+            for _ in range(step):
+                window.popleft()
+
+    for block in blocks:
+        text = carry + decoder.decode(block)
+        words = text.split()
+        # A block boundary may fall inside a word; hold it for the next block.
+        carry = words.pop() if words and not text[-1].isspace() else ""
+        window.extend(words)
+        yield from take_full_windows()
+
+    tail = carry + decoder.decode(b"", final=True)
+    window.extend(tail.split())
+    yield from take_full_windows()
+    while window:
+        yield " ".join(window)
+        for _ in range(min(step, len(window))):
+            window.popleft()
+
+
+@dataclass
+class IngestionJob:
+    job_id: str
+    filename: str
+    content_type: str | None
+    content_hash: str | None = None
+    namespace: str = SHARED_NAMESPACE
+    status: str = "queued"  # queued -> running -> completed | failed
+    # created: new document; updated: new revision of the document named by
+    # replace_doc_id, only changed chunks re-embedded; duplicate: identical
+    # content already indexed.
+    mode: str = "created"
+    doc_id: str | None = None
+    replace_doc_id: str | None = None
+    bytes_total: int = 0
+    bytes_done: int = 0
+    chunks_done: int = 0
+    chunks_reused: int = 0
+    error: str | None = None
+    created_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = (self.finished_at or time.time()) - self.started_at
+        return {
+            "job_id": self.job_id,
+            "filename": self.filename,
+            "namespace": self.namespace,
+            "status": self.status,
+            "mode": self.mode,
+            "doc_id": self.doc_id,
+            "bytes_total": self.bytes_total,
+            "bytes_done": self.bytes_done,
+            "chunks_done": self.chunks_done,
+            "chunks_reused": self.chunks_reused,
+            "progress": (
+                self.bytes_done / self.bytes_total if self.bytes_total else 0.0
+            ),
+            "elapsed_seconds": elapsed,
+            "chunks_per_second": (
+                self.chunks_done / elapsed if elapsed else None
+            ),
+            "error": self.error,
+        }
+
+
+class IngestionJobQueue:
+    """
+    Runs document ingestion in the background on the executor's ingestion
+    pool. Uploads are spooled to disk, streamed through the chunker and
+    persisted/embedded in fixed-size batches as chunks arrive, so memory use
+    does not grow with document size.
+    """
+
+    def __init__(
+        self,
+        persistence_service: PersistenceService,
+        vector_service: VectorService,
+        stage_executor: StageExecutor,
+        batch_size: int = 64,
+        max_retained_jobs: int = 1000,
+        on_document_changed: Callable[[str], None] | None = None,
+    ):
+        self.persistence_service = persistence_service
+        self.vector_service = vector_service
+        self.stage_executor = stage_executor
+        self.batch_size = batch_size
+        self.max_retained_jobs = max_retained_jobs
+        # Called with the doc_id before and after an existing document's
+        # chunks are rewritten, e.g. to drop answers cached from them.
+        self.on_document_changed = on_document_changed
+        self._jobs: OrderedDict[str, IngestionJob] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        filename: str,
+        content_type: str | None,
+        spool_path: str,
+        size: int,
+        content_hash: str | None = None,
+        namespace: str = SHARED_NAMESPACE,
+        replace_doc_id: str | None = None,
+    ) -> IngestionJob:
+        """
+        Queues a spooled upload; the job deletes `spool_path` when done.
+        Uploads always create a new document unless `replace_doc_id` names
+        the document they are a new revision of.
+        """
+        job = IngestionJob(
+            job_id=str(uuid.uuid4()),
+            filename=filename,
+            content_type=content_type,
+            content_hash=content_hash,
+            namespace=namespace,
+            replace_doc_id=replace_doc_id,
+            bytes_total=size,
+        )
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._prune()
+        self.stage_executor.submit("ingestion", self._run, job, spool_path)
+        return job
+
+    def get(self, job_id: str) -> IngestionJob | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _prune(self) -> None:
+        finished = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.status in ("completed", "failed")
+        ]
+        while len(self._jobs) > self.max_retained_jobs and finished:
+            self._jobs.pop(finished.pop(0), None)
+
+    @timed("ingestion", "job")
+    def _run(self, job: IngestionJob, spool_path: str) -> None:
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            if job.content_hash is not None:
+                duplicate = self.persistence_service.find_document_by_hash(
+                    job.content_hash, job.namespace
+                )
+                # Identical to another document is still a valid replacement.
+                if duplicate is not None and job.replace_doc_id in (None, duplicate["doc_id"]):
+                    job.mode = "duplicate"
+                    job.doc_id = duplicate["doc_id"]
+                    job.chunks_reused = duplicate["chunk_count"]
+                    job.bytes_done = job.bytes_total
+                    job.status = "completed"
+                    logger.info(f"Skipped {job.filename}: identical to {job.doc_id}")
+                    return
+
+            existing_hashes: dict[int, str | None] = {}
+            if job.replace_doc_id is not None:
+                previous = self.persistence_service.get_document(job.replace_doc_id)
+                if previous is None or previous["namespace"] != job.namespace:
+                    raise ValueError(
+                        f"Document {job.replace_doc_id} not found in namespace {job.namespace}."
+                    )
+                job.mode = "updated"
+                job.doc_id = previous["doc_id"]
+                # Unchanged chunks keep their metadata, so the revision keeps the name too.
+                job.filename = previous["filename"]
+                existing_hashes = self.persistence_service.get_chunk_hashes(job.doc_id)
+                self._notify_changed(job)
+
+            with open(spool_path, "rb") as spool:
 
-    return chunks
+                def tracked_blocks() -> Iterator[bytes]:
+                    for block in iter_file_blocks(spool):
+                        yield block
+                        job.bytes_done += len(block)
 
+                batch: list[str] = []
+                for chunk in iter_text_chunks(tracked_blocks()):
+                    batch.append(chunk)
+                    if len(batch) >= self.batch_size:
+                        self._ingest_batch(job, batch, existing_hashes)
+                        batch = []
+                if batch:
+                    self._ingest_batch(job, batch, existing_hashes)
 
+            if job.chunks_done == 0:
+                raise ValueError("No usable text chunks were created.")
+            if job.mode == "updated":
+                stale_ids = [
+                    f"{job.doc_id}:{index}"
+                    for index in existing_hashes
+                    if index >= job.chunks_done
+                ]
+                self.vector_service.delete_chunks(stale_ids, namespace=job.namespace)
+                self.persistence_service.finalize_document_revision(
+                    job.doc_id, job.chunks_done, job.content_hash
+                )
+            job.status = "completed"
+            logger.info(
+                f"Ingested {job.filename} ({job.mode}): {job.chunks_done} chunks, "
+                f"{job.chunks_reused} unchanged, in {time.time() - job.started_at:.2f}s"
+            )
+        except Exception as e:
+            logger.error(f"Ingestion job {job.job_id} failed: {str(e)}")
+            job.status = "failed"
+            job.error = str(e)
+            self._discard_partial_document(job)
+        finally:
+            if job.mode == "updated":
+                self._notify_changed(job)
+            job.finished_at = time.time()
+            os.remove(spool_path)
+
+    def _notify_changed(self, job: IngestionJob) -> None:
+        if self.on_document_changed is None or job.doc_id is None:
+            return
+        try:
+            self.on_document_changed(job.doc_id)
+        except Exception as e:
+            logger.error(f"Change hook failed for document {job.doc_id}: {str(e)}")
+
+    @timed("ingestion", "batch")
+    def _ingest_batch(
+        self,
+        job: IngestionJob,
+        batch: list[str],
+        existing_hashes: dict[int, str | None],
+    ) -> None:
+        if job.doc_id is None:
+            job.doc_id = self.persistence_service.create_document(
+                job.filename,
+                job.content_type,
+                content_hash=job.content_hash,
+                namespace=job.namespace,
+            )
+        start_index = job.chunks_done
+        job.chunks_done += len(batch)
+
+        if job.mode == "updated":
+            # Only chunks whose text changed at this position are rewritten.
+            changed = [
+                (start_index + idx, chunk)
+                for idx, chunk in enumerate(batch)
+                if existing_hashes.get(start_index + idx) != text_hash(chunk)
+            ]
+            job.chunks_reused += len(batch) - len(changed)
+            if not changed:
+                return
+            batch = [chunk for _, chunk in changed]
+            indexes = [index for index, _ in changed]
+        else:
+            indexes = [start_index + idx for idx in range(len(batch))]
+
+        metadata_list = [
+            {"doc_id": job.doc_id, "source": job.filename, "chunk_index": index}
+            for index in indexes
+        ]
+        vector_ids = [f"{job.doc_id}:{index}" for index in indexes]
+        if job.mode == "updated":
+            self.persistence_service.replace_document_chunks(
+                job.doc_id, batch, metadata_list
+            )
+        else:
+            self.persistence_service.save_document_chunks(
+                job.doc_id, batch, metadata_list, start_index=start_index
+            )
+        self.vector_service.upsert_chunks(
+            vector_ids, batch, metadata_list, namespace=job.namespace
+        )
+
+    def _discard_partial_document(self, job: IngestionJob) -> None:
+        # An interrupted update leaves the previous revision partly rewritten
+        # rather than deleting a document the user already had.
+        if job.doc_id is None or job.mode != "created":
+            return
+        try:
+            self.vector_service.delete_by_doc_id(job.doc_id, namespace=job.namespace)
+            self.persistence_service.delete_document(job.doc_id)
+        except Exception as e:
+            logger.error(f"Cleanup of partial document {job.doc_id} failed: {str(e)}")
+
+
+def _spool_file(source: BinaryIO) -> tuple[str, int, bool, str]:
+    """
+    Copies an upload's file to a temp file block by block.
+    Returns (path, size, has_text, sha256 of the content).
+    """
+    fd, path = tempfile.mkstemp(prefix="ingest-", suffix=".upload")
+    size = 0
+    has_text = False
+    digest = hashlib.sha256()
+    try:
+        with os.fdopen(fd, "wb") as spool:
+            for block in iter_file_blocks(source):
+                spool.write(block)
+                digest.update(block)
+                size += len(block)
+                has_text = has_text or bool(block.strip())
+    except Exception:
+        os.remove(path)
+        raise
+    return path, size, has_text, digest.hexdigest()
+
+
+async def _spool_upload(upload: UploadFile) -> tuple[str, int, bool, str]:
+    # The copy and hash run on a worker thread: for large uploads they would
+    # otherwise hold the event loop (and every open stream) for the whole copy.
+    await upload.seek(0)
+    return await asyncio.to_thread(_spool_file, upload.file)
+
+
+@timed("ingestion", "upload")
 async def ingest_upload(
     upload: UploadFile,
-    persistence_service: PersistenceService,
-    vector_service: VectorService,
+    job_queue: IngestionJobQueue,
+    namespace: str = SHARED_NAMESPACE,
+    replace_doc_id: str | None = None,
 ) -> dict[str, Any]:
+    """Validates an upload and queues it for background ingestion."""
     filename = upload.filename or "untitled.txt"
     ext = Path(filename).suffix.lower()
     if ext not in ALLOWED_EXTENSIONS:
@@ -38,29 +382,20 @@ async def ingest_upload(
             detail="Unsupported file type. Only .txt and .md are supported in MVP.",
         )
 
-    raw = await upload.read()
-    text = raw.decode("utf-8", errors="ignore").strip()
-    if not text:
+    spool_path, size, has_text, content_hash = await _spool_upload(upload)
+    if not has_text:
+        os.remove(spool_path)
         raise HTTPException(status_code=400, detail="Uploaded file is empty.")
 
-    doc_id = persistence_service.create_document(filename, upload.content_type)
-    chunks = _chunk_text(text)
-    if not chunks:
-        raise HTTPException(
-            status_code=400, detail="No usable text chunks were created."
-        )
-
-    metadata_list = [
-        {"doc_id": doc_id, "source": filename, "chunk_index": idx}
-        for idx, _ in enumerate(chunks)
-    ]
-    vector_ids = [f"{doc_id}:{idx}" for idx, _ in enumerate(chunks)]
-
-    persistence_service.save_document_chunks(doc_id, chunks, metadata_list)
-    vector_service.upsert_chunks(vector_ids, chunks, metadata_list)
-
-    return {
-        "doc_id": doc_id,
-        "filename": filename,
-        "chunks_created": len(chunks),
-    }
+    # A socket round-trip to the vector server in multi-worker mode.
+    job = await asyncio.to_thread(
+        job_queue.submit,
+        filename,
+        upload.content_type,
+        spool_path,
+        size,
+        content_hash=content_hash,
+        namespace=namespace,
+        replace_doc_id=replace_doc_id,
+    )
+    return job.to_dict()
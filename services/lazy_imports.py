@@ -0,0 +1,61 @@
+import importlib
+import importlib.util
+import threading
+from types import ModuleType
+from typing import Any, Callable, Iterable
+
+_modules: dict[str, "LazyModule"] = {}
+_registry_lock = threading.Lock()
+
+
+class LazyModule:
+    """
+    Stand-in for a heavy SDK module that is imported on first attribute
+    access. Hooks registered with `on_load` (e.g. setting API keys) run once,
+    right after the import.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module: ModuleType | None = None
+        self._hooks: list[Callable[[ModuleType], None]] = []
+        self._lock = threading.RLock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def on_load(self, hook: Callable[[ModuleType], None]) -> None:
+        with self._lock:
+            if self._module is not None:
+                hook(self._module)
+            else:
+                self._hooks.append(hook)
+
+    def load(self) -> ModuleType:
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    module = importlib.import_module(self._name)
+                    for hook in self._hooks:
+                        hook(module)
+                    self._hooks.clear()
+                    self._module = module
+        return self._module
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self.load(), attr)
+
+
+def lazy_import(name: str) -> LazyModule:
+    """Returns the shared lazy proxy for `name`, so load hooks apply app-wide."""
+    with _registry_lock:
+        module = _modules.get(name)
+        if module is None:
+            module = _modules[name] = LazyModule(name)
+        return module
+
+
+def missing_modules(names: Iterable[str]) -> list[str]:
+    """The top-level modules in `names` that are not installed (nothing is imported)."""
+    return [name for name in names if importlib.util.find_spec(name) is None]
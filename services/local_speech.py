@@ -0,0 +1,114 @@
+import io
+import json
+import logging
+import os
+import threading
+import wave
+from typing import BinaryIO
+
+from services.audio_preprocessing import AudioSettings, UnsupportedAudioError, decode_to_pcm
+from services.speech_providers import (
+    SpeechProviderError,
+    SpeechToTextProvider,
+    SynthesizedSpeech,
+    TextToSpeechProvider,
+)
+
+logger = logging.getLogger(__name__)
+
+# Bytes of 16-bit PCM fed to the recognizer per call (0.25 s at 16 kHz).
+VOSK_FEED_BYTES = 8000
+
+
+class VoskSpeechToText(SpeechToTextProvider):
+    """
+    On-device STT with a Vosk (Kaldi) model on the CPU; a small English
+    model is ~50 MB. The model is shared, with one recognizer per turn.
+    Input is decoded the same way the audio preprocessing stage does it,
+    so anything other than WAV needs ffmpeg.
+    """
+
+    name = "vosk"
+    required_modules = ("vosk",)
+
+    def __init__(self, model_path: str, audio_settings: AudioSettings):
+        self.model_path = model_path
+        self.audio_settings = audio_settings
+        self._model = None
+        self._lock = threading.Lock()
+
+    def is_configured(self) -> bool:
+        return os.path.isdir(self.model_path)
+
+    def _get_model(self):
+        with self._lock:
+            if self._model is None:
+                import vosk
+
+                vosk.SetLogLevel(-1)
+                self._model = vosk.Model(self.model_path)
+            return self._model
+
+    def warm_up(self) -> None:
+        self._get_model()
+
+    def transcribe_audio(self, audio_file: BinaryIO) -> str:
+        from vosk import KaldiRecognizer
+
+        try:
+            pcm = decode_to_pcm(audio_file.read(), self.audio_settings)
+        except (UnsupportedAudioError, RuntimeError) as e:
+            raise SpeechProviderError(f"Cannot decode audio for Vosk: {e}")
+
+        recognizer = KaldiRecognizer(self._get_model(), self.audio_settings.sample_rate)
+        # A True return marks an utterance boundary; its text must be
+        # collected then, as FinalResult only covers the last utterance.
+        parts = []
+        for offset in range(0, len(pcm), VOSK_FEED_BYTES):
+            if recognizer.AcceptWaveform(pcm[offset : offset + VOSK_FEED_BYTES]):
+                parts.append(json.loads(recognizer.Result()).get("text", ""))
+        parts.append(json.loads(recognizer.FinalResult()).get("text", ""))
+        return " ".join(part for part in parts if part)
+
+
+class PiperTextToSpeech(TextToSpeechProvider):
+    """
+    On-device TTS with a Piper voice (ONNX, CPU); renders WAV bytes that the
+    caller stores and serves. The voice is fixed by the model file, so
+    voice_id only distinguishes cache entries.
+    """
+
+    name = "piper"
+    required_modules = ("piper",)
+
+    def __init__(self, model_path: str, config_path: str | None = None):
+        self.model_path = model_path
+        self.config_path = config_path
+        self.default_voice = os.path.splitext(os.path.basename(model_path))[0]
+        self._voice = None
+        self._lock = threading.Lock()
+
+    def is_configured(self) -> bool:
+        return os.path.isfile(self.model_path)
+
+    def _get_voice(self):
+        with self._lock:
+            if self._voice is None:
+                from piper import PiperVoice
+
+                self._voice = PiperVoice.load(self.model_path, config_path=self.config_path)
+            return self._voice
+
+    def warm_up(self) -> None:
+        self._get_voice()
+
+    def generate_speech(self, text: str, voice_id: str) -> SynthesizedSpeech:
+        voice = self._get_voice()
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav_file:
+            # piper-tts 1.3 renamed synthesize() (which now yields chunks).
+            if hasattr(voice, "synthesize_wav"):
+                voice.synthesize_wav(text, wav_file)
+            else:
+                voice.synthesize(text, wav_file)
+        return SynthesizedSpeech(audio=buffer.getvalue(), extension=".wav")
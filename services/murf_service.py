@@ -1,38 +1,38 @@
-from murf.client import Murf
-from fastapi import HTTPException
 import logging
+import os
+from urllib.parse import urlparse
+
+from services.provider_registry import ProviderRegistry
+from services.speech_providers import (
+    SpeechProviderError,
+    SynthesizedSpeech,
+    TextToSpeechProvider,
+)
 
 logger = logging.getLogger(__name__)
 
 
-class MurfService:
-    def __init__(self, api_key: str):
-        if not api_key:
-            raise ValueError("Murf API key not provided.")
-        self.client = Murf(api_key=api_key)
-        logger.info("Murf service initialized.")
-
-    def generate_speech(self, text: str, voice_id: str = "en-US-terrell") -> str:
-        try:
-            logger.debug(
-                f"Generating speech with Murf for text: {text[:50]}... using voice: {voice_id}"
-            )
-            api_response = self.client.text_to_speech.generate(
-                text=text, voice_id=voice_id
-            )
-            if not api_response.audio_file:
-                logger.error("Murf API response missing audio_file.")
-                raise HTTPException(
-                    status_code=500, detail="Audio URL not found in Murf API response."
-                )
-
-            logger.info(
-                f"Successfully generated speech. Audio URL: {api_response.audio_file[:50]}..."
-            )
-            return api_response.audio_file
-        except Exception as e:
-            logger.exception("Error during Murf speech generation:")
-            raise HTTPException(
-                status_code=500,
-                detail=f"Murf speech generation service error: {str(e)}",
-            )
+class MurfService(TextToSpeechProvider):
+    """Hosted TTS through the registry's pooled Murf client; returns Murf's audio URL."""
+
+    name = "murf"
+    default_voice = "en-US-natalie"
+
+    def __init__(self, registry: ProviderRegistry):
+        self.registry = registry
+
+    def is_configured(self) -> bool:
+        return bool(self.registry.murf_api_key)
+
+    def warm_up(self) -> None:
+        self.registry.murf_client()
+
+    def generate_speech(self, text: str, voice_id: str) -> SynthesizedSpeech:
+        logger.debug(f"Generating speech with Murf for text: {text[:50]}... voice: {voice_id}")
+        api_response = self.registry.murf_client().text_to_speech.generate(
+            text=text, voice_id=voice_id
+        )
+        if not api_response.audio_file:
+            raise SpeechProviderError("Audio URL not found in Murf API response.")
+        extension = os.path.splitext(urlparse(api_response.audio_file).path)[1].lower()
+        return SynthesizedSpeech(audio_url=api_response.audio_file, extension=extension or ".mp3")
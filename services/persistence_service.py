@@ -1,82 +1,350 @@
 import json
+import logging
 import os
 import sqlite3
+import threading
 import uuid
+from contextlib import contextmanager
 from datetime import datetime, timezone
-from typing import Any
+from typing import Any, Iterator
+
+from services.embedding_cache import text_hash
+from services.history_cache import SessionHistoryCache
+from services.metrics_service import timed
+
+logger = logging.getLogger(__name__)
+
+# Documents uploaded without a namespace are visible to every session.
+SHARED_NAMESPACE = "shared"
+
+# Statements are kept as constants so sqlite3's per-connection statement
+# cache reuses the prepared form instead of re-parsing on every call.
+UPSERT_SESSION_SQL = """
+    INSERT INTO sessions (session_id, created_at, updated_at)
+    VALUES (?, ?, ?)
+    ON CONFLICT(session_id) DO UPDATE SET updated_at=excluded.updated_at
+"""
+
+INSERT_MESSAGE_SQL = """
+    INSERT INTO messages (session_id, role, content, metadata_json, created_at)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+INSERT_CHUNK_SQL = """
+    INSERT INTO chunks (doc_id, chunk_index, content, metadata_json, created_at, content_hash)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+KEYWORD_SEARCH_SQL = """
+    SELECT c.doc_id, c.chunk_index, c.content, c.metadata_json, chunks_fts.rank AS bm25
+    FROM chunks_fts
+    JOIN chunks c ON c.id = chunks_fts.rowid
+    JOIN documents d ON d.doc_id = c.doc_id
+    WHERE chunks_fts MATCH ? {namespace_filter}
+    ORDER BY chunks_fts.rank
+    LIMIT ?
+"""
+
+SELECT_SESSION_MESSAGES_SQL = """
+    SELECT role, content, created_at
+    FROM messages
+    WHERE session_id = ?
+    ORDER BY id DESC
+    LIMIT ?
+"""
+
+
+def _migrate_initial_schema(conn: sqlite3.Connection) -> None:
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sessions (
+            session_id TEXT PRIMARY KEY,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+        """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            metadata_json TEXT,
+            created_at TEXT NOT NULL,
+            FOREIGN KEY(session_id) REFERENCES sessions(session_id)
+        )
+        """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS documents (
+            doc_id TEXT PRIMARY KEY,
+            filename TEXT NOT NULL,
+            content_type TEXT,
+            created_at TEXT NOT NULL
+        )
+        """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS chunks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            doc_id TEXT NOT NULL,
+            chunk_index INTEGER NOT NULL,
+            content TEXT NOT NULL,
+            metadata_json TEXT,
+            created_at TEXT NOT NULL,
+            FOREIGN KEY(doc_id) REFERENCES documents(doc_id)
+        )
+        """)
+
+
+def _migrate_indexes_and_chunk_count(conn: sqlite3.Connection) -> None:
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_messages_session_id
+        ON messages (session_id, id)
+        """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_chunks_doc_id
+        ON chunks (doc_id, chunk_index)
+        """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_documents_created_at
+        ON documents (created_at)
+        """)
+    conn.execute(
+        "ALTER TABLE documents ADD COLUMN chunk_count INTEGER NOT NULL DEFAULT 0"
+    )
+    conn.execute("""
+        UPDATE documents
+        SET chunk_count = (SELECT COUNT(*) FROM chunks c WHERE c.doc_id = documents.doc_id)
+        """)
+
+
+def _migrate_content_hashes(conn: sqlite3.Connection) -> None:
+    conn.execute("ALTER TABLE documents ADD COLUMN content_hash TEXT")
+    conn.execute("ALTER TABLE chunks ADD COLUMN content_hash TEXT")
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_documents_content_hash
+        ON documents (content_hash)
+        """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_documents_filename
+        ON documents (filename, created_at)
+        """)
+
+
+def _migrate_chunks_fts(conn: sqlite3.Connection) -> None:
+    # External-content FTS5 index over chunks.content; the triggers keep it
+    # in step with every insert, update and delete on chunks.
+    try:
+        conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(
+                content,
+                content='chunks',
+                content_rowid='id',
+                tokenize='porter unicode61 remove_diacritics 2'
+            )
+            """)
+    except sqlite3.OperationalError as e:
+        logger.warning(f"FTS5 unavailable, keyword search disabled: {str(e)}")
+        return
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS chunks_fts_insert AFTER INSERT ON chunks BEGIN
+            INSERT INTO chunks_fts (rowid, content) VALUES (new.id, new.content);
+        END
+        """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS chunks_fts_delete AFTER DELETE ON chunks BEGIN
+            INSERT INTO chunks_fts (chunks_fts, rowid, content)
+            VALUES ('delete', old.id, old.content);
+        END
+        """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS chunks_fts_update AFTER UPDATE OF content ON chunks BEGIN
+            INSERT INTO chunks_fts (chunks_fts, rowid, content)
+            VALUES ('delete', old.id, old.content);
+            INSERT INTO chunks_fts (rowid, content) VALUES (new.id, new.content);
+        END
+        """)
+    conn.execute("INSERT INTO chunks_fts (chunks_fts) VALUES ('rebuild')")
+
+
+def _migrate_document_namespaces(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        f"ALTER TABLE documents ADD COLUMN namespace TEXT NOT NULL DEFAULT '{SHARED_NAMESPACE}'"
+    )
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_documents_namespace_filename
+        ON documents (namespace, filename, created_at)
+        """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_documents_namespace_content_hash
+        ON documents (namespace, content_hash)
+        """)
+
+
+def _migrate_session_summaries(conn: sqlite3.Connection) -> None:
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS session_summaries (
+            session_id TEXT PRIMARY KEY,
+            summary TEXT NOT NULL,
+            summarized_count INTEGER NOT NULL,
+            summarized_through TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            FOREIGN KEY(session_id) REFERENCES sessions(session_id)
+        )
+        """)
+
+
+# Schema migrations, applied in order. The database's PRAGMA user_version
+# records how many have run; append new steps, never edit shipped ones.
+MIGRATIONS = [
+    _migrate_initial_schema,
+    _migrate_indexes_and_chunk_count,
+    _migrate_content_hashes,
+    _migrate_chunks_fts,
+    _migrate_document_namespaces,
+    _migrate_session_summaries,
+]
+
+
+def _not_yet_committed(
+    overlay: list[dict[str, Any]], committed: list[dict[str, Any]]
+) -> list[dict[str, Any]]:
+    if not overlay or not committed:
+        return overlay
+    # created_at has microsecond resolution, so it identifies a message
+    # within its session.
+    seen = {(message["created_at"], message["role"], message["parts"][0]) for message in committed}
+    return [
+        message
+        for message in overlay
+        if (message["created_at"], message["role"], message["parts"][0]) not in seen
+    ]
 
 
 class PersistenceService:
-    def __init__(self, db_path: str = "data/app.db"):
+    """
+    SQLite store using one long-lived writer connection (serialized by a lock,
+    matching SQLite's single-writer model) and one reader connection per
+    thread, which WAL mode lets run concurrently with the writer.
+
+    With write_behind enabled, save_message only queues the message; a
+    background thread commits queued messages in batches once
+    flush_batch_size are pending or flush_interval_ms has passed. Queued
+    messages stay visible to get_session_messages until they are committed.
+    A batch that fails to commit is retried with the next flush, up to
+    flush_max_retries times, and then dropped.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "data/app.db",
+        busy_timeout_ms: int = 5000,
+        write_behind: bool = False,
+        flush_interval_ms: int = 50,
+        flush_batch_size: int = 256,
+        flush_max_retries: int = 20,
+        history_cache: SessionHistoryCache | None = None,
+    ):
         self.db_path = db_path
+        self.busy_timeout_ms = busy_timeout_ms
+        self.write_behind = write_behind
+        self.flush_interval_ms = flush_interval_ms
+        self.flush_batch_size = flush_batch_size
+        self.flush_max_retries = flush_max_retries
+        self.history_cache = history_cache
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._local = threading.local()
+        self._readers: list[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._writer = self._open_connection()
         self._init_db()
+        self.keyword_search_available = (
+            self._writer.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'chunks_fts'"
+            ).fetchone()
+            is not None
+        )
+
+        # Write-behind state: queued rows in commit order plus a per-session
+        # overlay of the same rows for read-your-writes. A flush swaps them
+        # into the _flushing pair, which reads keep overlaying until its
+        # transaction has committed; _pending_cond only guards the swaps.
+        self._pending: list[tuple[str, str, str, str, str]] = []
+        self._pending_by_session: dict[str, list[dict[str, Any]]] = {}
+        self._flushing_by_session: dict[str, list[dict[str, Any]]] = {}
+        self._pending_cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._flush_failures = 0
+        self.dropped_messages = 0
+        self._closing = False
+        self._flusher: threading.Thread | None = None
+        if write_behind:
+            self._flusher = threading.Thread(
+                target=self._flush_loop, name="persistence-flusher", daemon=True
+            )
+            self._flusher.start()
 
-    def _connect(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.db_path)
+    def _open_connection(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path, check_same_thread=False, cached_statements=256
+        )
         conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA busy_timeout={self.busy_timeout_ms};")
+        conn.execute("PRAGMA synchronous=NORMAL;")
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._open_connection()
+            conn.execute("PRAGMA query_only=ON;")
+            self._local.conn = conn
+            with self._readers_lock:
+                self._readers.append(conn)
         return conn
 
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        """Runs the block in a single transaction on the shared writer connection."""
+        with self._write_lock:
+            with self._writer:
+                yield self._writer
+
+    def close(self) -> None:
+        if self._flusher is not None:
+            with self._pending_cond:
+                self._closing = True
+                self._pending_cond.notify()
+            self._flusher.join()
+            self._flusher = None
+        with self._readers_lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers.clear()
+        with self._write_lock:
+            self._writer.close()
+
     def _init_db(self) -> None:
-        with self._connect() as conn:
-            conn.execute("PRAGMA journal_mode=WAL;")
-            conn.execute("PRAGMA synchronous=NORMAL;")
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS sessions (
-                    session_id TEXT PRIMARY KEY,
-                    created_at TEXT NOT NULL,
-                    updated_at TEXT NOT NULL
-                )
-                """)
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS messages (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    session_id TEXT NOT NULL,
-                    role TEXT NOT NULL,
-                    content TEXT NOT NULL,
-                    metadata_json TEXT,
-                    created_at TEXT NOT NULL,
-                    FOREIGN KEY(session_id) REFERENCES sessions(session_id)
-                )
-                """)
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS documents (
-                    doc_id TEXT PRIMARY KEY,
-                    filename TEXT NOT NULL,
-                    content_type TEXT,
-                    created_at TEXT NOT NULL
-                )
-                """)
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS chunks (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    doc_id TEXT NOT NULL,
-                    chunk_index INTEGER NOT NULL,
-                    content TEXT NOT NULL,
-                    metadata_json TEXT,
-                    created_at TEXT NOT NULL,
-                    FOREIGN KEY(doc_id) REFERENCES documents(doc_id)
-                )
-                """)
-            conn.commit()
+        with self._write_lock:
+            self._writer.execute("PRAGMA journal_mode=WAL;")
+            for version, migrate in enumerate(MIGRATIONS, start=1):
+                # BEGIN IMMEDIATE takes the write lock before checking the
+                # version, so concurrent processes never apply a step twice.
+                self._writer.execute("BEGIN IMMEDIATE")
+                try:
+                    current = self._writer.execute("PRAGMA user_version").fetchone()[0]
+                    if current < version:
+                        migrate(self._writer)
+                        self._writer.execute(f"PRAGMA user_version = {version}")
+                    self._writer.commit()
+                except Exception:
+                    self._writer.rollback()
+                    raise
 
     @staticmethod
     def _utc_now() -> str:
         return datetime.now(timezone.utc).isoformat()
 
-    def _upsert_session(self, session_id: str) -> None:
-        now = self._utc_now()
-        with self._connect() as conn:
-            conn.execute(
-                """
-                INSERT INTO sessions (session_id, created_at, updated_at)
-                VALUES (?, ?, ?)
-                ON CONFLICT(session_id) DO UPDATE SET updated_at=excluded.updated_at
-                """,
-                (session_id, now, now),
-            )
-            conn.commit()
-
+    @timed("persistence", "save_message")
     def save_message(
         self,
         session_id: str,
@@ -84,40 +352,121 @@ class PersistenceService:
         content: str,
         metadata: dict[str, Any] | None = None,
     ) -> None:
-        self._upsert_session(session_id)
-        with self._connect() as conn:
-            conn.execute(
-                """
-                INSERT INTO messages (session_id, role, content, metadata_json, created_at)
-                VALUES (?, ?, ?, ?, ?)
-                """,
-                (
-                    session_id,
-                    role,
-                    content,
-                    json.dumps(metadata or {}),
-                    self._utc_now(),
-                ),
-            )
-            conn.commit()
+        now = self._utc_now()
+        record = (session_id, role, content, json.dumps(metadata or {}), now)
+        message = {"role": role, "parts": [content], "created_at": now}
+        if not self.write_behind:
+            with self._write() as conn:
+                conn.execute(UPSERT_SESSION_SQL, (session_id, now, now))
+                conn.execute(INSERT_MESSAGE_SQL, record)
+        else:
+            with self._pending_cond:
+                self._pending.append(record)
+                self._pending_by_session.setdefault(session_id, []).append(message)
+                if len(self._pending) >= self.flush_batch_size:
+                    self._pending_cond.notify()
+
+        if self.history_cache is not None:
+            self.history_cache.append(session_id, message)
 
+    def _flush_loop(self) -> None:
+        interval = self.flush_interval_ms / 1000
+        while True:
+            with self._pending_cond:
+                if not self._closing and len(self._pending) < self.flush_batch_size:
+                    self._pending_cond.wait(timeout=interval)
+                closing = self._closing
+            self.flush()
+            if closing:
+                return
+
+    @timed("persistence", "flush")
+    def flush(self) -> None:
+        """Commits all queued write-behind messages in one transaction."""
+        with self._flush_lock:
+            with self._pending_cond:
+                batch, by_session = self._pending, self._pending_by_session
+                if not batch:
+                    return
+                self._pending, self._pending_by_session = [], {}
+                self._flushing_by_session = by_session
+            try:
+                with self._write() as conn:
+                    conn.executemany(
+                        UPSERT_SESSION_SQL,
+                        [(record[0], record[4], record[4]) for record in batch],
+                    )
+                    conn.executemany(INSERT_MESSAGE_SQL, batch)
+            except sqlite3.Error as e:
+                self._requeue(batch, by_session, e)
+                return
+            with self._pending_cond:
+                self._flushing_by_session = {}
+                self._flush_failures = 0
+
+    def _requeue(
+        self,
+        batch: list[tuple[str, str, str, str, str]],
+        by_session: dict[str, list[dict[str, Any]]],
+        error: sqlite3.Error,
+    ) -> None:
+        """Puts a failed batch back in front of the queue, or drops it once out of retries."""
+        with self._pending_cond:
+            self._flushing_by_session = {}
+            self._flush_failures += 1
+            if self._flush_failures <= self.flush_max_retries:
+                self._pending = batch + self._pending
+                for session_id, messages in by_session.items():
+                    queued = self._pending_by_session.get(session_id, [])
+                    self._pending_by_session[session_id] = messages + queued
+                logger.error(
+                    f"Write-behind flush of {len(batch)} messages failed "
+                    f"(attempt {self._flush_failures}): {error}"
+                )
+                return
+            self._flush_failures = 0
+            self.dropped_messages += len(batch)
+        logger.critical(
+            f"Dropping {len(batch)} write-behind messages from {len(by_session)} sessions "
+            f"after {self.flush_max_retries + 1} failed flushes: {error}"
+        )
+        if self.history_cache is not None:
+            for session_id in by_session:
+                self.history_cache.invalidate(session_id)
+
+    @timed("persistence", "get_session_messages")
     def get_session_messages(
         self, session_id: str, limit: int = 12
     ) -> list[dict[str, Any]]:
-        with self._connect() as conn:
-            rows = conn.execute(
-                """
-                SELECT role, content, created_at
-                FROM messages
-                WHERE session_id = ?
-                ORDER BY id DESC
-                LIMIT ?
-                """,
-                (session_id, limit),
-            ).fetchall()
+        cache = self.history_cache
+        if cache is None or limit > cache.window:
+            return self._load_session_messages(session_id, limit)
+
+        cached = cache.get(session_id, limit)
+        if cached is not None:
+            return cached
+
+        # Load the full cache window so later, larger reads are hits too.
+        generation = cache.begin_load(session_id)
+        messages = None
+        try:
+            messages = self._load_session_messages(session_id, cache.window)
+        finally:
+            cache.finish_load(
+                session_id,
+                generation,
+                messages,
+                complete=messages is not None and len(messages) < cache.window,
+            )
+        return messages[-limit:] if limit > 0 else []
 
+    def _load_session_messages(
+        self, session_id: str, limit: int
+    ) -> list[dict[str, Any]]:
+        overlay = self._queued_messages(session_id)
+        rows = self._fetch_session_rows(session_id, limit)
         ordered_rows = list(reversed(rows))
-        return [
+        messages = [
             {
                 "role": row["role"],
                 "parts": [row["content"]],
@@ -125,61 +474,293 @@ class PersistenceService:
             }
             for row in ordered_rows
         ]
+        messages.extend(_not_yet_committed(overlay, messages))
+        return messages[-limit:] if limit > 0 else []
+
+    def _queued_messages(self, session_id: str) -> list[dict[str, Any]]:
+        """
+        The session's write-behind messages not yet known to be committed.
+        Taken before the committed rows are read, so a message is never
+        missed; one whose flush commits in between shows up in both and is
+        removed by _not_yet_committed.
+        """
+        with self._pending_cond:
+            return [
+                *self._flushing_by_session.get(session_id, ()),
+                *self._pending_by_session.get(session_id, ()),
+            ]
 
-    def create_document(self, filename: str, content_type: str | None) -> str:
+    def _fetch_session_rows(self, session_id: str, limit: int) -> list[sqlite3.Row]:
+        return (
+            self._reader()
+            .execute(SELECT_SESSION_MESSAGES_SQL, (session_id, limit))
+            .fetchall()
+        )
+
+    @timed("persistence", "get_session_messages_since")
+    def get_session_messages_since(self, session_id: str, offset: int) -> list[dict[str, Any]]:
+        """
+        Every message from the `offset`-th committed one (oldest first) to
+        the newest, queued write-behind messages included.
+        """
+        overlay = self._queued_messages(session_id)
+        messages = self.get_session_message_range(session_id, offset, -1)
+        return messages + _not_yet_committed(overlay, messages)
+
+    def count_session_messages(self, session_id: str) -> int:
+        """Counts committed messages; queued write-behind messages are not included."""
+        row = (
+            self._reader()
+            .execute("SELECT COUNT(*) FROM messages WHERE session_id = ?", (session_id,))
+            .fetchone()
+        )
+        return row[0]
+
+    def get_session_message_range(
+        self, session_id: str, offset: int, limit: int
+    ) -> list[dict[str, Any]]:
+        """
+        Committed messages oldest first, starting `offset` messages into the
+        session; a negative limit returns all of them.
+        """
+        rows = (
+            self._reader()
+            .execute(
+                """
+                SELECT role, content, created_at
+                FROM messages
+                WHERE session_id = ?
+                ORDER BY id
+                LIMIT ? OFFSET ?
+                """,
+                (session_id, limit, offset),
+            )
+            .fetchall()
+        )
+        return [
+            {"role": row["role"], "parts": [row["content"]], "created_at": row["created_at"]}
+            for row in rows
+        ]
+
+    @timed("persistence", "get_session_summary")
+    def get_session_summary(self, session_id: str) -> dict[str, Any] | None:
+        row = (
+            self._reader()
+            .execute(
+                """
+                SELECT summary, summarized_count, summarized_through, updated_at
+                FROM session_summaries
+                WHERE session_id = ?
+                """,
+                (session_id,),
+            )
+            .fetchone()
+        )
+        return dict(row) if row else None
+
+    def save_session_summary(
+        self,
+        session_id: str,
+        summary: str,
+        summarized_count: int,
+        summarized_through: str,
+    ) -> None:
+        with self._write() as conn:
+            conn.execute(
+                """
+                INSERT INTO session_summaries
+                    (session_id, summary, summarized_count, summarized_through, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(session_id) DO UPDATE SET
+                    summary = excluded.summary,
+                    summarized_count = excluded.summarized_count,
+                    summarized_through = excluded.summarized_through,
+                    updated_at = excluded.updated_at
+                """,
+                (session_id, summary, summarized_count, summarized_through, self._utc_now()),
+            )
+
+    def create_document(
+        self,
+        filename: str,
+        content_type: str | None,
+        content_hash: str | None = None,
+        namespace: str = SHARED_NAMESPACE,
+    ) -> str:
         doc_id = str(uuid.uuid4())
-        with self._connect() as conn:
+        with self._write() as conn:
             conn.execute(
                 """
-                INSERT INTO documents (doc_id, filename, content_type, created_at)
-                VALUES (?, ?, ?, ?)
+                INSERT INTO documents
+                    (doc_id, filename, content_type, created_at, content_hash, namespace)
+                VALUES (?, ?, ?, ?, ?, ?)
                 """,
-                (doc_id, filename, content_type, self._utc_now()),
+                (doc_id, filename, content_type, self._utc_now(), content_hash, namespace),
             )
-            conn.commit()
         return doc_id
 
+    def find_document_by_hash(
+        self, content_hash: str, namespace: str = SHARED_NAMESPACE
+    ) -> dict[str, Any] | None:
+        row = self._reader().execute(
+            """
+            SELECT doc_id, filename, chunk_count FROM documents
+            WHERE namespace = ? AND content_hash = ? AND chunk_count > 0
+            LIMIT 1
+            """,
+            (namespace, content_hash),
+        ).fetchone()
+        return dict(row) if row else None
+
+    def get_document(self, doc_id: str) -> dict[str, Any] | None:
+        row = self._reader().execute(
+            "SELECT doc_id, filename, namespace, chunk_count FROM documents WHERE doc_id = ?",
+            (doc_id,),
+        ).fetchone()
+        return dict(row) if row else None
+
+    def get_document_namespace(self, doc_id: str) -> str | None:
+        row = self._reader().execute(
+            "SELECT namespace FROM documents WHERE doc_id = ?", (doc_id,)
+        ).fetchone()
+        return row["namespace"] if row else None
+
+    def get_chunk_hashes(self, doc_id: str) -> dict[int, str | None]:
+        rows = self._reader().execute(
+            "SELECT chunk_index, content_hash FROM chunks WHERE doc_id = ?",
+            (doc_id,),
+        ).fetchall()
+        return {row["chunk_index"]: row["content_hash"] for row in rows}
+
+    @staticmethod
+    def _chunk_rows(
+        doc_id: str,
+        chunks: list[str],
+        metadata_list: list[dict[str, Any]],
+        indexes: list[int],
+        created_at: str,
+    ) -> list[tuple]:
+        return [
+            (
+                doc_id,
+                indexes[idx],
+                chunk,
+                json.dumps(metadata_list[idx]),
+                created_at,
+                text_hash(chunk),
+            )
+            for idx, chunk in enumerate(chunks)
+        ]
+
+    @timed("persistence", "save_document_chunks")
     def save_document_chunks(
         self,
         doc_id: str,
         chunks: list[str],
         metadata_list: list[dict[str, Any]],
+        start_index: int = 0,
     ) -> None:
-        created_at = self._utc_now()
-        with self._connect() as conn:
+        """Appends chunks numbered from `start_index`, so large documents can be saved in batches."""
+        indexes = [start_index + idx for idx in range(len(chunks))]
+        rows = self._chunk_rows(doc_id, chunks, metadata_list, indexes, self._utc_now())
+        with self._write() as conn:
+            conn.executemany(INSERT_CHUNK_SQL, rows)
+            conn.execute(
+                "UPDATE documents SET chunk_count = chunk_count + ? WHERE doc_id = ?",
+                (len(chunks), doc_id),
+            )
+
+    @timed("persistence", "replace_document_chunks")
+    def replace_document_chunks(
+        self,
+        doc_id: str,
+        chunks: list[str],
+        metadata_list: list[dict[str, Any]],
+    ) -> None:
+        """Overwrites the chunks at each metadata entry's chunk_index."""
+        indexes = [meta["chunk_index"] for meta in metadata_list]
+        rows = self._chunk_rows(doc_id, chunks, metadata_list, indexes, self._utc_now())
+        with self._write() as conn:
             conn.executemany(
-                """
-                INSERT INTO chunks (doc_id, chunk_index, content, metadata_json, created_at)
-                VALUES (?, ?, ?, ?, ?)
-                """,
-                [
-                    (
-                        doc_id,
-                        idx,
-                        chunk,
-                        json.dumps(metadata_list[idx]),
-                        created_at,
-                    )
-                    for idx, chunk in enumerate(chunks)
-                ],
+                "DELETE FROM chunks WHERE doc_id = ? AND chunk_index = ?",
+                [(doc_id, index) for index in indexes],
             )
-            conn.commit()
-
-    def list_documents(self) -> list[dict[str, Any]]:
-        with self._connect() as conn:
-            rows = conn.execute("""
-                SELECT d.doc_id, d.filename, d.content_type, d.created_at, COUNT(c.id) AS chunk_count
-                FROM documents d
-                LEFT JOIN chunks c ON c.doc_id = d.doc_id
-                GROUP BY d.doc_id
-                ORDER BY d.created_at DESC
+            conn.executemany(INSERT_CHUNK_SQL, rows)
+
+    def finalize_document_revision(
+        self, doc_id: str, chunk_count: int, content_hash: str | None
+    ) -> None:
+        """Drops chunks past the new end of a re-ingested document and records its hash."""
+        with self._write() as conn:
+            conn.execute(
+                "DELETE FROM chunks WHERE doc_id = ? AND chunk_index >= ?",
+                (doc_id, chunk_count),
+            )
+            conn.execute(
+                "UPDATE documents SET chunk_count = ?, content_hash = ? WHERE doc_id = ?",
+                (chunk_count, content_hash, doc_id),
+            )
+
+    @timed("persistence", "keyword_search")
+    def keyword_search(
+        self,
+        terms: list[str],
+        limit: int = 20,
+        match_all: bool = False,
+        namespaces: list[str] | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        BM25-ranked chunks containing any (or, with match_all, every) term,
+        optionally restricted to documents in `namespaces`.
+        """
+        if not terms or not self.keyword_search_available:
+            return []
+        # Quoting each term keeps user text from being parsed as FTS5 syntax.
+        joiner = " AND " if match_all else " OR "
+        match = joiner.join('"' + term.replace('"', '""') + '"' for term in terms)
+        namespace_filter = ""
+        params: list[Any] = [match]
+        if namespaces:
+            namespace_filter = f"AND d.namespace IN ({','.join('?' for _ in namespaces)})"
+            params.extend(namespaces)
+        params.append(limit)
+        rows = self._reader().execute(
+            KEYWORD_SEARCH_SQL.format(namespace_filter=namespace_filter), params
+        ).fetchall()
+        return [
+            {
+                "id": f"{row['doc_id']}:{row['chunk_index']}",
+                "content": row["content"],
+                "metadata": json.loads(row["metadata_json"] or "{}"),
+                "distance": None,
+                "bm25": row["bm25"],
+            }
+            for row in rows
+        ]
+
+    def list_documents(self, namespace: str | None = None) -> list[dict[str, Any]]:
+        if namespace is None:
+            rows = self._reader().execute("""
+                SELECT doc_id, filename, content_type, created_at, chunk_count, namespace
+                FROM documents
+                ORDER BY created_at DESC
                 """).fetchall()
+        else:
+            rows = self._reader().execute(
+                """
+                SELECT doc_id, filename, content_type, created_at, chunk_count, namespace
+                FROM documents
+                WHERE namespace = ?
+                ORDER BY created_at DESC
+                """,
+                (namespace,),
+            ).fetchall()
 
         return [dict(row) for row in rows]
 
+    @timed("persistence", "delete_document")
     def delete_document(self, doc_id: str) -> bool:
-        with self._connect() as conn:
+        with self._write() as conn:
             conn.execute("DELETE FROM chunks WHERE doc_id = ?", (doc_id,))
             result = conn.execute("DELETE FROM documents WHERE doc_id = ?", (doc_id,))
-            conn.commit()
             return result.rowcount > 0
@@ -0,0 +1,320 @@
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from services.persistence_service import PersistenceService
+
+logger = logging.getLogger(__name__)
+
+PROMPT_INSTRUCTIONS = (
+    "Use this structure:\n"
+    "1) Answer with retrieved context when relevant.\n"
+    "2) If context is insufficient, answer using general knowledge and state that clearly.\n"
+    "3) End with a short helpful follow-up.\n\n"
+)
+
+# Below this many tokens of room, a chunk is dropped rather than cut short.
+MIN_PARTIAL_CHUNK_TOKENS = 40
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English text)."""
+    return len(text) // 4 + 1
+
+
+def _overlap_words(head: list[str], tail: list[str]) -> int:
+    """Length of the longest suffix of `head` that is also a prefix of `tail`."""
+    for size in range(min(len(head), len(tail)), 0, -1):
+        if head[-size:] == tail[:size]:
+            return size
+    return 0
+
+
+def _trim_to_tokens(text: str, max_tokens: int) -> str:
+    words = text.split()
+    while words and estimate_tokens(" ".join(words)) > max_tokens:
+        words = words[: int(len(words) * 0.9)]
+    return " ".join(words)
+
+
+@dataclass
+class PromptResult:
+    prompt: str
+    # Retrieved chunks that made it into the prompt, in citation order.
+    chunks: list[dict[str, Any]]
+    tokens: int
+
+
+@dataclass
+class _ContextBlock:
+    rank: int
+    source: str
+    doc_id: Any
+    indexes: list[int]
+    words: list[str]
+    chunks: list[dict[str, Any]] = field(default_factory=list)
+
+
+def _rank_chunks(chunks: list[dict]) -> list[tuple[int, dict]]:
+    """
+    Fused hits by RRF score and vector-only hits by distance; otherwise
+    (BM25 hits carry no distance) the retriever's own order.
+    """
+    ranked = list(enumerate(chunks))
+    if any("rrf_score" in chunk for chunk in chunks):
+        return sorted(ranked, key=lambda item: (-item[1].get("rrf_score", 0.0), item[0]))
+    if chunks and all(chunk.get("distance") is not None for chunk in chunks):
+        return sorted(ranked, key=lambda item: (item[1]["distance"], item[0]))
+    return ranked
+
+
+class PromptBuilder:
+    """
+    Assembles the RAG prompt within `max_tokens`. The instructions and the
+    question always fit; the history it is given (newest first) gets up to
+    `history_tokens`, the session summary up to `summary_tokens`, and the
+    remaining room goes to retrieved chunks in rank order (see
+    _rank_chunks). Adjacent
+    windows of the same document are merged so their overlapping words are
+    sent once.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 2000,
+        history_tokens: int = 400,
+        summary_tokens: int = 250,
+    ):
+        self.max_tokens = max_tokens
+        self.history_tokens = history_tokens
+        self.summary_tokens = summary_tokens
+        self._lock = threading.Lock()
+        self.turns = 0
+        self.total_tokens = 0
+        self.max_seen_tokens = 0
+        self.chunks_dropped = 0
+        self.overlap_words_removed = 0
+
+    def build(
+        self,
+        user_message: str,
+        history_items: list[dict],
+        retrieved_chunks: list[dict],
+        summary: str | None = None,
+    ) -> PromptResult:
+        question = f"User question:\n{user_message}"
+        remaining = self.max_tokens - estimate_tokens(PROMPT_INSTRUCTIONS + question)
+
+        summary_text = ""
+        if summary:
+            summary_text = _trim_to_tokens(summary, min(self.summary_tokens, max(remaining, 0)))
+            remaining -= estimate_tokens(summary_text)
+
+        history_text = self._render_history(history_items, min(self.history_tokens, remaining))
+        remaining -= estimate_tokens(history_text)
+
+        blocks, dropped, overlap_removed = self._select_context(retrieved_chunks, remaining)
+        if blocks:
+            context_text = "\n\n".join(
+                f"[{idx}] source={block.source} chunk={self._index_label(block.indexes)}\n"
+                + " ".join(block.words)
+                for idx, block in enumerate(blocks, start=1)
+            )
+        else:
+            context_text = "No retrieved context available."
+
+        sections = [PROMPT_INSTRUCTIONS]
+        if summary_text:
+            sections.append(f"Conversation summary:\n{summary_text}\n\n")
+        sections.append(f"Recent conversation:\n{history_text}\n\n")
+        sections.append(f"Retrieved context:\n{context_text}\n\n")
+        sections.append(question)
+        prompt = "".join(sections)
+
+        tokens = estimate_tokens(prompt)
+        with self._lock:
+            self.turns += 1
+            self.total_tokens += tokens
+            self.max_seen_tokens = max(self.max_seen_tokens, tokens)
+            self.chunks_dropped += dropped
+            self.overlap_words_removed += overlap_removed
+        used_chunks = [chunk for block in blocks for chunk in block.chunks]
+        return PromptResult(prompt=prompt, chunks=used_chunks, tokens=tokens)
+
+    def _render_history(self, history_items: list[dict], budget: int) -> str:
+        lines: list[str] = []
+        used = 0
+        for item in reversed(history_items):
+            parts = item.get("parts", [""])
+            line = f"{item.get('role', 'user').upper()}: {parts[0] if parts else ''}"
+            cost = estimate_tokens(line)
+            if used + cost > budget:
+                break
+            lines.append(line)
+            used += cost
+        if not lines:
+            return "No prior conversation."
+        return "\n".join(reversed(lines))
+
+    @staticmethod
+    def _index_label(indexes: list[int]) -> str:
+        if not indexes or indexes[0] is None:
+            return "?"
+        if len(indexes) == 1:
+            return str(indexes[0])
+        return f"{indexes[0]}-{indexes[-1]}"
+
+    def _select_context(
+        self, retrieved_chunks: list[dict], budget: int
+    ) -> tuple[list[_ContextBlock], int, int]:
+        """Returns (blocks in rank order, chunks dropped, overlapping words removed)."""
+        ranked = _rank_chunks(retrieved_chunks)
+
+        blocks: list[_ContextBlock] = []
+        dropped = 0
+        overlap_removed = 0
+        seen_ids: set = set()
+        for rank, chunk in ranked:
+            chunk_id = chunk.get("id")
+            if chunk_id is not None and chunk_id in seen_ids:
+                continue
+            seen_ids.add(chunk_id)
+
+            meta = chunk.get("metadata") or {}
+            doc_id = meta.get("doc_id")
+            index = meta.get("chunk_index")
+            words = (chunk.get("content") or "").split()
+
+            block, position = self._adjacent_block(blocks, doc_id, index)
+            if block is not None:
+                # Extending a block only costs the words it does not already hold.
+                if position == "after":
+                    overlap = _overlap_words(block.words, words)
+                    new_words = words[overlap:]
+                else:
+                    overlap = _overlap_words(words, block.words)
+                    new_words = words[: len(words) - overlap]
+                cost = estimate_tokens(" ".join(new_words))
+                if cost > budget:
+                    dropped += 1
+                    continue
+                if position == "after":
+                    block.words.extend(new_words)
+                    block.indexes.append(index)
+                    block.chunks.append(chunk)
+                else:
+                    block.words[:0] = new_words
+                    block.indexes.insert(0, index)
+                    block.chunks.insert(0, chunk)
+                overlap_removed += overlap
+                budget -= cost
+                continue
+
+            source = meta.get("source", "unknown")
+            header_cost = estimate_tokens(f"[00] source={source} chunk=000-000\n")
+            cost = header_cost + estimate_tokens(" ".join(words))
+            if cost > budget:
+                room = budget - header_cost
+                if room < MIN_PARTIAL_CHUNK_TOKENS:
+                    dropped += 1
+                    continue
+                words = _trim_to_tokens(" ".join(words), room).split()
+                cost = header_cost + estimate_tokens(" ".join(words))
+            blocks.append(
+                _ContextBlock(
+                    rank=rank,
+                    source=source,
+                    doc_id=doc_id,
+                    indexes=[index],
+                    words=list(words),
+                    chunks=[chunk],
+                )
+            )
+            budget -= cost
+        return blocks, dropped, overlap_removed
+
+    @staticmethod
+    def _adjacent_block(
+        blocks: list[_ContextBlock], doc_id: Any, index: Any
+    ) -> tuple[_ContextBlock | None, str | None]:
+        if doc_id is None or not isinstance(index, int):
+            return None, None
+        for block in blocks:
+            if block.doc_id != doc_id or block.indexes[0] is None:
+                continue
+            if index == block.indexes[-1] + 1:
+                return block, "after"
+            if index == block.indexes[0] - 1:
+                return block, "before"
+        return None, None
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            return {
+                "turns": self.turns,
+                "avg_prompt_tokens": self.total_tokens / self.turns if self.turns else 0.0,
+                "max_prompt_tokens": self.max_seen_tokens,
+                "max_tokens": self.max_tokens,
+                "chunks_dropped": self.chunks_dropped,
+                "overlap_words_removed": self.overlap_words_removed,
+            }
+
+
+class SessionSummarizer:
+    """
+    Keeps a rolling per-session summary of everything but the most recent
+    `keep_recent` messages. Once at least `min_batch` messages have aged out
+    of the recent window, they are folded into the stored summary with
+    `summarize_fn(previous_summary, messages)`; older messages are never
+    re-read.
+    """
+
+    def __init__(
+        self,
+        persistence: PersistenceService,
+        summarize_fn: Callable[[str, list[dict[str, Any]]], str],
+        keep_recent: int = 6,
+        min_batch: int = 6,
+    ):
+        self.persistence = persistence
+        self.summarize_fn = summarize_fn
+        self.keep_recent = keep_recent
+        self.min_batch = min_batch
+        self._running: set[str] = set()
+        self._lock = threading.Lock()
+        self.updates = 0
+
+    def maybe_update(self, session_id: str) -> bool:
+        with self._lock:
+            if session_id in self._running:
+                return False
+            self._running.add(session_id)
+        try:
+            state = self.persistence.get_session_summary(session_id)
+            summarized = state["summarized_count"] if state else 0
+            fold_until = self.persistence.count_session_messages(session_id) - self.keep_recent
+            if fold_until - summarized < self.min_batch:
+                return False
+
+            messages = self.persistence.get_session_message_range(
+                session_id, offset=summarized, limit=fold_until - summarized
+            )
+            if not messages:
+                return False
+            summary = self.summarize_fn(state["summary"] if state else "", messages)
+            self.persistence.save_session_summary(
+                session_id,
+                summary,
+                summarized_count=summarized + len(messages),
+                summarized_through=messages[-1]["created_at"],
+            )
+            with self._lock:
+                self.updates += 1
+            return True
+        except Exception as e:
+            logger.error(f"Summary update for session {session_id} failed: {str(e)}")
+            return False
+        finally:
+            with self._lock:
+                self._running.discard(session_id)
@@ -0,0 +1,178 @@
+import importlib.util
+import logging
+import threading
+from typing import Any
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderRegistry:
+    """
+    Long-lived provider clients shared by every request. AssemblyAI, Murf
+    and audio downloads each get one pooled, keep-alive httpx.Client (HTTP/2
+    when the `h2` package is installed); Gemini talks gRPC, which already
+    multiplexes over a single HTTP/2 channel, so the registry only keeps one
+    GenerativeModel per (model, system instruction). SDKs are imported on
+    first use.
+    """
+
+    def __init__(
+        self,
+        assemblyai_api_key: str | None = None,
+        gemini_api_key: str | None = None,
+        murf_api_key: str | None = None,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 30.0,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 60.0,
+        http2: bool = True,
+        gemini_transport: str = "grpc",
+        assemblyai_polling_interval: float | None = None,
+        assemblyai_base_url: str | None = None,
+        murf_base_url: str | None = None,
+    ):
+        self.assemblyai_api_key = assemblyai_api_key
+        self.gemini_api_key = gemini_api_key
+        self.murf_api_key = murf_api_key
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("HTTP/2 requested but the 'h2' package is missing; using HTTP/1.1.")
+            http2 = False
+        self.http2 = http2
+        self.gemini_transport = gemini_transport
+        self.assemblyai_polling_interval = assemblyai_polling_interval
+        self.assemblyai_base_url = assemblyai_base_url
+        self.murf_base_url = murf_base_url
+        self._lock = threading.Lock()
+        self._http_clients: dict[str, httpx.Client] = {}
+        self._models: dict[tuple[str, str | None], Any] = {}
+        self._transcriber = None
+        self._murf = None
+        self._gemini_configured = False
+
+    def http_client(self, name: str, **kwargs: Any) -> httpx.Client:
+        """Returns the pooled client for `name`, creating it with `kwargs` on first use."""
+        with self._lock:
+            client = self._http_clients.get(name)
+            if client is None:
+                client = httpx.Client(
+                    limits=self.limits,
+                    timeout=self.timeout,
+                    http2=self.http2,
+                    follow_redirects=True,
+                    **kwargs,
+                )
+                self._http_clients[name] = client
+            return client
+
+    def transcriber(self):
+        with self._lock:
+            if self._transcriber is not None:
+                return self._transcriber
+        import assemblyai as aai
+
+        settings = aai.settings.copy()
+        settings.api_key = self.assemblyai_api_key or settings.api_key
+        if self.assemblyai_polling_interval is not None:
+            settings.polling_interval = self.assemblyai_polling_interval
+        if self.assemblyai_base_url:
+            settings.base_url = self.assemblyai_base_url
+        client = aai.Client(settings=settings)
+        # The SDK does not take an httpx client, so swap the pooled one in
+        # with the SDK's base URL, auth headers and response hook.
+        sdk_http = client.http_client
+        client._http_client = self.http_client(
+            "assemblyai",
+            base_url=sdk_http.base_url,
+            headers=sdk_http.headers,
+            event_hooks=sdk_http.event_hooks,
+        )
+        sdk_http.close()
+        transcriber = aai.Transcriber(client=client)
+        with self._lock:
+            if self._transcriber is None:
+                self._transcriber = transcriber
+            return self._transcriber
+
+    def llm_model(self, model_name: str, system_instruction: str | None = None):
+        key = (model_name, system_instruction)
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                return model
+        genai = self._gemini()
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                model = genai.GenerativeModel(model_name, system_instruction=system_instruction)
+                self._models[key] = model
+            return model
+
+    def _gemini(self):
+        import google.generativeai as genai
+
+        with self._lock:
+            if not self._gemini_configured:
+                genai.configure(api_key=self.gemini_api_key, transport=self.gemini_transport)
+                self._gemini_configured = True
+        return genai
+
+    def llm_request_options(self) -> dict[str, float]:
+        return {"timeout": self.timeout.read}
+
+    def murf_client(self):
+        with self._lock:
+            if self._murf is not None:
+                return self._murf
+        from murf import __version__ as murf_version
+        from murf.client import Murf
+        from murf.environment import MurfEnvironment
+
+        environment = MurfEnvironment.DEFAULT
+        if self.murf_base_url:
+            environment = MurfEnvironment(
+                base=self.murf_base_url, production=MurfEnvironment.DEFAULT.production
+            )
+        murf = Murf(
+            api_key=self.murf_api_key,
+            environment=environment,
+            timeout=self.timeout.read,
+            # Same origin tag the SDK sets on the client it would build itself.
+            httpx_client=self.http_client(
+                "murf", params={"origin": f"python_sdk_{murf_version}"}
+            ),
+        )
+        with self._lock:
+            if self._murf is None:
+                self._murf = murf
+            return self._murf
+
+    def download_client(self) -> httpx.Client:
+        """Client for fetching provider-hosted audio files."""
+        return self.http_client("downloads")
+
+    def warm_up(self) -> None:
+        """Imports the SDKs and builds the clients for every configured provider."""
+        if self.assemblyai_api_key:
+            self.transcriber()
+        if self.gemini_api_key:
+            self._gemini()
+        if self.murf_api_key:
+            self.murf_client()
+
+    def close(self) -> None:
+        with self._lock:
+            clients = list(self._http_clients.values())
+            self._http_clients.clear()
+            self._transcriber = None
+            self._murf = None
+        for client in clients:
+            client.close()
@@ -0,0 +1,179 @@
+import asyncio
+import io
+import logging
+import math
+import wave
+from array import array
+from typing import Callable
+
+from services.lazy_imports import lazy_import
+
+aai = lazy_import("assemblyai")
+
+logger = logging.getLogger(__name__)
+
+# Streaming transcribers report ("partial" | "final" | "empty" | "error", text)
+# events through this callback. It is invoked from SDK/worker threads. Every
+# end of utterance yields a "final", "empty" (nothing recognized) or "error".
+EventCallback = Callable[[str, str], None]
+
+
+def threadsafe_event_callback(
+    loop: asyncio.AbstractEventLoop, queue: asyncio.Queue
+) -> EventCallback:
+    def emit(kind: str, text: str) -> None:
+        loop.call_soon_threadsafe(queue.put_nowait, (kind, text))
+
+    return emit
+
+
+def pcm16_rms(frame: bytes) -> float:
+    samples = array("h")
+    samples.frombytes(frame[: len(frame) - (len(frame) % 2)])
+    if not samples:
+        return 0.0
+    return math.sqrt(sum(sample * sample for sample in samples) / len(samples))
+
+
+def pcm16_to_wav(pcm: bytes, sample_rate: int) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(pcm)
+    return buffer.getvalue()
+
+
+class AssemblyAIStreamingTranscriber:
+    """Forwards 16-bit mono PCM frames to AssemblyAI's real-time transcriber."""
+
+    def __init__(
+        self,
+        on_event: EventCallback,
+        sample_rate: int = 16000,
+        end_utterance_silence_ms: int = 700,
+    ):
+        self._on_event = on_event
+        self._transcriber = aai.RealtimeTranscriber(
+            sample_rate=sample_rate,
+            on_data=self._handle_data,
+            on_error=self._handle_error,
+            end_utterance_silence_threshold=end_utterance_silence_ms,
+        )
+
+    def _handle_data(self, transcript: "aai.RealtimeTranscript") -> None:
+        text = (transcript.text or "").strip()
+        if isinstance(transcript, aai.RealtimeFinalTranscript):
+            self._on_event("final" if text else "empty", text)
+        elif text:
+            self._on_event("partial", text)
+
+    def _handle_error(self, error: "aai.RealtimeError") -> None:
+        logger.error(f"Realtime STT error: {error}")
+        self._on_event("error", str(error))
+
+    def connect(self) -> None:
+        self._transcriber.connect()
+
+    def send_audio(self, frame: bytes) -> None:
+        self._transcriber.stream(frame)
+
+    def end_utterance(self) -> None:
+        self._transcriber.force_end_utterance()
+
+    def close(self) -> None:
+        self._transcriber.close()
+
+
+class LocalStreamingTranscriber:
+    """
+    Energy-based end-of-utterance detection over PCM frames, handing each
+    completed utterance to a batch `transcribe_fn`. Used when the realtime
+    service is unavailable and as a deterministic stand-in for tests.
+    """
+
+    def __init__(
+        self,
+        on_event: EventCallback,
+        transcribe_fn: Callable[[bytes], str],
+        sample_rate: int = 16000,
+        end_utterance_silence_ms: int = 700,
+        energy_threshold: float = 500.0,
+    ):
+        self._on_event = on_event
+        self._transcribe_fn = transcribe_fn
+        self.sample_rate = sample_rate
+        self.energy_threshold = energy_threshold
+        self._silence_bytes_limit = int(sample_rate * 2 * end_utterance_silence_ms / 1000)
+        self._utterance = bytearray()
+        self._silence_bytes = 0
+        self._heard_speech = False
+
+    def connect(self) -> None:
+        pass
+
+    def send_audio(self, frame: bytes) -> None:
+        if pcm16_rms(frame) >= self.energy_threshold:
+            self._heard_speech = True
+            self._silence_bytes = 0
+        elif self._heard_speech:
+            self._silence_bytes += len(frame)
+
+        if self._heard_speech:
+            self._utterance.extend(frame)
+        if self._heard_speech and self._silence_bytes >= self._silence_bytes_limit:
+            self.end_utterance()
+
+    def end_utterance(self) -> None:
+        pcm = bytes(self._utterance)
+        heard_speech = self._heard_speech
+        self._utterance.clear()
+        self._silence_bytes = 0
+        self._heard_speech = False
+        if not heard_speech:
+            self._on_event("empty", "")
+            return
+
+        try:
+            text = (self._transcribe_fn(pcm) or "").strip()
+        except Exception as e:
+            logger.error(f"Local utterance transcription failed: {e}")
+            self._on_event("error", str(e))
+            return
+        self._on_event("final" if text else "empty", text)
+
+    def close(self) -> None:
+        self._utterance.clear()
+
+
+def transcribe_pcm_with_assemblyai(pcm: bytes, sample_rate: int) -> str:
+    transcript = aai.Transcriber().transcribe(io.BytesIO(pcm16_to_wav(pcm, sample_rate)))
+    if transcript.status == aai.TranscriptStatus.error:
+        raise RuntimeError(transcript.error)
+    return transcript.text or ""
+
+
+def create_streaming_transcriber(
+    backend: str,
+    on_event: EventCallback,
+    sample_rate: int = 16000,
+    end_utterance_silence_ms: int = 700,
+    transcribe_fn: Callable[[bytes], str] | None = None,
+):
+    """`transcribe_fn` overrides the batch transcriber behind the "local" backend."""
+    if backend == "assemblyai":
+        return AssemblyAIStreamingTranscriber(
+            on_event,
+            sample_rate=sample_rate,
+            end_utterance_silence_ms=end_utterance_silence_ms,
+        )
+    if backend == "local":
+        return LocalStreamingTranscriber(
+            on_event,
+            transcribe_fn=transcribe_fn
+            or (lambda pcm: transcribe_pcm_with_assemblyai(pcm, sample_rate)),
+            sample_rate=sample_rate,
+            end_utterance_silence_ms=end_utterance_silence_ms,
+        )
+    raise ValueError(f"Unknown realtime STT backend: {backend}")
@@ -0,0 +1,336 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Iterable, TypeVar
+
+from services.executor_service import StageExecutor
+from services.metrics_service import count_provider_error, metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+provider_timeouts = metrics.counter(
+    "voice_provider_timeouts_total", "Provider calls cut off by their deadline.", ("provider",)
+)
+provider_hedges = metrics.counter(
+    "voice_provider_hedges_total",
+    "Duplicate provider requests sent after the p95 latency.",
+    ("provider", "winner"),
+)
+turn_degradations = metrics.counter(
+    "voice_turn_degradations_total",
+    "Turns that skipped a step to stay within the turn budget.",
+    ("mode",),
+)
+provider_rejections = metrics.counter(
+    "voice_provider_rejected_total",
+    "Provider calls failed fast by an open circuit breaker.",
+    ("provider",),
+)
+
+
+class CircuitOpenError(Exception):
+    """The provider's circuit breaker is open; the call was not attempted."""
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls
+    for `reset_timeout` seconds. Then one trial call is let through
+    (half-open); its success closes the breaker, a failure re-opens it.
+    """
+
+    def __init__(self, name: str = "", failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self.opens = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = HALF_OPEN
+                self._trial_in_flight = False
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def release(self) -> None:
+        """Ends a trial call that neither succeeded nor failed (e.g. cancelled)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self.opens += 1
+                    logger.warning(f"Circuit breaker for {self.name} opened after failures.")
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+
+class LatencyWindow:
+    """The last `size` successful call durations, for the hedging threshold."""
+
+    def __init__(self, size: int = 200):
+        self._samples: deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float, min_samples: int = 20) -> float | None:
+        with self._lock:
+            if len(self._samples) < min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class ProviderGuard:
+    """
+    Wraps every call to one provider with a circuit breaker, a deadline
+    and, for idempotent calls, one hedged duplicate sent once the call has
+    run longer than the provider's recent p95. Blocking calls run on the
+    provider's stage pool; a call abandoned by its deadline or by the
+    winning hedge still finishes on its thread, but its result is dropped.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        stage: str,
+        executor: StageExecutor,
+        timeout: float,
+        breaker: CircuitBreaker | None = None,
+        hedge: bool = False,
+        hedge_quantile: float = 0.95,
+        hedge_min_samples: int = 20,
+    ):
+        self.provider = provider
+        self.stage = stage
+        self.executor = executor
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker(provider)
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.latency = LatencyWindow()
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.timeouts = 0
+
+    def available(self) -> bool:
+        """False while the breaker is open, so callers can degrade up front."""
+        return self.breaker.state != OPEN
+
+    def _timeout(self, deadline: float | None) -> float:
+        timeout = self.timeout
+        if deadline is not None:
+            timeout = min(timeout, deadline - time.monotonic())
+        if timeout <= 0:
+            raise TimeoutError(f"No time left in the turn budget for {self.provider}.")
+        return timeout
+
+    def _admit(self) -> None:
+        if not self.breaker.allow():
+            if metrics.enabled:
+                provider_rejections.inc(self.provider)
+            raise CircuitOpenError(f"{self.provider} circuit breaker is open.")
+
+    def _record_failure(self, error: BaseException) -> None:
+        self.breaker.record_failure()
+        count_provider_error(self.provider)
+        if isinstance(error, TimeoutError):
+            self.timeouts += 1
+            if metrics.enabled:
+                provider_timeouts.inc(self.provider)
+
+    async def call(
+        self,
+        fn: Callable[..., T],
+        *args: Any,
+        deadline: float | None = None,
+        hedge: bool | None = None,
+        **kwargs: Any,
+    ) -> T:
+        timeout = self._timeout(deadline)
+        self._admit()
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(
+                self._hedged(fn, args, kwargs, self.hedge if hedge is None else hedge),
+                timeout,
+            )
+        except asyncio.TimeoutError as e:
+            self._record_failure(TimeoutError())
+            raise TimeoutError(f"{self.provider} call exceeded {timeout:.1f}s.") from e
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+        except Exception as e:
+            self._record_failure(e)
+            raise
+        self.latency.add(time.monotonic() - started)
+        self.breaker.record_success()
+        return result
+
+    async def _hedged(self, fn: Callable[..., T], args: tuple, kwargs: dict, hedge: bool) -> T:
+        primary = asyncio.ensure_future(self.executor.run(self.stage, fn, *args, **kwargs))
+        delay = None
+        if hedge:
+            delay = self.latency.quantile(self.hedge_quantile, self.hedge_min_samples)
+        if delay is None:
+            return await primary
+
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+        self.hedges += 1
+        backup = asyncio.ensure_future(self.executor.run(self.stage, fn, *args, **kwargs))
+        pending = {primary, backup}
+        try:
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((task for task in done if task.exception() is None), None)
+                if winner is not None:
+                    if winner is backup:
+                        self.hedge_wins += 1
+                    if metrics.enabled:
+                        provider_hedges.inc(
+                            self.provider, "hedge" if winner is backup else "primary"
+                        )
+                    return winner.result()
+                # Both failed: surface the last error. Otherwise keep waiting,
+                # as the other request may still succeed.
+                if not pending:
+                    return done.pop().result()
+        finally:
+            primary.cancel()
+            backup.cancel()
+
+    def call_blocking(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        For callers already on a worker thread (background jobs, warm-up):
+        breaker and error accounting only; the SDK's own timeout applies.
+        """
+        self._admit()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self._record_failure(e)
+            raise
+        self.breaker.record_success()
+        return result
+
+    async def stream(
+        self,
+        fn: Callable[..., Iterable[T]],
+        *args: Any,
+        deadline: float | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[T]:
+        """
+        Streams from the provider; the whole stream must finish within the
+        timeout (or deadline). Streams are not hedged.
+        """
+        end = time.monotonic() + self._timeout(deadline)
+        self._admit()
+        chunks = self.executor.stream(self.stage, fn, *args, **kwargs).__aiter__()
+        failed = False
+        try:
+            while True:
+                remaining = end - time.monotonic()
+                try:
+                    if remaining <= 0:
+                        raise asyncio.TimeoutError()
+                    chunk = await asyncio.wait_for(chunks.__anext__(), remaining)
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError as e:
+                    failed = True
+                    self._record_failure(TimeoutError())
+                    raise TimeoutError(f"{self.provider} stream exceeded its deadline.") from e
+                except Exception as e:
+                    failed = True
+                    self._record_failure(e)
+                    raise
+                yield chunk
+        finally:
+            await chunks.aclose()
+            # A stream the caller stopped reading early still counts as healthy.
+            if not failed:
+                self.breaker.record_success()
+
+    def stats(self) -> dict[str, Any]:
+        p95 = self.latency.quantile(self.hedge_quantile, self.hedge_min_samples)
+        return {
+            "state": self.breaker.state,
+            "opens": self.breaker.opens,
+            "timeouts": self.timeouts,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedge_after_ms": round(p95 * 1000, 1) if p95 is not None and self.hedge else None,
+        }
+
+
+def breaker_states(guards: Iterable[ProviderGuard]) -> dict[tuple[str, ...], float]:
+    """Gauge callback: 0 closed, 1 half-open, 2 open."""
+    return {(guard.provider,): _STATE_VALUES[guard.breaker.state] for guard in guards}
+
+
+class TurnBudget:
+    """Wall-clock budget for one conversational turn; None means unbounded."""
+
+    def __init__(self, seconds: float | None):
+        self.deadline = time.monotonic() + seconds if seconds else None
+        self.degraded: list[str] = []
+
+    def remaining(self) -> float | None:
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def allows(self, seconds: float) -> bool:
+        remaining = self.remaining()
+        return remaining is None or remaining >= seconds
+
+    def degrade(self, mode: str) -> None:
+        if mode not in self.degraded:
+            logger.warning(f"Turn degraded: {mode}")
+            self.degraded.append(mode)
+            if metrics.enabled:
+                turn_degradations.inc(mode)
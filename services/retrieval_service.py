@@ -0,0 +1,140 @@
+import logging
+import re
+import threading
+from typing import Any
+
+from services.persistence_service import PersistenceService
+from services.vector_service import VectorService
+
+logger = logging.getLogger(__name__)
+
+RETRIEVAL_MODES = ("vector", "keyword", "hybrid")
+
+_TERM_PATTERN = re.compile(r"\w+")
+
+# Function words that carry no signal for BM25 and would only widen the
+# OR-match candidate set.
+STOPWORDS = frozenset(
+    "a an and are as at be but by can could did do does for from had has have how i "
+    "in is it its me my of on or our please should so tell that the their them then "
+    "there these this to us was we were what when where which who why will with "
+    "would you your".split()
+)
+
+
+def query_terms(text: str) -> list[str]:
+    terms: list[str] = []
+    for term in _TERM_PATTERN.findall(text.lower()):
+        if term not in STOPWORDS and term not in terms:
+            terms.append(term)
+    return terms
+
+
+def is_keyword_only(hits: list[dict[str, Any]]) -> bool:
+    """True when the hits came from the keyword index alone, so the query was never embedded."""
+    return bool(hits) and all(
+        hit.get("distance") is None and "rrf_score" not in hit for hit in hits
+    )
+
+
+def reciprocal_rank_fusion(
+    rankings: list[list[dict[str, Any]]], k: int = 60
+) -> list[dict[str, Any]]:
+    """Merges ranked lists by summing 1 / (k + rank) per chunk id."""
+    scores: dict[str, float] = {}
+    rows: dict[str, dict[str, Any]] = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking, start=1):
+            scores[row["id"]] = scores.get(row["id"], 0.0) + 1.0 / (k + rank)
+            # Keep the first copy seen, so vector hits retain their distance.
+            rows.setdefault(row["id"], row)
+    ordered = sorted(scores, key=scores.get, reverse=True)
+    return [{**rows[chunk_id], "rrf_score": scores[chunk_id]} for chunk_id in ordered]
+
+
+class HybridRetriever:
+    """
+    Combines the sqlite FTS5 (BM25) keyword index with the Chroma vector
+    index. In hybrid mode each side contributes up to `candidates` hits,
+    fused with reciprocal rank fusion. With keyword_only_max_terms set,
+    queries of up to that many terms that all occur together in some chunk
+    are answered from the keyword index alone, without running the
+    embedding model. That trades semantic recall for latency on most short
+    spoken questions, so it is off (0) by default.
+    """
+
+    def __init__(
+        self,
+        persistence: PersistenceService,
+        vector_service: VectorService | None = None,
+        mode: str = "hybrid",
+        candidates: int = 20,
+        keyword_only_max_terms: int = 0,
+        rrf_k: int = 60,
+    ):
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode '{mode}'. Expected one of {RETRIEVAL_MODES}.")
+        if mode != "vector" and not persistence.keyword_search_available:
+            logger.warning(f"Keyword index unavailable; retrieval mode '{mode}' falls back to vector.")
+            mode = "vector"
+        self.persistence = persistence
+        self.vector_service = vector_service
+        self.mode = mode
+        self.candidates = candidates
+        self.keyword_only_max_terms = keyword_only_max_terms
+        self.rrf_k = rrf_k
+        self._lock = threading.Lock()
+        self._counts = {"keyword_only": 0, "vector_only": 0, "fused": 0}
+
+    def _count(self, path: str) -> None:
+        with self._lock:
+            self._counts[path] += 1
+
+    def retrieve(
+        self,
+        query_text: str,
+        top_k: int = 4,
+        namespaces: list[str] | None = None,
+    ) -> list[dict[str, Any]]:
+        terms = query_terms(query_text) if self.mode != "vector" else []
+        vector_service = self.vector_service
+
+        def keyword_search(limit: int, match_all: bool = False) -> list[dict[str, Any]]:
+            return self.persistence.keyword_search(
+                terms, limit=limit, match_all=match_all, namespaces=namespaces
+            )
+
+        if self.mode == "keyword" or (self.mode == "hybrid" and vector_service is None):
+            self._count("keyword_only")
+            return keyword_search(top_k)
+        if vector_service is None:
+            return []
+
+        if self.mode == "vector" or not terms:
+            self._count("vector_only")
+            return vector_service.query(query_text, top_k=top_k, namespaces=namespaces)
+
+        if len(terms) <= self.keyword_only_max_terms:
+            exact_hits = keyword_search(top_k, match_all=True)
+            if exact_hits:
+                self._count("keyword_only")
+                return exact_hits
+
+        budget = max(top_k, self.candidates)
+        keyword_hits = keyword_search(budget)
+        vector_hits = vector_service.query(query_text, top_k=budget, namespaces=namespaces)
+        if not keyword_hits:
+            self._count("vector_only")
+            return vector_hits[:top_k]
+        self._count("fused")
+        return reciprocal_rank_fusion([vector_hits, keyword_hits], k=self.rrf_k)[:top_k]
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            counts = dict(self._counts)
+        total = sum(counts.values())
+        return {
+            "mode": self.mode,
+            **counts,
+            "keyword_only_ratio": counts["keyword_only"] / total if total else 0.0,
+        }
@@ -0,0 +1,51 @@
+from dataclasses import dataclass
+from typing import BinaryIO
+
+
+class SpeechProviderError(Exception):
+    """A speech backend failed to transcribe or synthesize."""
+
+
+@dataclass
+class SynthesizedSpeech:
+    """Either a provider-hosted audio URL or locally rendered audio bytes."""
+
+    audio_url: str | None = None
+    audio: bytes | None = None
+    extension: str = ".mp3"
+
+
+class SpeechToTextProvider:
+    """Turns one recorded turn into text; STT_BACKEND selects the implementation."""
+
+    name = ""
+    # Optional packages the backend imports (requirements-optional.txt),
+    # checked at startup so /readyz can report a missing install.
+    required_modules: tuple[str, ...] = ()
+
+    def is_configured(self) -> bool:
+        return True
+
+    def warm_up(self) -> None:
+        """Loads models or opens clients ahead of the first turn."""
+
+    def transcribe_audio(self, audio_file: BinaryIO) -> str:
+        """Returns the transcript ("" when nothing was recognized)."""
+        raise NotImplementedError
+
+
+class TextToSpeechProvider:
+    """Renders reply text as audio; TTS_BACKEND selects the implementation."""
+
+    name = ""
+    required_modules: tuple[str, ...] = ()
+    default_voice = ""
+
+    def is_configured(self) -> bool:
+        return True
+
+    def warm_up(self) -> None:
+        """Loads models or opens clients ahead of the first turn."""
+
+    def generate_speech(self, text: str, voice_id: str) -> SynthesizedSpeech:
+        raise NotImplementedError
@@ -0,0 +1,74 @@
+import json
+import re
+from typing import Any
+
+# Murf rejects requests above 3000 characters; keep a margin for safety.
+MAX_TTS_CHARS = 2900
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])[\"')\]]*\s+")
+
+
+def _split_long(sentence: str, max_chars: int) -> list[str]:
+    if len(sentence) <= max_chars:
+        return [sentence]
+
+    parts: list[str] = []
+    current = ""
+    for word in sentence.split():
+        candidate = f"{current} {word}".strip()
+        if len(candidate) > max_chars and current:
+            parts.append(current)
+            current = word
+        else:
+            current = candidate
+    if current:
+        parts.append(current)
+    return parts
+
+
+class SentenceChunker:
+    """
+    Accumulates streamed LLM text and releases it at sentence boundaries.
+    Very short sentences are held back and merged so that each TTS request
+    carries a reasonable amount of speech.
+    """
+
+    def __init__(self, min_chars: int = 40, max_chars: int = MAX_TTS_CHARS):
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self._buffer = ""
+        self._pending = ""
+
+    def feed(self, text: str) -> list[str]:
+        self._buffer += text
+        ready: list[str] = []
+        while True:
+            match = _SENTENCE_END.search(self._buffer)
+            if not match:
+                break
+            sentence = self._buffer[: match.end()].strip()
+            self._buffer = self._buffer[match.end() :]
+            ready.extend(self._release(sentence))
+        return ready
+
+    def flush(self) -> list[str]:
+        remainder = f"{self._pending} {self._buffer}".strip()
+        self._pending = ""
+        self._buffer = ""
+        if not remainder:
+            return []
+        return _split_long(remainder, self.max_chars)
+
+    def _release(self, sentence: str) -> list[str]:
+        if not sentence:
+            return []
+        merged = f"{self._pending} {sentence}".strip()
+        if len(merged) < self.min_chars:
+            self._pending = merged
+            return []
+        self._pending = ""
+        return _split_long(merged, self.max_chars)
+
+
+def format_sse(event: str, data: dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -0,0 +1,202 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from urllib.parse import urlparse
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class TTSCache:
+    """
+    Maps (text, voice_id) to synthesized audio kept in a local,
+    content-addressed store: files are named by the sha256 of their bytes,
+    so identical audio is stored once whatever phrase produced it. The index
+    is a sqlite file beside (not inside) the served directory. Once the store
+    exceeds `max_bytes`, the least recently played phrases are evicted.
+    """
+
+    def __init__(
+        self,
+        audio_dir: str = "data/audio",
+        max_bytes: int = 512 * 1024 * 1024,
+        url_prefix: str = "/audio",
+        download_timeout: float = 10.0,
+        index_path: str | None = None,
+        http_client: httpx.Client | None = None,
+    ):
+        self.audio_dir = audio_dir
+        self.max_bytes = max_bytes
+        self.url_prefix = url_prefix
+        os.makedirs(self.audio_dir, exist_ok=True)
+        self._conn = sqlite3.connect(
+            index_path or f"{os.path.normpath(audio_dir)}.db", check_same_thread=False
+        )
+        self._lock = threading.Lock()
+        # A client passed in is shared with its owner, who closes it.
+        self._owns_http = http_client is None
+        self._http = http_client or httpx.Client(timeout=download_timeout, follow_redirects=True)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL;")
+            self._conn.execute("PRAGMA synchronous=NORMAL;")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS tts_audio (
+                    phrase_key TEXT PRIMARY KEY,
+                    file_name TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_used REAL NOT NULL
+                )
+                """)
+            self._conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_tts_audio_last_used
+                ON tts_audio (last_used)
+                """)
+            self._conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_tts_audio_file_name
+                ON tts_audio (file_name)
+                """)
+
+    @staticmethod
+    def phrase_key(text: str, voice_id: str) -> str:
+        return hashlib.sha256(f"{voice_id}\n{text}".encode("utf-8")).hexdigest()
+
+    def get(self, text: str, voice_id: str) -> str | None:
+        """Returns the local URL of the phrase's audio, if it is stored."""
+        key = self.phrase_key(text, voice_id)
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT file_name FROM tts_audio WHERE phrase_key = ?", (key,)
+            ).fetchone()
+            if row is None or not os.path.isfile(os.path.join(self.audio_dir, row[0])):
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE tts_audio SET last_used = ? WHERE phrase_key = ?",
+                (time.time(), key),
+            )
+            self.hits += 1
+        return f"{self.url_prefix}/{row[0]}"
+
+    def touch(self, urls: list[str]) -> bool:
+        """
+        Marks the stored audio behind `urls` as just played, so eviction
+        spares files that cached answers still point to. Returns False if
+        any of them is no longer stored. URLs outside the store are ignored.
+        """
+        prefix = f"{self.url_prefix}/"
+        file_names = [url[len(prefix) :] for url in urls if url.startswith(prefix)]
+        with self._lock, self._conn:
+            for file_name in file_names:
+                if not os.path.isfile(os.path.join(self.audio_dir, file_name)):
+                    return False
+            self._conn.executemany(
+                "UPDATE tts_audio SET last_used = ? WHERE file_name = ?",
+                [(time.time(), file_name) for file_name in file_names],
+            )
+        return True
+
+    def store_from_url(self, text: str, voice_id: str, remote_url: str) -> str:
+        """Downloads the provider's audio into the store and returns its local URL."""
+        extension = os.path.splitext(urlparse(remote_url).path)[1].lower() or ".mp3"
+        digest = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=self.audio_dir, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as temp_file:
+                with self._http.stream("GET", remote_url) as response:
+                    response.raise_for_status()
+                    for block in response.iter_bytes():
+                        temp_file.write(block)
+                        digest.update(block)
+            file_name = f"{digest.hexdigest()}{extension}"
+            size = os.path.getsize(temp_path)
+            os.replace(temp_path, os.path.join(self.audio_dir, file_name))
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return self._index(text, voice_id, file_name, size)
+
+    def store_bytes(self, text: str, voice_id: str, audio: bytes, extension: str) -> str:
+        """Stores locally synthesized audio and returns its local URL."""
+        file_name = f"{hashlib.sha256(audio).hexdigest()}{extension}"
+        fd, temp_path = tempfile.mkstemp(dir=self.audio_dir, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as temp_file:
+                temp_file.write(audio)
+            os.replace(temp_path, os.path.join(self.audio_dir, file_name))
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return self._index(text, voice_id, file_name, len(audio))
+
+    def _index(self, text: str, voice_id: str, file_name: str, size: int) -> str:
+        key = self.phrase_key(text, voice_id)
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO tts_audio (phrase_key, file_name, size, last_used)
+                VALUES (?, ?, ?, ?)
+                """,
+                (key, file_name, size, time.time()),
+            )
+            self._evict(keep_file=file_name)
+        return f"{self.url_prefix}/{file_name}"
+
+    def _evict(self, keep_file: str) -> None:
+        # Sizes are summed per distinct file, as phrases can share audio.
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT file_name, size FROM tts_audio)"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # The file just stored is never evicted; its URL is about to be served.
+        rows = self._conn.execute(
+            "SELECT phrase_key, file_name, size FROM tts_audio "
+            "WHERE file_name != ? ORDER BY last_used",
+            (keep_file,),
+        ).fetchall()
+        for phrase_key, file_name, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM tts_audio WHERE phrase_key = ?", (phrase_key,))
+            self.evictions += 1
+            still_used = self._conn.execute(
+                "SELECT 1 FROM tts_audio WHERE file_name = ? LIMIT 1", (file_name,)
+            ).fetchone()
+            if still_used is None:
+                total -= size
+                try:
+                    os.remove(os.path.join(self.audio_dir, file_name))
+                except FileNotFoundError:
+                    pass
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            files, stored_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) "
+                "FROM (SELECT DISTINCT file_name, size FROM tts_audio)"
+            ).fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "files": files,
+                "bytes": stored_bytes,
+                "evictions": self.evictions,
+            }
+
+    def close(self) -> None:
+        if self._owns_http:
+            self._http.close()
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,254 @@
+import logging
+import os
+import threading
+import time
+from multiprocessing.connection import AuthenticationError, Client, Connection, Listener
+from typing import Any
+
+from services.ingestion_service import IngestionJobQueue
+from services.metrics_service import timed
+from services.persistence_service import SHARED_NAMESPACE
+from services.vector_service import VectorService
+
+logger = logging.getLogger(__name__)
+
+# VectorService methods the shared process serves to API workers.
+VECTOR_METHODS = frozenset(
+    {
+        "warm_up",
+        "shard_name",
+        "upsert_chunks",
+        "embed_query",
+        "query",
+        "delete_chunks",
+        "delete_by_doc_id",
+        "shard_stats",
+    }
+)
+# Safe to resend after a dropped connection; submitting a job is not.
+IDEMPOTENT_METHODS = VECTOR_METHODS | {"query_embedder_stats", "get_job"}
+
+
+class RemoteVectorError(RuntimeError):
+    pass
+
+
+class VectorServer:
+    """
+    Owns the embedding model, the Chroma store and the ingestion job queue
+    on behalf of every API worker, so the model is loaded once and Chroma
+    has a single writer. Workers connect over a Unix socket; each
+    connection is served by its own thread, and calls are (method, args,
+    kwargs) tuples answered with ("ok", result) or ("error", type, message).
+    """
+
+    def __init__(
+        self,
+        address: str,
+        vector_service: VectorService,
+        job_queue: IngestionJobQueue,
+        authkey: bytes | None = None,
+    ):
+        self.address = address
+        self.vector_service = vector_service
+        self.job_queue = job_queue
+        self.authkey = authkey
+
+    def serve_forever(self) -> None:
+        if os.path.exists(self.address):
+            os.remove(self.address)
+        os.makedirs(os.path.dirname(os.path.abspath(self.address)), exist_ok=True)
+        with Listener(self.address, family="AF_UNIX", authkey=self.authkey) as listener:
+            os.chmod(self.address, 0o600)
+            logger.info(f"Vector server listening on {self.address}")
+            while True:
+                try:
+                    conn = listener.accept()
+                except AuthenticationError:
+                    logger.warning("Rejected a vector server connection with a bad auth key.")
+                    continue
+                threading.Thread(
+                    target=self._serve_connection, args=(conn,), daemon=True
+                ).start()
+
+    def _serve_connection(self, conn: Connection) -> None:
+        with conn:
+            while True:
+                try:
+                    method, args, kwargs = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    reply = ("ok", self._dispatch(method, args, kwargs))
+                except Exception as e:
+                    reply = ("error", type(e).__name__, str(e))
+                try:
+                    conn.send(reply)
+                except (EOFError, OSError):
+                    return
+
+    def _dispatch(self, method: str, args: tuple, kwargs: dict) -> Any:
+        if method in VECTOR_METHODS:
+            return getattr(self.vector_service, method)(*args, **kwargs)
+        if method == "query_embedder_stats":
+            return self.vector_service.query_embedder.stats()
+        if method == "submit_job":
+            return self.job_queue.submit(*args, **kwargs).to_dict()
+        if method == "get_job":
+            job = self.job_queue.get(*args, **kwargs)
+            return job.to_dict() if job is not None else None
+        raise ValueError(f"Unknown vector server method: {method}")
+
+
+class VectorServiceClient:
+    """One connection per calling thread, as a Connection is not thread-safe."""
+
+    def __init__(self, address: str, authkey: bytes | None = None):
+        self.address = address
+        self.authkey = authkey
+        self._local = threading.local()
+
+    def _connection(self) -> Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = Client(self.address, family="AF_UNIX", authkey=self.authkey)
+            self._local.conn = conn
+        return conn
+
+    def _drop_connection(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            try:
+                conn.close()
+            except OSError:
+                pass
+
+    def call(self, method: str, *args: Any, **kwargs: Any) -> Any:
+        attempts = 2 if method in IDEMPOTENT_METHODS else 1
+        for attempt in range(attempts):
+            try:
+                conn = self._connection()
+                conn.send((method, args, kwargs))
+                reply = conn.recv()
+                break
+            except (EOFError, OSError):
+                self._drop_connection()
+                if attempt + 1 == attempts:
+                    raise
+        if reply[0] == "error":
+            raise RemoteVectorError(f"{reply[1]}: {reply[2]}")
+        return reply[1]
+
+    def wait_ready(self, timeout: float) -> None:
+        """Blocks until the server accepts connections (it listens once its model is loaded)."""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                self._connection()
+                return
+            except (FileNotFoundError, ConnectionRefusedError):
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"Vector server at {self.address} did not come up.")
+                time.sleep(0.25)
+
+
+class _RemoteQueryEmbedder:
+    def __init__(self, client: VectorServiceClient):
+        self._client = client
+
+    def stats(self) -> dict[str, float]:
+        return self._client.call("query_embedder_stats")
+
+
+class RemoteVectorService:
+    """VectorService stand-in for API workers; every call runs in the shared process."""
+
+    def __init__(self, client: VectorServiceClient, connect_timeout: float = 300.0):
+        self._client = client
+        self.connect_timeout = connect_timeout
+        self.query_embedder = _RemoteQueryEmbedder(client)
+
+    def warm_up(self) -> None:
+        self._client.wait_ready(self.connect_timeout)
+        self._client.call("warm_up")
+
+    def shard_name(self, namespace: str) -> str:
+        return self._client.call("shard_name", namespace)
+
+    @timed("vector", "upsert_chunks")
+    def upsert_chunks(
+        self,
+        ids: list[str],
+        chunks: list[str],
+        metadatas: list[dict],
+        namespace: str = SHARED_NAMESPACE,
+    ) -> None:
+        self._client.call("upsert_chunks", ids, chunks, metadatas, namespace=namespace)
+
+    @timed("vector", "embed_query")
+    def embed_query(self, query_text: str) -> list[float]:
+        return self._client.call("embed_query", query_text)
+
+    @timed("vector", "query")
+    def query(
+        self, query_text: str, top_k: int = 4, namespaces: list[str] | None = None
+    ) -> list[dict[str, Any]]:
+        return self._client.call("query", query_text, top_k=top_k, namespaces=namespaces)
+
+    @timed("vector", "delete_chunks")
+    def delete_chunks(self, ids: list[str], namespace: str = SHARED_NAMESPACE) -> None:
+        self._client.call("delete_chunks", ids, namespace=namespace)
+
+    @timed("vector", "delete_by_doc_id")
+    def delete_by_doc_id(self, doc_id: str, namespace: str = SHARED_NAMESPACE) -> None:
+        self._client.call("delete_by_doc_id", doc_id, namespace=namespace)
+
+    def shard_stats(self) -> dict[str, int]:
+        return self._client.call("shard_stats")
+
+
+class _RemoteJob:
+    def __init__(self, data: dict[str, Any]):
+        self._data = data
+
+    def to_dict(self) -> dict[str, Any]:
+        return dict(self._data)
+
+
+class RemoteIngestionJobQueue:
+    """
+    IngestionJobQueue stand-in for API workers. Jobs run in the shared
+    process, so any worker can report on a job another worker accepted;
+    spooled uploads are read from the same local disk.
+    """
+
+    def __init__(self, client: VectorServiceClient):
+        self._client = client
+
+    def submit(
+        self,
+        filename: str,
+        content_type: str | None,
+        spool_path: str,
+        size: int,
+        content_hash: str | None = None,
+        namespace: str = SHARED_NAMESPACE,
+        replace_doc_id: str | None = None,
+    ) -> _RemoteJob:
+        return _RemoteJob(
+            self._client.call(
+                "submit_job",
+                filename,
+                content_type,
+                spool_path,
+                size,
+                content_hash=content_hash,
+                namespace=namespace,
+                replace_doc_id=replace_doc_id,
+            )
+        )
+
+    def get(self, job_id: str) -> _RemoteJob | None:
+        data = self._client.call("get_job", job_id)
+        return _RemoteJob(data) if data is not None else None
@@ -1,66 +1,548 @@
+import hashlib
+import json
 import os
-from typing import Any
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable
 
-import chromadb
+from services.embedding_cache import EmbeddingCache, text_hash
+from services.lazy_imports import missing_modules
+from services.metrics_service import timed
+from services.persistence_service import SHARED_NAMESPACE
 
 
-class _SentenceTransformerEmbeddingFunction:
-    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
+# Modules each backend imports when it loads; the onnx ones are optional
+# installs (requirements-optional.txt).
+EMBEDDING_BACKEND_MODULES = {
+    "torch": ("sentence_transformers", "torch"),
+    "torch-int8": ("sentence_transformers", "torch"),
+    "onnx": ("onnxruntime", "tokenizers", "huggingface_hub"),
+    "onnx-int8": ("onnxruntime", "onnx", "tokenizers", "huggingface_hub"),
+}
+EMBEDDING_BACKENDS = tuple(EMBEDDING_BACKEND_MODULES)
+
+
+class EmbeddingBackend:
+    """Encodes a batch of texts into L2-normalized vectors."""
+
+    name = "base"
+
+    def __call__(self, input: list[str]) -> list[list[float]]:
+        raise NotImplementedError
+
+
+def _snapshot_path(snapshot_dir: str | None, model_name: str, suffix: str = "") -> str | None:
+    if not snapshot_dir:
+        return None
+    return os.path.join(snapshot_dir, model_name.replace("/", "__") + suffix)
+
+
+class _SentenceTransformerEmbeddingFunction(EmbeddingBackend):
+    name = "torch"
+
+    def __init__(
+        self,
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        snapshot_dir: str | None = None,
+        threads: int | None = None,
+        quantize: bool = False,
+    ):
         from sentence_transformers import SentenceTransformer
 
-        self._model = SentenceTransformer(model_name)
+        if threads:
+            import torch
+
+            torch.set_num_threads(threads)
+
+        # A saved snapshot loads straight from disk, skipping hub resolution
+        # and downloads on cold start. The first start writes it.
+        snapshot_path = _snapshot_path(snapshot_dir, model_name)
+        if snapshot_path and os.path.isfile(os.path.join(snapshot_path, "modules.json")):
+            self._model = SentenceTransformer(snapshot_path)
+        else:
+            self._model = SentenceTransformer(model_name)
+            if snapshot_path:
+                self._model.save(snapshot_path)
+
+        if quantize:
+            import torch
+
+            self.name = "torch-int8"
+            self._model = torch.quantization.quantize_dynamic(
+                self._model, {torch.nn.Linear}, dtype=torch.qint8
+            )
 
     def __call__(self, input: list[str]) -> list[list[float]]:
         embeddings = self._model.encode(input, normalize_embeddings=True)
         return embeddings.tolist()
 
 
+class _OnnxEmbeddingFunction(EmbeddingBackend):
+    """
+    Runs the model's ONNX export with onnxruntime and the fast tokenizer,
+    reproducing the sentence-transformers pooling and normalization. Needs
+    no torch; the int8 variant quantizes the export once (requires `onnx`).
+    """
+
+    name = "onnx"
+
+    def __init__(
+        self,
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        snapshot_dir: str | None = None,
+        threads: int | None = None,
+        quantize: bool = False,
+    ):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_dir = self._resolve_model_dir(model_name, snapshot_dir)
+        model_path = os.path.join(model_dir, "onnx", "model.onnx")
+        if quantize:
+            self.name = "onnx-int8"
+            model_path = self._quantized_model_path(model_path)
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        self._session = ort.InferenceSession(
+            model_path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {node.name for node in self._session.get_inputs()}
+        output_names = [node.name for node in self._session.get_outputs()]
+        self._output_index = (
+            output_names.index("last_hidden_state")
+            if "last_hidden_state" in output_names
+            else 0
+        )
+
+        self._tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self._tokenizer.enable_truncation(max_length=self._read_max_length(model_dir))
+        padding = self._tokenizer.padding or {}
+        self._tokenizer.enable_padding(
+            pad_id=padding.get("pad_id", 0), pad_token=padding.get("pad_token", "[PAD]")
+        )
+        self._cls_pooling = self._read_cls_pooling(model_dir)
+
+    @staticmethod
+    def _resolve_model_dir(model_name: str, snapshot_dir: str | None) -> str:
+        if os.path.isdir(model_name):
+            return model_name
+        local_dir = _snapshot_path(snapshot_dir, model_name, "__onnx")
+        if local_dir and os.path.isfile(os.path.join(local_dir, "onnx", "model.onnx")):
+            return local_dir
+
+        from huggingface_hub import snapshot_download
+
+        model_dir = snapshot_download(
+            model_name,
+            allow_patterns=[
+                "onnx/model.onnx",
+                "tokenizer.json",
+                "sentence_bert_config.json",
+                "1_Pooling/config.json",
+            ],
+            local_dir=local_dir,
+        )
+        if not os.path.isfile(os.path.join(model_dir, "onnx", "model.onnx")):
+            raise ValueError(f"{model_name} does not publish an ONNX export (onnx/model.onnx).")
+        return model_dir
+
+    @staticmethod
+    def _quantized_model_path(model_path: str) -> str:
+        quantized_path = model_path.replace(".onnx", "_qint8.onnx")
+        if not os.path.isfile(quantized_path):
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            quantize_dynamic(model_path, quantized_path, weight_type=QuantType.QInt8)
+        return quantized_path
+
+    @staticmethod
+    def _read_max_length(model_dir: str) -> int:
+        config_path = os.path.join(model_dir, "sentence_bert_config.json")
+        if os.path.isfile(config_path):
+            with open(config_path, encoding="utf-8") as config_file:
+                return int(json.load(config_file).get("max_seq_length", 256))
+        return 256
+
+    @staticmethod
+    def _read_cls_pooling(model_dir: str) -> bool:
+        config_path = os.path.join(model_dir, "1_Pooling", "config.json")
+        if os.path.isfile(config_path):
+            with open(config_path, encoding="utf-8") as config_file:
+                return bool(json.load(config_file).get("pooling_mode_cls_token", False))
+        return False
+
+    def __call__(self, input: list[str]) -> list[list[float]]:
+        import numpy as np
+
+        if not input:
+            return []
+        encodings = self._tokenizer.encode_batch(input)
+        mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+        feeds = {
+            "input_ids": np.array([encoding.ids for encoding in encodings], dtype=np.int64),
+            "attention_mask": mask,
+            "token_type_ids": np.array(
+                [encoding.type_ids for encoding in encodings], dtype=np.int64
+            ),
+        }
+        hidden = self._session.run(
+            None, {name: value for name, value in feeds.items() if name in self._input_names}
+        )[self._output_index]
+
+        if self._cls_pooling:
+            pooled = hidden[:, 0]
+        else:
+            weights = mask[..., None].astype(hidden.dtype)
+            pooled = (hidden * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+        pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.tolist()
+
+
+def create_embedding_backend(
+    backend: str = "torch",
+    model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+    snapshot_dir: str | None = None,
+    threads: int | None = None,
+) -> EmbeddingBackend:
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(
+            f"Unknown embedding backend '{backend}'. Expected one of {EMBEDDING_BACKENDS}."
+        )
+    missing = missing_modules(EMBEDDING_BACKEND_MODULES[backend])
+    if missing:
+        raise ImportError(
+            f"Embedding backend '{backend}' needs {', '.join(missing)} installed "
+            "(see requirements-optional.txt)."
+        )
+    if backend.startswith("onnx"):
+        backend_class = _OnnxEmbeddingFunction
+    else:
+        backend_class = _SentenceTransformerEmbeddingFunction
+    return backend_class(
+        model_name,
+        snapshot_dir=snapshot_dir,
+        threads=threads,
+        quantize=backend.endswith("-int8"),
+    )
+
+
+class _CachedEmbeddingFunction:
+    """Serves repeated texts from the embedding cache and only encodes misses."""
+
+    def __init__(self, inner, cache: EmbeddingCache, model_name: str):
+        self._inner = inner
+        self._cache = cache
+        self._model_name = model_name
+
+    def __call__(self, input: list[str]) -> list[list[float]]:
+        hashes = [text_hash(text) for text in input]
+        found = self._cache.get_many(self._model_name, hashes)
+
+        missing = {digest: text for digest, text in zip(hashes, input) if digest not in found}
+        if missing:
+            computed = self._inner(list(missing.values()))
+            new_vectors = dict(zip(missing.keys(), computed))
+            self._cache.put_many(self._model_name, new_vectors)
+            found.update(new_vectors)
+
+        return [found[digest] for digest in hashes]
+
+
+class MicroBatchEmbedder:
+    """
+    Embeds single query strings from many threads by collecting concurrent
+    requests for up to `max_wait_ms` and encoding them in one batched call.
+    Results are kept in an LRU keyed by normalized query text, and identical
+    in-flight queries share one encoding.
+    """
+
+    def __init__(
+        self,
+        encode_fn: Callable[[list[str]], list[list[float]]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        cache_size: int = 2048,
+    ):
+        self._encode_fn = encode_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.cache_size = cache_size
+        self._cache: OrderedDict[str, list[float]] = OrderedDict()
+        self._in_flight: dict[str, Future] = {}
+        self._queue: list[str] = []
+        self._cond = threading.Condition()
+        self._worker: threading.Thread | None = None
+        self.hits = 0
+        self.misses = 0
+        self.batches = 0
+        self.batched_queries = 0
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return " ".join(text.lower().split())
+
+    def embed(self, text: str) -> list[float]:
+        key = self.normalize(text)
+        with self._cond:
+            vector = self._cache.get(key)
+            if vector is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return vector
+            self.misses += 1
+            future = self._in_flight.get(key)
+            if future is None:
+                future = Future()
+                self._in_flight[key] = future
+                self._queue.append(key)
+                self._ensure_worker()
+                self._cond.notify()
+        return future.result()
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None:
+            self._worker = threading.Thread(
+                target=self._run, name="query-embedder", daemon=True
+            )
+            self._worker.start()
+
+    def _next_batch(self) -> list[str]:
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+            deadline = time.monotonic() + self.max_wait_ms / 1000
+            while len(self._queue) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(timeout=remaining)
+            batch = self._queue[: self.max_batch_size]
+            del self._queue[: self.max_batch_size]
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            try:
+                vectors = list(self._encode_fn(batch))
+                if len(vectors) != len(batch):
+                    # zip() would leave the unmatched callers waiting forever.
+                    raise RuntimeError(
+                        f"Embedding model returned {len(vectors)} vectors "
+                        f"for {len(batch)} queries."
+                    )
+            except Exception as e:
+                with self._cond:
+                    futures = [self._in_flight.pop(key) for key in batch]
+                for future in futures:
+                    future.set_exception(e)
+                continue
+
+            with self._cond:
+                self.batches += 1
+                self.batched_queries += len(batch)
+                futures = []
+                for key, vector in zip(batch, vectors):
+                    self._cache[key] = vector
+                    futures.append((self._in_flight.pop(key), vector))
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            for future, vector in futures:
+                future.set_result(vector)
+
+    def stats(self) -> dict[str, float]:
+        with self._cond:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "batches": self.batches,
+                "avg_batch_size": (
+                    self.batched_queries / self.batches if self.batches else 0.0
+                ),
+            }
+
+
 class VectorService:
+    """
+    Chroma-backed chunk index sharded by namespace: the shared namespace
+    lives in `collection_name` and every other namespace in its own
+    collection, created on first upsert. Queries only touch the requested
+    shards, so their cost does not grow with other namespaces' corpora.
+    Open collection handles are kept in an LRU of `max_open_shards`; with a
+    `shard_memory_limit_bytes`, Chroma also unloads the least recently used
+    HNSW indexes from memory once the limit is reached.
+    """
+
     def __init__(
         self,
         persist_dir: str = "data/chroma",
         collection_name: str = "rag_chunks",
         embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2",
+        embedding_cache: EmbeddingCache | None = None,
+        query_batch_size: int = 32,
+        query_batch_wait_ms: float = 5.0,
+        query_cache_size: int = 2048,
+        snapshot_dir: str | None = None,
+        embedding_backend: str = "torch",
+        embedding_threads: int | None = None,
+        max_open_shards: int = 64,
+        shard_memory_limit_bytes: int = 0,
     ):
+        import chromadb
+        from chromadb.config import Settings
+
         os.makedirs(persist_dir, exist_ok=True)
-        client = chromadb.PersistentClient(path=persist_dir)
+        settings = Settings()
+        if shard_memory_limit_bytes > 0:
+            settings = Settings(
+                chroma_segment_cache_policy="LRU",
+                chroma_memory_limit_bytes=shard_memory_limit_bytes,
+            )
+        self._client = chromadb.PersistentClient(path=persist_dir, settings=settings)
+        self.collection_name = collection_name
+        self.max_open_shards = max_open_shards
+        self._shards: OrderedDict[str, Any] = OrderedDict()
+        self._shards_lock = threading.Lock()
 
-        embedding_function = _SentenceTransformerEmbeddingFunction(
-            model_name=embedding_model
+        embedding_function = create_embedding_backend(
+            embedding_backend,
+            model_name=embedding_model,
+            snapshot_dir=snapshot_dir,
+            threads=embedding_threads,
         )
-        self.collection = client.get_or_create_collection(
-            name=collection_name,
-            embedding_function=embedding_function,
-            metadata={"hnsw:space": "cosine"},
+        self._encoder = embedding_function
+        self.query_embedder = MicroBatchEmbedder(
+            embedding_function,
+            max_batch_size=query_batch_size,
+            max_wait_ms=query_batch_wait_ms,
+            cache_size=query_cache_size,
         )
+        if embedding_cache is not None:
+            # Backends agree only approximately, so each caches its own vectors.
+            cache_key = (
+                embedding_model
+                if embedding_backend == "torch"
+                else f"{embedding_model}@{embedding_backend}"
+            )
+            embedding_function = _CachedEmbeddingFunction(
+                embedding_function, embedding_cache, cache_key
+            )
+        self._embedding_function = embedding_function
+        self._shard(SHARED_NAMESPACE, create=True)
+
+    def shard_name(self, namespace: str) -> str:
+        if namespace == SHARED_NAMESPACE:
+            return self.collection_name
+        # Chroma names allow only [a-zA-Z0-9._-] and 63 characters.
+        digest = hashlib.sha256(namespace.encode("utf-8")).hexdigest()[:24]
+        return f"{self.collection_name}-ns-{digest}"
+
+    def _shard(self, namespace: str, create: bool = False):
+        """Returns the namespace's collection, or None if it has never been written."""
+        with self._shards_lock:
+            collection = self._shards.get(namespace)
+            if collection is not None:
+                self._shards.move_to_end(namespace)
+                return collection
+
+        from chromadb.errors import InvalidCollectionException
+
+        name = self.shard_name(namespace)
+        if create:
+            collection = self._client.get_or_create_collection(
+                name=name,
+                embedding_function=self._embedding_function,
+                metadata={"hnsw:space": "cosine"},
+            )
+        else:
+            try:
+                collection = self._client.get_collection(
+                    name=name, embedding_function=self._embedding_function
+                )
+            except InvalidCollectionException:
+                return None
 
+        with self._shards_lock:
+            self._shards[namespace] = collection
+            self._shards.move_to_end(namespace)
+            while len(self._shards) > self.max_open_shards:
+                self._shards.popitem(last=False)
+        return collection
+
+    def warm_up(self) -> None:
+        """Runs one forward pass so the first real query skips lazy kernel setup."""
+        self._encoder(["warm up"])
+
+    @timed("vector", "upsert_chunks")
     def upsert_chunks(
         self,
         ids: list[str],
         chunks: list[str],
         metadatas: list[dict[str, Any]],
+        namespace: str = SHARED_NAMESPACE,
     ) -> None:
-        self.collection.upsert(ids=ids, documents=chunks, metadatas=metadatas)
-
-    def query(self, query_text: str, top_k: int = 4) -> list[dict[str, Any]]:
-        result = self.collection.query(query_texts=[query_text], n_results=top_k)
+        self._shard(namespace, create=True).upsert(
+            ids=ids, documents=chunks, metadatas=metadatas
+        )
 
-        ids = result.get("ids", [[]])[0]
-        docs = result.get("documents", [[]])[0]
-        metas = result.get("metadatas", [[]])[0]
-        distances = result.get("distances", [[]])[0]
+    @timed("vector", "embed_query")
+    def embed_query(self, query_text: str) -> list[float]:
+        return self.query_embedder.embed(query_text)
 
+    @timed("vector", "query")
+    def query(
+        self,
+        query_text: str,
+        top_k: int = 4,
+        namespaces: list[str] | None = None,
+    ) -> list[dict[str, Any]]:
+        """Searches each namespace's shard and merges the hits by distance."""
+        query_embedding = self.embed_query(query_text)
         rows: list[dict[str, Any]] = []
-        for idx, chunk_id in enumerate(ids):
-            rows.append(
-                {
-                    "id": chunk_id,
-                    "content": docs[idx] if idx < len(docs) else "",
-                    "metadata": metas[idx] if idx < len(metas) else {},
-                    "distance": distances[idx] if idx < len(distances) else None,
-                }
-            )
-        return rows
+        for namespace in dict.fromkeys(namespaces or [SHARED_NAMESPACE]):
+            collection = self._shard(namespace)
+            if collection is None:
+                continue
+            result = collection.query(query_embeddings=[query_embedding], n_results=top_k)
+
+            ids = result.get("ids", [[]])[0]
+            docs = result.get("documents", [[]])[0]
+            metas = result.get("metadatas", [[]])[0]
+            distances = result.get("distances", [[]])[0]
+
+            for idx, chunk_id in enumerate(ids):
+                rows.append(
+                    {
+                        "id": chunk_id,
+                        "content": docs[idx] if idx < len(docs) else "",
+                        "metadata": metas[idx] if idx < len(metas) else {},
+                        "distance": distances[idx] if idx < len(distances) else None,
+                    }
+                )
+        rows.sort(
+            key=lambda row: row["distance"] if row["distance"] is not None else float("inf")
+        )
+        return rows[:top_k]
+
+    @timed("vector", "delete_chunks")
+    def delete_chunks(self, ids: list[str], namespace: str = SHARED_NAMESPACE) -> None:
+        collection = self._shard(namespace)
+        if ids and collection is not None:
+            collection.delete(ids=ids)
+
+    @timed("vector", "delete_by_doc_id")
+    def delete_by_doc_id(self, doc_id: str, namespace: str = SHARED_NAMESPACE) -> None:
+        collection = self._shard(namespace)
+        if collection is not None:
+            collection.delete(where={"doc_id": doc_id})
 
-    def delete_by_doc_id(self, doc_id: str) -> None:
-        self.collection.delete(where={"doc_id": doc_id})
+    def shard_stats(self) -> dict[str, int]:
+        with self._shards_lock:
+            return {"open_shards": len(self._shards), "max_open_shards": self.max_open_shards}
@@ -16,6 +16,23 @@ document.addEventListener("DOMContentLoaded", () => {
   let isRecording = false;
   let isProcessing = false;
 
+  // Streaming playback state
+  let audioQueue = [];
+  let isPlayingSegment = false;
+  let streamFinished = true;
+  let playedAnySegment = false;
+
+  // Real-time (WebSocket) mode state
+  const REALTIME_SAMPLE_RATE = 16000;
+  let useRealtime = "WebSocket" in window && "AudioContext" in window;
+  let socket = null;
+  let audioContext = null;
+  let micStream = null;
+  let sourceNode = null;
+  let processorNode = null;
+  let endUtteranceTimer = null;
+  const END_UTTERANCE_TIMEOUT_MS = 30000;
+
   // Initialize session
   function initializeSession() {
     const params = new URLSearchParams(window.location.search);
@@ -94,6 +111,21 @@ document.addEventListener("DOMContentLoaded", () => {
     });
   }
 
+  const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+  // Polls an ingestion job until it completes or fails
+  async function waitForIngestion(job, label) {
+    while (job.status === "queued" || job.status === "running") {
+      const percent = Math.round((job.progress || 0) * 100);
+      uploadStatus.textContent = `${label}: indexing ${job.filename} (${percent}%)...`;
+      await sleep(1000);
+      const response = await fetch(`/documents/jobs/${job.job_id}`);
+      job = await response.json();
+      if (!response.ok) throw new Error(job.detail || "Job lookup failed.");
+    }
+    return job;
+  }
+
   async function uploadDocument() {
     if (!uploadInput.files || uploadInput.files.length === 0) {
       uploadStatus.textContent = "Select a .txt or .md file first.";
@@ -101,27 +133,49 @@ document.addEventListener("DOMContentLoaded", () => {
       return;
     }
 
-    const file = uploadInput.files[0];
+    const files = Array.from(uploadInput.files);
     const formData = new FormData();
-    formData.append("file", file);
+    const bulk = files.length > 1;
+    files.forEach((file) => formData.append(bulk ? "files" : "file", file));
 
     uploadButton.disabled = true;
-    uploadStatus.textContent = "Uploading and indexing...";
+    uploadStatus.textContent = "Uploading...";
 
     try {
-      const response = await fetch("/documents/upload", {
-        method: "POST",
-        body: formData,
-      });
+      const response = await fetch(
+        bulk ? "/documents/upload/bulk" : "/documents/upload",
+        { method: "POST", body: formData },
+      );
       const result = await response.json();
 
       if (!response.ok) {
         uploadStatus.textContent = result.detail || "Upload failed.";
         alert(uploadStatus.textContent);
-      } else {
-        uploadStatus.textContent = `Indexed ${result.filename} with ${result.chunks_created} chunks.`;
-        uploadInput.value = "";
+        return;
+      }
+
+      const jobs = bulk ? result.jobs : [result];
+      const summaries = [];
+      for (const [idx, job] of jobs.entries()) {
+        const label = `File ${idx + 1}/${jobs.length}`;
+        const finished = job.job_id ? await waitForIngestion(job, label) : job;
+        if (finished.status !== "completed") {
+          summaries.push(`${finished.filename} failed: ${finished.error}`);
+        } else if (finished.mode === "duplicate") {
+          summaries.push(`${finished.filename} is already indexed.`);
+        } else if (finished.mode === "updated") {
+          const changed = finished.chunks_done - finished.chunks_reused;
+          summaries.push(
+            `Updated ${finished.filename}: ${changed} of ${finished.chunks_done} chunks changed.`,
+          );
+        } else {
+          summaries.push(
+            `Indexed ${finished.filename} with ${finished.chunks_done} chunks.`,
+          );
+        }
       }
+      uploadStatus.textContent = summaries.join(" ");
+      uploadInput.value = "";
     } catch (error) {
       console.error("Upload error:", error);
       uploadStatus.textContent = "Upload failed due to network/server error.";
@@ -135,6 +189,21 @@ document.addEventListener("DOMContentLoaded", () => {
   async function handleVoiceInteraction() {
     if (isProcessing) return; // Don't do anything if processing
 
+    if (useRealtime) {
+      try {
+        await handleRealtimeInteraction();
+        return;
+      } catch (error) {
+        console.warn("Real-time mode unavailable, using upload mode:", error);
+        useRealtime = false;
+        stopStreamingCapture();
+      }
+    }
+    await handleRecorderInteraction();
+  }
+
+  // Record-then-upload interaction (HTTP fallback)
+  async function handleRecorderInteraction() {
     if (!isRecording) {
       // Start recording
       try {
@@ -169,40 +238,256 @@ document.addEventListener("DOMContentLoaded", () => {
     }
   }
 
+  // Real-time interaction: stream PCM frames over a WebSocket
+  function openSocket() {
+    if (socket && socket.readyState === WebSocket.OPEN) {
+      return Promise.resolve(socket);
+    }
+
+    return new Promise((resolve, reject) => {
+      const protocol = window.location.protocol === "https:" ? "wss" : "ws";
+      const ws = new WebSocket(
+        `${protocol}://${window.location.host}/ws/agent/${sessionId}`,
+      );
+      ws.binaryType = "arraybuffer";
+      ws.onopen = () => {
+        socket = ws;
+        resolve(ws);
+      };
+      ws.onerror = () => reject(new Error("WebSocket connection failed"));
+      ws.onclose = () => {
+        if (socket === ws) socket = null;
+        if (isRecording) {
+          stopStreamingCapture();
+          updateUIState("error", "Connection lost. Please try again.");
+          setTimeout(() => updateUIState("ready"), 3000);
+        }
+      };
+      ws.onmessage = (event) => handleSocketMessage(JSON.parse(event.data));
+    });
+  }
+
+  function handleSocketMessage(message) {
+    const { type, ...data } = message;
+    if (type === "partial") {
+      if (isRecording) statusDiv.textContent = `Listening... "${data.text}"`;
+      return;
+    }
+    clearTimeout(endUtteranceTimer);
+    if (type === "empty") {
+      // Nothing was recognized; only matters once capture has stopped
+      if (!isRecording) {
+        isProcessing = false;
+        updateUIState("ready", "No speech detected. Click to speak");
+      }
+      return;
+    }
+    if (type === "transcript") {
+      // End of utterance detected server-side: stop capturing while we respond
+      stopStreamingCapture();
+      resetAudioQueue();
+    }
+    handleStreamEvent(type, data);
+    if (type === "done" || type === "error") finishStream();
+  }
+
+  function downsampleToInt16(samples, inputRate) {
+    const ratio = inputRate / REALTIME_SAMPLE_RATE;
+    const length = Math.floor(samples.length / ratio);
+    const output = new Int16Array(length);
+    for (let i = 0; i < length; i++) {
+      const sample = Math.max(-1, Math.min(1, samples[Math.floor(i * ratio)]));
+      output[i] = sample < 0 ? sample * 0x8000 : sample * 0x7fff;
+    }
+    return output;
+  }
+
+  async function startStreamingCapture() {
+    micStream = await navigator.mediaDevices.getUserMedia({ audio: true });
+    audioContext = new AudioContext({ sampleRate: REALTIME_SAMPLE_RATE });
+    sourceNode = audioContext.createMediaStreamSource(micStream);
+    processorNode = audioContext.createScriptProcessor(4096, 1, 1);
+    processorNode.onaudioprocess = (event) => {
+      if (!isRecording || !socket || socket.readyState !== WebSocket.OPEN) return;
+      const samples = event.inputBuffer.getChannelData(0);
+      socket.send(downsampleToInt16(samples, audioContext.sampleRate).buffer);
+    };
+    sourceNode.connect(processorNode);
+    processorNode.connect(audioContext.destination);
+  }
+
+  function stopStreamingCapture() {
+    isRecording = false;
+    if (processorNode) processorNode.disconnect();
+    if (sourceNode) sourceNode.disconnect();
+    if (audioContext) audioContext.close();
+    if (micStream) micStream.getTracks().forEach((track) => track.stop());
+    processorNode = sourceNode = audioContext = micStream = null;
+  }
+
+  async function handleRealtimeInteraction() {
+    if (!isRecording) {
+      if (!sessionId) initializeSession();
+      await openSocket();
+      await startStreamingCapture();
+      isRecording = true;
+      updateUIState("listening");
+    } else {
+      // Manual stop: ask the server to close the utterance now
+      socket.send(JSON.stringify({ type: "end_utterance" }));
+      stopStreamingCapture();
+      updateUIState("processing");
+      // The server always answers; recover anyway if the reply never comes
+      endUtteranceTimer = setTimeout(() => {
+        isProcessing = false;
+        updateUIState("ready");
+      }, END_UTTERANCE_TIMEOUT_MS);
+    }
+  }
+
+  // Playback queue for streamed audio segments
+  function resetAudioQueue() {
+    audioQueue = [];
+    isPlayingSegment = false;
+    streamFinished = false;
+    playedAnySegment = false;
+  }
+
+  function enqueueAudio(url) {
+    audioQueue.push(url);
+    if (!isPlayingSegment) playNextSegment();
+  }
+
+  function playNextSegment() {
+    if (audioQueue.length === 0) {
+      isPlayingSegment = false;
+      return false;
+    }
+    isPlayingSegment = true;
+    playedAnySegment = true;
+    responseAudio.src = audioQueue.shift();
+    return true;
+  }
+
+  function finishStream() {
+    streamFinished = true;
+    if (isPlayingSegment || audioQueue.length > 0) return;
+
+    if (playedAnySegment) {
+      // The last segment finished before the stream closed
+      completeTurn();
+    } else {
+      // If even fallback audio failed, just reset
+      isProcessing = false;
+      setTimeout(() => updateUIState("ready"), 3000);
+    }
+  }
+
+  function handleStreamEvent(event, data) {
+    if (event === "transcript") {
+      updateUIState("processing", `You said: "${data.text}"`);
+    } else if (event === "sources") {
+      renderSources(data.sources || []);
+    } else if (event === "audio") {
+      // Segments past the turn budget arrive text-only
+      if (data.audio_url) {
+        updateUIState("responding");
+        enqueueAudio(data.audio_url);
+      } else {
+        updateUIState("responding", data.text);
+      }
+    } else if (event === "done") {
+      if (!playedAnySegment && data.text) updateUIState("responding", data.text);
+    } else if (event === "error") {
+      updateUIState("responding", data.message);
+      if (data.audio_url) enqueueAudio(data.audio_url);
+    }
+  }
+
+  // Parses a server-sent event stream from a fetch response body
+  async function readEventStream(response) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      let boundary;
+      while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+        const rawEvent = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+
+        let event = "message";
+        let data = "";
+        rawEvent.split("\n").forEach((line) => {
+          if (line.startsWith("event:")) event = line.slice(6).trim();
+          else if (line.startsWith("data:")) data += line.slice(5).trim();
+        });
+        if (data) handleStreamEvent(event, JSON.parse(data));
+      }
+    }
+  }
+
+  // Handles a single JSON response (fallback endpoint or configuration errors)
+  function handleJsonResult(result) {
+    if (result.error) {
+      // Handle errors returned from the server (e.g., fallback audio)
+      updateUIState("responding", result.message);
+      if (result.audio_url) {
+        enqueueAudio(result.audio_url);
+        // Playback will trigger 'ended' event
+      }
+    } else if (result.audio_url) {
+      // Successful response
+      updateUIState("responding");
+      enqueueAudio(result.audio_url);
+      renderSources(result.sources || []);
+      // Playback will trigger 'ended' event
+    } else if (result.text) {
+      // Text-only answer (speech synthesis was unavailable or out of time)
+      updateUIState("responding", result.text);
+      renderSources(result.sources || []);
+    }
+  }
+
   // Process audio with AI
   async function processAudio(audioBlob) {
     if (!sessionId) initializeSession();
+    resetAudioQueue();
 
-    const formData = new FormData();
-    formData.append("audio", audioBlob, `recording-${Date.now()}.webm`);
+    const buildForm = () => {
+      const formData = new FormData();
+      formData.append("audio", audioBlob, `recording-${Date.now()}.webm`);
+      return formData;
+    };
 
     try {
-      const response = await fetch(`/agent/chat/${sessionId}`, {
+      let response = await fetch(`/agent/chat/${sessionId}/stream`, {
         method: "POST",
-        body: formData,
+        body: buildForm(),
       });
 
-      const result = await response.json();
+      if (!response.ok || !response.body) {
+        // Fall back to the single-response endpoint
+        response = await fetch(`/agent/chat/${sessionId}`, {
+          method: "POST",
+          body: buildForm(),
+        });
+      }
 
-      if (result.error) {
-        // Handle errors returned from the server (e.g., fallback audio)
-        updateUIState("responding", result.message);
-        if (result.audio_url) {
-          responseAudio.src = result.audio_url;
-          // Playback will trigger 'ended' event
-        } else {
-          // If even fallback audio failed, just reset
-          setTimeout(() => updateUIState("ready"), 3000);
-        }
-      } else if (result.audio_url) {
-        // Successful response
-        updateUIState("responding");
-        responseAudio.src = result.audio_url;
-        renderSources(result.sources || []);
-        // Playback will trigger 'ended' event
+      const contentType = response.headers.get("content-type") || "";
+      if (contentType.includes("text/event-stream")) {
+        await readEventStream(response);
+      } else {
+        handleJsonResult(await response.json());
       }
+      finishStream();
     } catch (error) {
       console.error("Processing error:", error);
+      streamFinished = true;
       updateUIState("error", "Connection failed. Please try again.");
       setTimeout(() => updateUIState("ready"), 3000);
     }
@@ -213,7 +498,7 @@ document.addEventListener("DOMContentLoaded", () => {
   uploadButton.addEventListener("click", uploadDocument);
 
   // Auto-continue conversation after AI response
-  responseAudio.addEventListener("ended", () => {
+  function completeTurn() {
     isProcessing = false; // Processing is done
     updateUIState("ready", "Ready for your next message...");
 
@@ -224,9 +509,18 @@ document.addEventListener("DOMContentLoaded", () => {
         handleVoiceInteraction(); // Auto-start next recording
       }
     }, 1000); // 1-second pause
+  }
+
+  responseAudio.addEventListener("ended", () => {
+    // Keep playing queued segments before handing the turn back
+    if (playNextSegment()) return;
+    if (!streamFinished) return; // More segments are still being generated
+    completeTurn();
   });
 
   responseAudio.addEventListener("error", () => {
+    audioQueue = [];
+    isPlayingSegment = false;
     isProcessing = false;
     updateUIState("error", "Could not play audio response.");
     setTimeout(() => updateUIState("ready"), 3000);
@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def app_module(tmp_path_factory):
+    """The app module, imported once with its data files under a temp dir."""
+    data_dir = tmp_path_factory.mktemp("app-data")
+    with pytest.MonkeyPatch.context() as env:
+        env.setenv("AUDIO_PREPROCESSING", "false")
+        env.setenv("SQLITE_DB_PATH", str(data_dir / "app.db"))
+        env.setenv("AUDIO_STORE_DIR", str(data_dir / "audio"))
+        env.setenv("EMBEDDING_CACHE_PATH", str(data_dir / "embeddings.db"))
+        env.setenv("CHROMA_DIR", str(data_dir / "chroma"))
+        import app
+
+        yield app
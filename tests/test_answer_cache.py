@@ -0,0 +1,87 @@
+import time
+
+from services.answer_cache import AnswerCache
+from services.retrieval_service import is_keyword_only
+
+PERSONA = "persona:single"
+
+
+def _store(cache: AnswerCache, query: str, chunk_ids: frozenset[str], embedding=None) -> None:
+    cache.store(
+        query,
+        embedding,
+        chunk_ids,
+        PERSONA,
+        text=f"answer to {query}",
+        segments=[(f"answer to {query}", "/audio/a.mp3")],
+        generation_seconds=1.5,
+    )
+
+
+def test_exact_text_match_without_embeddings():
+    cache = AnswerCache()
+    chunks = frozenset({"doc-a:0"})
+    _store(cache, "Where is my parcel?", chunks)
+
+    assert cache.lookup("where is  my parcel?", None, chunks, PERSONA).text == (
+        "answer to Where is my parcel?"
+    )
+    assert cache.lookup("where is my refund?", None, chunks, PERSONA) is None
+
+
+def test_semantic_match_within_a_bucket():
+    cache = AnswerCache(similarity_threshold=0.95)
+    chunks = frozenset({"doc-a:0"})
+    _store(cache, "where is my parcel", chunks, embedding=[1.0, 0.0])
+
+    assert cache.lookup("parcel location?", [0.99, 0.05], chunks, PERSONA) is not None
+    assert cache.lookup("refund status?", [0.0, 1.0], chunks, PERSONA) is None
+
+
+def test_different_retrieval_results_never_match():
+    cache = AnswerCache()
+    _store(cache, "where is my parcel", frozenset({"doc-a:0"}))
+    assert cache.lookup("where is my parcel", None, frozenset({"doc-a:1"}), PERSONA) is None
+
+
+def test_invalidating_a_document_drops_answers_built_from_it():
+    cache = AnswerCache()
+    from_a = frozenset({"doc-a:0", "doc-b:3"})
+    from_c = frozenset({"doc-c:0"})
+    _store(cache, "question one", from_a)
+    _store(cache, "question two", from_c)
+
+    assert cache.invalidate_document("doc-b") == 1
+    assert cache.lookup("question one", None, from_a, PERSONA) is None
+    assert not cache.has_candidates(from_a, PERSONA)
+    assert cache.lookup("question two", None, from_c, PERSONA) is not None
+    assert cache.invalidate_document("doc-b") == 0
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_expired_entries_are_misses():
+    cache = AnswerCache(ttl_seconds=0.01)
+    chunks = frozenset({"doc-a:0"})
+    _store(cache, "question", chunks)
+    time.sleep(0.02)
+    assert cache.lookup("question", None, chunks, PERSONA) is None
+    assert not cache.has_candidates(chunks, PERSONA)
+
+
+def test_lru_eviction_keeps_the_bucket_index_consistent():
+    cache = AnswerCache(max_entries=1)
+    _store(cache, "first", frozenset({"doc-a:0"}))
+    _store(cache, "second", frozenset({"doc-b:0"}))
+    assert not cache.has_candidates(frozenset({"doc-a:0"}), PERSONA)
+    assert cache.has_candidates(frozenset({"doc-b:0"}), PERSONA)
+
+
+def test_keyword_only_hits_are_recognized():
+    keyword_hit = {"id": "d:0", "distance": None, "bm25": -1.2}
+    vector_hit = {"id": "d:1", "distance": 0.3}
+    fused_keyword_hit = {**keyword_hit, "rrf_score": 0.03}
+
+    assert is_keyword_only([keyword_hit])
+    assert not is_keyword_only([vector_hit])
+    assert not is_keyword_only([fused_keyword_hit])
+    assert not is_keyword_only([])
@@ -0,0 +1,38 @@
+from services.answer_cache import AnswerKey
+
+
+class _RecordingCache:
+    def __init__(self):
+        self.stored = []
+
+    def store(self, query_text, embedding, chunk_ids, persona_key, **answer):
+        self.stored.append((query_text, answer))
+
+
+def _key() -> AnswerKey:
+    return AnswerKey("refund policy", [0.1, 0.2], frozenset({"faq:0"}), "nova")
+
+
+def test_answers_with_stored_audio_are_cached(app_module, monkeypatch):
+    cache = _RecordingCache()
+    monkeypatch.setattr(app_module, "answer_cache", cache)
+    segments = [("Refunds take five days.", "/audio/ab12.mp3")]
+
+    app_module._store_answer(_key(), text="Refunds take five days.", segments=segments)
+
+    assert cache.stored == [
+        ("refund policy", {"text": "Refunds take five days.", "segments": segments})
+    ]
+
+
+def test_answers_with_inline_audio_are_not_cached(app_module, monkeypatch):
+    cache = _RecordingCache()
+    monkeypatch.setattr(app_module, "answer_cache", cache)
+    segments = [
+        ("Refunds take five days.", "/audio/ab12.mp3"),
+        ("Anything else?", "data:audio/wav;base64," + "A" * 1000),
+    ]
+
+    app_module._store_answer(_key(), text="Refunds take five days.", segments=segments)
+
+    assert cache.stored == []
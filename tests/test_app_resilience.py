@@ -0,0 +1,31 @@
+import pytest
+
+from services.resilience import CLOSED, OPEN, CircuitBreaker, CircuitOpenError
+
+
+def test_only_tts_is_hedged_by_default(app_module):
+    assert app_module.tts_guard.hedge
+    assert not app_module.llm_guard.hedge
+    assert not app_module.summary_guard.hedge
+
+
+def test_failing_summaries_do_not_open_the_turn_breaker(app_module, monkeypatch):
+    monkeypatch.setattr(app_module.llm_guard, "breaker", CircuitBreaker("gemini"))
+    monkeypatch.setattr(
+        app_module.summary_guard, "breaker", CircuitBreaker("gemini_summary", failure_threshold=2)
+    )
+
+    class FailingModel:
+        def generate_content(self, prompt, **kwargs):
+            raise RuntimeError("quota exceeded")
+
+    monkeypatch.setattr(app_module.providers, "llm_model", lambda name: FailingModel())
+    messages = [{"role": "user", "parts": ["hello"]}]
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            app_module._summarize_history("", messages)
+    with pytest.raises(CircuitOpenError):
+        app_module._summarize_history("", messages)
+
+    assert app_module.summary_guard.breaker.state == OPEN
+    assert app_module.llm_guard.breaker.state == CLOSED
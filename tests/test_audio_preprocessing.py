@@ -0,0 +1,95 @@
+import array
+import io
+import math
+import random
+import wave
+
+import pytest
+
+from services.audio_preprocessing import (
+    AudioSettings,
+    NoSpeechError,
+    detect_speech,
+    preprocess_audio,
+)
+
+SAMPLE_RATE = 16000
+SETTINGS = AudioSettings(ffmpeg_path=None, sample_rate=SAMPLE_RATE)
+
+
+def _pcm(signal, seconds: float) -> bytes:
+    samples = array.array("h")
+    for i in range(int(seconds * SAMPLE_RATE)):
+        samples.append(int(max(-32768, min(32767, signal(i / SAMPLE_RATE)))))
+    return samples.tobytes()
+
+
+def _voice(t: float) -> float:
+    return 6000 * math.sin(2 * math.pi * 180 * t)
+
+
+def _noise(level: float, seed: int = 1):
+    rng = random.Random(seed)
+    return lambda t: rng.gauss(0, level)
+
+
+def _wav(pcm: bytes) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(SAMPLE_RATE)
+        wav_file.writeframes(pcm)
+    return buffer.getvalue()
+
+
+def test_speech_padded_with_silence_is_trimmed():
+    noise = _noise(30)
+    pcm = _pcm(lambda t: noise(t) + (_voice(t) if 1.0 <= t < 2.0 else 0), 3.0)
+    start, end = detect_speech(pcm, SETTINGS)
+    bytes_per_second = SAMPLE_RATE * 2
+    # One second of speech plus padding_ms (250 ms) on either side.
+    assert start == pytest.approx(0.75 * bytes_per_second, abs=0.03 * bytes_per_second)
+    assert end == pytest.approx(2.25 * bytes_per_second, abs=0.03 * bytes_per_second)
+
+
+@pytest.mark.parametrize(
+    "signal",
+    [
+        # A steady tone around -20 dBFS: no quieter frames to take a noise floor from.
+        lambda t: 3277 * math.sin(2 * math.pi * 200 * t),
+        # Amplitude-modulated "speech" cut tightly, with no silence padding.
+        lambda t: _voice(t) * abs(math.sin(8 * t)),
+    ],
+    ids=["steady-tone", "tightly-cut"],
+)
+def test_recordings_without_silence_are_kept_whole(signal):
+    pcm = _pcm(signal, 2.0)
+    assert detect_speech(pcm, SETTINGS) == (0, len(pcm))
+
+
+def test_brief_sound_is_sent_untrimmed_rather_than_rejected():
+    noise = _noise(30)
+    pcm = _pcm(lambda t: noise(t) + (_voice(t) if 1.0 <= t < 1.06 else 0), 2.0)
+    assert detect_speech(pcm, SETTINGS) == (0, len(pcm))
+
+
+@pytest.mark.parametrize("level", [0, 20, 150])
+def test_quiet_recordings_are_rejected(level):
+    # 150 RMS is about -47 dBFS, under MIN_SPEECH_DBFS.
+    assert detect_speech(_pcm(_noise(level), 2.0), SETTINGS) is None
+
+
+def test_preprocess_rejects_silent_wav_turns():
+    with pytest.raises(NoSpeechError):
+        preprocess_audio(_wav(_pcm(_noise(20), 1.0)), SETTINGS)
+
+
+def test_preprocess_trims_wav_turns_without_ffmpeg():
+    noise = _noise(30)
+    pcm = _pcm(lambda t: noise(t) + (_voice(t) if 1.0 <= t < 2.0 else 0), 4.0)
+    result = preprocess_audio(_wav(pcm), SETTINGS)
+    assert result.content_type == "audio/wav"
+    assert result.original_seconds == pytest.approx(4.0)
+    assert result.speech_seconds == pytest.approx(1.5, abs=0.05)
+    assert len(result.data) < len(pcm) / 2
@@ -0,0 +1,79 @@
+import itertools
+import sqlite3
+
+import pytest
+
+from services import embedding_cache as embedding_cache_module
+from services.embedding_cache import EmbeddingCache, text_hash
+
+MODEL = "all-MiniLM-L6-v2"
+
+
+@pytest.fixture(autouse=True)
+def clock(monkeypatch):
+    """A strictly increasing clock, so recency ties never decide what is evicted."""
+    ticks = itertools.count(1)
+    monkeypatch.setattr(embedding_cache_module.time, "time", lambda: float(next(ticks)))
+
+
+def _vectors(*texts: str) -> dict[str, list[float]]:
+    return {text_hash(text): [float(len(text)), 0.5] for text in texts}
+
+
+def test_round_trip_and_counters(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "e.db"))
+    try:
+        cache.put_many(MODEL, _vectors("alpha"))
+        digest = text_hash("alpha")
+        assert cache.get_many(MODEL, [digest, text_hash("beta")]) == {digest: [5.0, 0.5]}
+        assert cache.get_many("other-model", [digest]) == {}
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 1)
+    finally:
+        cache.close()
+
+
+def test_least_recently_used_vectors_are_pruned(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "e.db"), max_entries=10)
+    try:
+        for n in range(10):
+            cache.put_many(MODEL, _vectors(f"chunk {n}"))
+        # Reading chunk 0 makes it the most recently used.
+        cache.get_many(MODEL, [text_hash("chunk 0")])
+        cache.put_many(MODEL, _vectors("chunk 10"))
+
+        stats = cache.stats()
+        # One over the bound, plus 10% slack: the two oldest go.
+        assert stats["evictions"] == 2 and stats["entries"] == 9
+        kept = cache.get_many(MODEL, [text_hash(f"chunk {n}") for n in range(11)])
+        assert text_hash("chunk 0") in kept
+        assert text_hash("chunk 1") not in kept and text_hash("chunk 2") not in kept
+    finally:
+        cache.close()
+
+
+def test_caches_from_before_the_bound_are_upgraded_and_pruned(tmp_path):
+    path = str(tmp_path / "e.db")
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE embeddings (
+            model TEXT NOT NULL,
+            text_hash TEXT NOT NULL,
+            vector BLOB NOT NULL,
+            PRIMARY KEY (model, text_hash)
+        ) WITHOUT ROWID
+        """)
+    conn.executemany(
+        "INSERT INTO embeddings VALUES (?, ?, ?)",
+        [(MODEL, text_hash(f"old {n}"), b"\x00" * 8) for n in range(5)],
+    )
+    conn.commit()
+    conn.close()
+
+    cache = EmbeddingCache(path, max_entries=3)
+    try:
+        assert cache.stats()["entries"] <= 3
+        cache.put_many(MODEL, _vectors("new"))
+        assert text_hash("new") in cache.get_many(MODEL, [text_hash("new")])
+    finally:
+        cache.close()
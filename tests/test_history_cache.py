@@ -0,0 +1,116 @@
+import pytest
+
+from services import history_cache as history_cache_module
+from services.history_cache import SessionHistoryCache, _message_size
+from services.persistence_service import PersistenceService
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(history_cache_module.time, "monotonic", lambda: now[0])
+    return now
+
+
+def _message(text: str, role: str = "user") -> dict:
+    return {"role": role, "parts": [text], "created_at": text}
+
+
+def _load(cache: SessionHistoryCache, session_id: str, texts: list[str], complete=True) -> None:
+    generation = cache.begin_load(session_id)
+    cache.finish_load(session_id, generation, [_message(text) for text in texts], complete)
+
+
+def _texts(messages) -> list[str]:
+    return [message["parts"][0] for message in messages]
+
+
+def test_loaded_history_is_served_and_kept_current():
+    cache = SessionHistoryCache(window=3)
+    assert cache.get("s1", 2) is None
+    _load(cache, "s1", ["a", "b"])
+    cache.append("s1", _message("c"))
+    cache.append("s1", _message("d"))
+
+    assert _texts(cache.get("s1", 3)) == ["b", "c", "d"]
+    # The window dropped "a", so a larger read can no longer be served.
+    assert cache.get("s1", 4) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+
+def test_complete_history_serves_reads_past_its_length():
+    cache = SessionHistoryCache(window=10)
+    _load(cache, "s1", ["a"], complete=True)
+    _load(cache, "s2", ["a"], complete=False)
+    assert _texts(cache.get("s1", 10)) == ["a"]
+    assert cache.get("s2", 10) is None
+
+
+def test_least_recently_used_sessions_are_evicted_by_bytes():
+    size = _message_size(_message("x"))
+    cache = SessionHistoryCache(max_bytes=size * 2, window=10)
+    _load(cache, "old", ["x"])
+    _load(cache, "used", ["x"])
+    cache.get("old", 1)  # now the most recently used
+    _load(cache, "new", ["x"])
+
+    assert cache.get("used", 1) is None
+    assert cache.get("old", 1) is not None and cache.get("new", 1) is not None
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["bytes"] == size * 2
+
+
+def test_entries_expire_after_the_ttl_unless_read(clock):
+    cache = SessionHistoryCache(ttl_seconds=60)
+    _load(cache, "s1", ["a"])
+    clock[0] += 50
+    assert cache.get("s1", 1) is not None  # a read extends the entry
+    clock[0] += 50
+    assert cache.get("s1", 1) is not None
+    clock[0] += 61
+    assert cache.get("s1", 1) is None
+    assert cache.stats()["sessions"] == 0 and cache.stats()["bytes"] == 0
+
+
+def test_a_load_that_raced_with_a_save_is_not_cached():
+    cache = SessionHistoryCache()
+    generation = cache.begin_load("s1")
+    # A message is saved after the read started; the rows read may predate it.
+    cache.append("s1", _message("new"))
+    cache.finish_load("s1", generation, [_message("old")], complete=True)
+    assert cache.get("s1", 1) is None
+
+    # The next load, with no save in between, is cached.
+    _load(cache, "s1", ["old", "new"])
+    assert _texts(cache.get("s1", 2)) == ["old", "new"]
+
+
+def test_overlapping_loads_only_cache_when_no_save_intervened():
+    cache = SessionHistoryCache()
+    first = cache.begin_load("s1")
+    second = cache.begin_load("s1")
+    cache.append("s1", _message("new"))
+    cache.finish_load("s1", first, [_message("old")])
+    cache.finish_load("s1", second, [_message("old")])
+    assert cache.get("s1", 1) is None
+
+
+def test_failed_load_releases_the_session():
+    cache = SessionHistoryCache()
+    generation = cache.begin_load("s1")
+    cache.finish_load("s1", generation, None)
+    _load(cache, "s1", ["a"])
+    assert _texts(cache.get("s1", 1)) == ["a"]
+
+
+def test_persistence_serves_repeat_reads_from_the_cache(tmp_path):
+    cache = SessionHistoryCache(window=10)
+    store = PersistenceService(str(tmp_path / "app.db"), history_cache=cache)
+    try:
+        store.save_message("s1", "user", "hello")
+        assert _texts(store.get_session_messages("s1", 5)) == ["hello"]
+        store.save_message("s1", "model", "hi there")
+        assert _texts(store.get_session_messages("s1", 5)) == ["hello", "hi there"]
+        assert cache.stats()["hits"] == 1
+    finally:
+        store.close()
@@ -0,0 +1,101 @@
+import pytest
+
+from services.persistence_service import PersistenceService
+from services.retrieval_service import HybridRetriever, query_terms
+
+
+class FakeVectorService:
+    def __init__(self, hits: list[dict]):
+        self.hits = hits
+        self.queries: list[str] = []
+
+    def query(self, query_text, top_k=4, namespaces=None):
+        self.queries.append(query_text)
+        return self.hits[:top_k]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = PersistenceService(str(tmp_path / "app.db"))
+    if not store.keyword_search_available:
+        store.close()
+        pytest.skip("sqlite was built without FTS5")
+    doc_id = store.create_document("faq.md", "text/markdown")
+    chunks = [
+        "Refunds are issued within five business days.",
+        "Parcels ship from the Leeds warehouse every morning.",
+        "Gift cards cannot be exchanged for cash.",
+    ]
+    store.save_document_chunks(
+        doc_id,
+        chunks,
+        [{"doc_id": doc_id, "chunk_index": index} for index in range(len(chunks))],
+    )
+    yield store
+    store.close()
+
+
+def _vector_hit(chunk_id: str) -> dict:
+    return {"id": chunk_id, "content": "vector", "metadata": {}, "distance": 0.1}
+
+
+def test_query_terms_drop_stopwords_and_duplicates():
+    assert query_terms("What is the refund, the REFUND policy?") == ["refund", "policy"]
+
+
+def test_short_query_with_an_exact_match_skips_the_embedding_model(store):
+    vectors = FakeVectorService([_vector_hit("other:0")])
+    retriever = HybridRetriever(store, vectors, keyword_only_max_terms=3)
+
+    hits = retriever.retrieve("refunds business days?", top_k=2)
+
+    assert hits[0]["content"].startswith("Refunds are issued")
+    assert vectors.queries == []
+    assert retriever.stats()["keyword_only"] == 1
+
+
+def test_short_queries_use_vectors_by_default(store):
+    vectors = FakeVectorService([_vector_hit("other:0")])
+    retriever = HybridRetriever(store, vectors)
+
+    hits = retriever.retrieve("refunds business days?", top_k=2)
+
+    assert vectors.queries == ["refunds business days?"]
+    assert retriever.stats()["keyword_only"] == 0
+    assert retriever.stats()["fused"] == 1
+    assert {hit["id"] for hit in hits} >= {"other:0"}
+
+
+def test_short_query_without_an_exact_match_is_fused(store):
+    vectors = FakeVectorService([_vector_hit("other:0")])
+    retriever = HybridRetriever(store, vectors, keyword_only_max_terms=3)
+
+    hits = retriever.retrieve("refunds warehouse", top_k=4)
+
+    assert vectors.queries == ["refunds warehouse"]
+    assert {hit["id"] for hit in hits} >= {"other:0"}
+    assert retriever.stats()["fused"] == 1
+
+
+def test_long_queries_always_use_vectors(store):
+    vectors = FakeVectorService([_vector_hit("other:0")])
+    retriever = HybridRetriever(store, vectors, keyword_only_max_terms=2)
+
+    retriever.retrieve("refunds issued five business days", top_k=2)
+
+    assert len(vectors.queries) == 1
+    assert retriever.stats()["keyword_only"] == 0
+
+
+def test_stopword_only_queries_go_to_vectors(store):
+    vectors = FakeVectorService([_vector_hit("other:0")])
+    retriever = HybridRetriever(store, vectors)
+
+    assert retriever.retrieve("what is it?") == [_vector_hit("other:0")]
+    assert retriever.stats()["vector_only"] == 1
+
+
+def test_keyword_mode_without_a_vector_service(store):
+    retriever = HybridRetriever(store, None, mode="hybrid")
+    [hit] = retriever.retrieve("gift cards", top_k=1)
+    assert hit["content"].startswith("Gift cards")
@@ -0,0 +1,125 @@
+import asyncio
+import io
+import os
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from services.executor_service import StageExecutor
+from services.ingestion_service import IngestionJobQueue, ingest_upload
+from services.persistence_service import PersistenceService
+
+
+class FakeVectorService:
+    def __init__(self, fail_after_batches: int | None = None):
+        self.fail_after_batches = fail_after_batches
+        self.batches: list[list[str]] = []
+        self.deleted_docs: list[str] = []
+
+    def upsert_chunks(self, ids, chunks, metadatas, namespace=None) -> None:
+        if self.fail_after_batches is not None and len(self.batches) >= self.fail_after_batches:
+            raise RuntimeError("vector store unavailable")
+        self.batches.append(list(ids))
+
+    def delete_by_doc_id(self, doc_id, namespace=None) -> None:
+        self.deleted_docs.append(doc_id)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = PersistenceService(str(tmp_path / "app.db"))
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def executor():
+    executor = StageExecutor({"ingestion": 1})
+    yield executor
+    executor.shutdown()
+
+
+def _spool(tmp_path, text: str) -> tuple[str, int]:
+    path = tmp_path / f"{time.monotonic_ns()}.spool"
+    path.write_text(text, encoding="utf-8")
+    return str(path), path.stat().st_size
+
+
+def _wait(job, timeout: float = 10):
+    deadline = time.monotonic() + timeout
+    while job.status in ("queued", "running") and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return job
+
+
+def _long_text(words: int) -> str:
+    return " ".join(f"word{index}" for index in range(words))
+
+
+def test_job_runs_in_the_background_in_batches(store, executor, tmp_path):
+    vectors = FakeVectorService()
+    queue = IngestionJobQueue(store, vectors, executor, batch_size=2)
+    started, release = threading.Event(), threading.Event()
+    # Occupy the single ingestion worker so the job is still queued on return.
+    executor.submit("ingestion", lambda: (started.set(), release.wait(5)))
+    assert started.wait(5)
+
+    spool_path, size = _spool(tmp_path, _long_text(1000))
+    job = queue.submit("big.txt", "text/plain", spool_path, size)
+    assert job.status == "queued"
+    assert queue.get(job.job_id) is job
+    release.set()
+
+    assert _wait(job).status == "completed"
+    status = job.to_dict()
+    assert status["progress"] == 1.0 and status["chunks_done"] == job.chunks_done
+    assert job.chunks_done > 2
+    assert all(len(batch) <= 2 for batch in vectors.batches)
+    assert sum(len(batch) for batch in vectors.batches) == job.chunks_done
+    assert store.get_document(job.doc_id)["chunk_count"] == job.chunks_done
+    assert not os.path.exists(spool_path)
+
+
+def test_failed_job_discards_its_partial_document(store, executor, tmp_path):
+    vectors = FakeVectorService(fail_after_batches=1)
+    queue = IngestionJobQueue(store, vectors, executor, batch_size=2)
+    spool_path, size = _spool(tmp_path, _long_text(1000))
+
+    job = _wait(queue.submit("big.txt", "text/plain", spool_path, size))
+
+    assert job.status == "failed"
+    assert job.error == "vector store unavailable"
+    assert vectors.deleted_docs == [job.doc_id]
+    assert store.get_document(job.doc_id) is None
+    assert not os.path.exists(spool_path)
+
+
+def test_only_finished_jobs_are_pruned(store, executor, tmp_path):
+    queue = IngestionJobQueue(store, FakeVectorService(), executor, max_retained_jobs=2)
+    finished = []
+    for index in range(3):
+        spool_path, size = _spool(tmp_path, f"document number {index}")
+        finished.append(_wait(queue.submit(f"{index}.txt", "text/plain", spool_path, size)))
+
+    assert queue.get(finished[0].job_id) is None
+    assert [queue.get(job.job_id) for job in finished[1:]] == finished[1:]
+
+
+def test_upload_is_validated_before_it_is_queued(store, executor):
+    queue = IngestionJobQueue(store, FakeVectorService(), executor)
+
+    def upload(filename: str, data: bytes) -> UploadFile:
+        return UploadFile(io.BytesIO(data), filename=filename)
+
+    with pytest.raises(HTTPException) as unsupported:
+        asyncio.run(ingest_upload(upload("slides.pdf", b"%PDF"), queue))
+    assert unsupported.value.status_code == 400
+    with pytest.raises(HTTPException) as empty:
+        asyncio.run(ingest_upload(upload("notes.md", b"  \n"), queue))
+    assert empty.value.status_code == 400
+
+    status = asyncio.run(ingest_upload(upload("notes.md", b"# Refunds\nFive days."), queue))
+    assert status["status"] in ("queued", "running", "completed")
+    assert _wait(queue.get(status["job_id"])).status == "completed"
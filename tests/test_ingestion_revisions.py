@@ -0,0 +1,86 @@
+import hashlib
+import time
+
+import pytest
+
+from services.executor_service import StageExecutor
+from services.ingestion_service import IngestionJobQueue
+from services.persistence_service import PersistenceService
+
+
+class FakeVectorService:
+    def __init__(self):
+        self.chunks: dict[str, str] = {}
+
+    def upsert_chunks(self, ids, chunks, metadatas, namespace=None) -> None:
+        self.chunks.update(zip(ids, chunks))
+
+    def delete_chunks(self, ids, namespace=None) -> None:
+        for chunk_id in ids:
+            self.chunks.pop(chunk_id, None)
+
+    def delete_by_doc_id(self, doc_id, namespace=None) -> None:
+        for chunk_id in [key for key in self.chunks if key.startswith(f"{doc_id}:")]:
+            del self.chunks[chunk_id]
+
+
+@pytest.fixture
+def queue(tmp_path):
+    store = PersistenceService(str(tmp_path / "app.db"))
+    executor = StageExecutor()
+    yield IngestionJobQueue(store, FakeVectorService(), executor)
+    executor.shutdown()
+    store.close()
+
+
+def _ingest(queue, tmp_path, filename: str, text: str, replace_doc_id: str | None = None):
+    raw = text.encode("utf-8")
+    spool_path = tmp_path / f"{time.monotonic_ns()}.spool"
+    spool_path.write_bytes(raw)
+    job = queue.submit(
+        filename,
+        "text/markdown",
+        str(spool_path),
+        len(raw),
+        hashlib.sha256(raw).hexdigest(),
+        replace_doc_id=replace_doc_id,
+    )
+    deadline = time.monotonic() + 10
+    while job.status in ("queued", "running") and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return job
+
+
+def test_same_filename_with_new_content_creates_a_new_document(queue, tmp_path):
+    first = _ingest(queue, tmp_path, "notes.md", "alpha beta gamma")
+    second = _ingest(queue, tmp_path, "notes.md", "delta epsilon")
+
+    assert (first.mode, second.mode) == ("created", "created")
+    assert first.doc_id != second.doc_id
+    assert len(queue.persistence_service.list_documents()) == 2
+    assert queue.vector_service.chunks[f"{first.doc_id}:0"] == "alpha beta gamma"
+
+
+def test_replace_updates_the_named_document(queue, tmp_path):
+    first = _ingest(queue, tmp_path, "notes.md", "alpha beta gamma")
+    revision = _ingest(queue, tmp_path, "notes-v2.md", "alpha beta", replace_doc_id=first.doc_id)
+
+    assert revision.status == "completed"
+    assert revision.mode == "updated"
+    assert revision.doc_id == first.doc_id
+    [document] = queue.persistence_service.list_documents()
+    assert document["filename"] == "notes.md"
+    assert queue.vector_service.chunks == {f"{first.doc_id}:0": "alpha beta"}
+
+
+def test_identical_content_is_a_duplicate(queue, tmp_path):
+    first = _ingest(queue, tmp_path, "notes.md", "alpha beta gamma")
+    again = _ingest(queue, tmp_path, "copy.md", "alpha beta gamma")
+    assert again.mode == "duplicate"
+    assert again.doc_id == first.doc_id
+
+
+def test_replacing_an_unknown_document_fails(queue, tmp_path):
+    job = _ingest(queue, tmp_path, "notes.md", "alpha", replace_doc_id="missing")
+    assert job.status == "failed"
+    assert queue.persistence_service.list_documents() == []
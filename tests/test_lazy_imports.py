@@ -0,0 +1,111 @@
+import asyncio
+import importlib
+import json
+import sys
+import threading
+
+import pytest
+
+from services.lazy_imports import LazyModule, lazy_import, missing_modules
+
+
+@pytest.fixture
+def imports(tmp_path, monkeypatch):
+    """Puts a fresh `fake_sdk` module on the path and records every import of it."""
+    (tmp_path / "fake_sdk.py").write_text("api_key = None\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "fake_sdk", raising=False)
+    calls = []
+    import_module = importlib.import_module
+
+    def counting_import(name):
+        calls.append(name)
+        return import_module(name)
+
+    monkeypatch.setattr(importlib, "import_module", counting_import)
+    yield calls
+    sys.modules.pop("fake_sdk", None)
+
+
+def test_import_is_deferred_until_first_attribute_access(imports):
+    module = LazyModule("fake_sdk")
+    assert not module.loaded and "fake_sdk" not in sys.modules
+
+    assert module.api_key is None
+    assert module.loaded and imports == ["fake_sdk"]
+
+
+def test_load_hooks_run_once_after_the_import(imports):
+    module = LazyModule("fake_sdk")
+    seen = []
+    module.on_load(lambda sdk: setattr(sdk, "api_key", "secret"))
+    module.on_load(lambda sdk: seen.append(sdk.api_key))
+
+    assert module.api_key == "secret"
+    module.load()
+    assert seen == ["secret"]
+
+    module.on_load(lambda sdk: seen.append("late"))  # runs immediately when already loaded
+    assert seen == ["secret", "late"]
+
+
+def test_concurrent_first_use_imports_once(imports):
+    module = LazyModule("fake_sdk")
+    hook_calls = []
+    module.on_load(hook_calls.append)
+    barrier = threading.Barrier(8)
+
+    def use():
+        barrier.wait()
+        module.load()
+
+    threads = [threading.Thread(target=use) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert imports == ["fake_sdk"]
+    assert len(hook_calls) == 1
+
+
+def test_lazy_import_shares_one_proxy_per_module():
+    assert lazy_import("json") is lazy_import("json")
+    assert lazy_import("json").dumps({}) == "{}"
+
+
+def test_missing_modules_does_not_import_anything():
+    assert missing_modules(["json", "no_such_sdk_installed"]) == ["no_such_sdk_installed"]
+
+
+def _readiness(app_module) -> tuple[int, dict]:
+    response = asyncio.run(app_module.readiness())
+    if isinstance(response, dict):
+        return 200, response
+    return response.status_code, json.loads(response.body)
+
+
+def test_readyz_reports_starting_ready_and_degraded(app_module, monkeypatch):
+    state = app_module.startup_state
+    monkeypatch.setitem(state, "providers", "ready")
+    monkeypatch.setitem(state, "vector_service", "loading")
+    assert _readiness(app_module) == (
+        503,
+        {"status": "starting", "providers": "ready", "vector_service": "loading"},
+    )
+
+    monkeypatch.setitem(state, "vector_service", "ready")
+    assert _readiness(app_module)[1]["status"] == "ready"
+
+    def broken_vector_service():
+        raise RuntimeError("model download failed")
+
+    monkeypatch.setattr(app_module, "_build_vector_service", broken_vector_service)
+    monkeypatch.setattr(app_module, "VECTOR_SERVICE_SOCKET", "")
+    monkeypatch.setitem(app_module.startup_errors, "vector_service", "")
+    app_module._load_vector_service()
+
+    status, body = _readiness(app_module)
+    assert status == 200
+    assert body["status"] == "degraded" and body["vector_service"] == "failed"
+    assert body["errors"]["vector_service"] == "model download failed"
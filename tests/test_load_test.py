@@ -0,0 +1,73 @@
+import json
+import math
+import os
+import subprocess
+import sys
+
+from benchmarks.load_test import HashingEmbedding, compare
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOAD_TEST = os.path.join(ROOT, "benchmarks", "load_test.py")
+
+
+def _results(throughput: float, rss: float, chat_p95: float) -> dict:
+    return {
+        "config": {"requests": 10},
+        "throughput": throughput,
+        "peak_rss_mb": rss,
+        "endpoints": {"chat": {"p95_ms": chat_p95}},
+    }
+
+
+def test_hashing_embedding_is_deterministic_and_normalized():
+    embed = HashingEmbedding(dimensions=64)
+    refund, refund_again, shipping = embed(
+        ["refund policy details", "refund policy details", "shipping times"]
+    )
+
+    assert refund == refund_again
+    assert math.isclose(sum(value * value for value in refund), 1.0)
+    assert sum(a * b for a, b in zip(refund, shipping)) < 1.0
+
+
+def test_compare_flags_only_regressions_past_tolerance(capsys):
+    baseline = _results(throughput=100, rss=200, chat_p95=500)
+
+    assert compare(_results(95, 210, 550), baseline, tolerance=0.2) == []
+    regressions = compare(_results(70, 300, 900), baseline, tolerance=0.2)
+    assert regressions == ["throughput req/s -30%", "peak RSS MB +50%", "chat p95 ms +80%"]
+    assert "REGRESSION" in capsys.readouterr().out
+
+
+def _run(tmp_path, *extra: str) -> subprocess.CompletedProcess:
+    args = [
+        sys.executable, LOAD_TEST, "--requests", "12", "--concurrency", "4", "--warmup", "0",
+        "--mix", "chat=2,history=1,documents=1", "--embeddings", "none",
+        "--stt-latency", "0", "--llm-latency", "0", "--tts-latency", "0", *extra,
+    ]
+    env = {
+        **os.environ,
+        "AUDIO_PREPROCESSING": "false",
+        "AUDIO_STORE_DIR": str(tmp_path / "audio"),
+    }
+    # The app serves static/ relative to the working directory.
+    return subprocess.run(args, cwd=ROOT, env=env, capture_output=True, text=True, timeout=120)
+
+
+def test_offline_run_saves_a_baseline_and_fails_on_regression(tmp_path):
+    baseline_path = tmp_path / "baseline.json"
+    run = _run(tmp_path, "--save-baseline", str(baseline_path))
+    assert run.returncode == 0, run.stderr
+
+    baseline = json.loads(baseline_path.read_text())
+    chat = baseline["endpoints"]["chat"]
+    assert sum(stats["count"] for stats in baseline["endpoints"].values()) == 12
+    assert chat["failures"] == 0 and chat["degraded"] == 0
+
+    # An impossibly fast baseline makes every latency a regression.
+    for stats in baseline["endpoints"].values():
+        stats["p95_ms"] = 0.001
+    baseline_path.write_text(json.dumps(baseline))
+    run = _run(tmp_path, "--baseline", str(baseline_path), "--fail-on-regression")
+    assert run.returncode == 1
+    assert "regressions: " in run.stdout
@@ -0,0 +1,171 @@
+import asyncio
+import base64
+import importlib.machinery
+import io
+import json
+import os
+import sys
+import types
+import wave
+
+import pytest
+
+from services.audio_preprocessing import AudioSettings
+from services.local_speech import VOSK_FEED_BYTES, PiperTextToSpeech, VoskSpeechToText
+from services.tts_cache import TTSCache
+
+SAMPLE_RATE = 16000
+
+
+def _stub_module(name: str, **attributes) -> types.ModuleType:
+    module = types.ModuleType(name)
+    # importlib.util.find_spec (the startup check) reads __spec__ off sys.modules.
+    module.__spec__ = importlib.machinery.ModuleSpec(name, None)
+    module.__dict__.update(attributes)
+    return module
+
+
+def _wav(pcm: bytes) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(SAMPLE_RATE)
+        wav_file.writeframes(pcm)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def vosk(monkeypatch):
+    calls = {"log_level": None, "models": [], "chunks": []}
+
+    class Model:
+        def __init__(self, path):
+            calls["models"].append(path)
+
+    class KaldiRecognizer:
+        def __init__(self, model, sample_rate):
+            assert isinstance(model, Model)
+            assert sample_rate == SAMPLE_RATE
+
+        def AcceptWaveform(self, chunk):
+            calls["chunks"].append(chunk)
+            # The second chunk ends an utterance.
+            return len(calls["chunks"]) == 2
+
+        def Result(self):
+            return json.dumps({"text": "turn on"})
+
+        def FinalResult(self):
+            return json.dumps({"text": "the lights"})
+
+    def set_log_level(level):
+        calls["log_level"] = level
+
+    module = _stub_module(
+        "vosk", Model=Model, KaldiRecognizer=KaldiRecognizer, SetLogLevel=set_log_level
+    )
+    monkeypatch.setitem(sys.modules, "vosk", module)
+    return calls
+
+
+@pytest.fixture
+def piper(monkeypatch):
+    calls = {"loads": [], "texts": []}
+    pcm = b"\x01\x02" * 800
+
+    class PiperVoice:
+        @classmethod
+        def load(cls, model_path, config_path=None):
+            calls["loads"].append((model_path, config_path))
+            return cls()
+
+        def synthesize_wav(self, text, wav_file):
+            # piper-tts sets the WAV parameters on the file it is handed.
+            calls["texts"].append(text)
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(22050)
+            wav_file.writeframes(pcm)
+
+    monkeypatch.setitem(sys.modules, "piper", _stub_module("piper", PiperVoice=PiperVoice))
+    calls["pcm"] = pcm
+    return calls
+
+
+def test_vosk_feeds_pcm_in_chunks_and_joins_utterances(vosk, tmp_path):
+    stt = VoskSpeechToText(str(tmp_path), AudioSettings(ffmpeg_path=None))
+    pcm = bytes(range(256)) * 75  # 0.6 s of 16 kHz audio
+
+    transcript = stt.transcribe_audio(io.BytesIO(_wav(pcm)))
+
+    assert transcript == "turn on the lights"
+    assert vosk["log_level"] == -1
+    assert vosk["models"] == [str(tmp_path)]
+    assert b"".join(vosk["chunks"]) == pcm
+    assert all(len(chunk) <= VOSK_FEED_BYTES for chunk in vosk["chunks"])
+
+    # The model is loaded once and shared across turns.
+    stt.transcribe_audio(io.BytesIO(_wav(pcm)))
+    assert len(vosk["models"]) == 1
+
+
+def test_piper_renders_a_complete_wav(piper, tmp_path):
+    model_path = str(tmp_path / "en_US-lessac-medium.onnx")
+    tts = PiperTextToSpeech(model_path, config_path="voice.json")
+
+    speech = tts.generate_speech("Hello there.", tts.default_voice)
+
+    assert tts.default_voice == "en_US-lessac-medium"
+    assert piper["loads"] == [(model_path, "voice.json")]
+    assert piper["texts"] == ["Hello there."]
+    assert speech.audio_url is None
+    assert speech.extension == ".wav"
+    with wave.open(io.BytesIO(speech.audio), "rb") as wav_file:
+        assert wav_file.getframerate() == 22050
+        assert wav_file.readframes(wav_file.getnframes()) == piper["pcm"]
+
+
+def test_app_stores_piper_audio_in_the_tts_cache(app_module, piper, monkeypatch, tmp_path):
+    cache = TTSCache(audio_dir=str(tmp_path / "audio"))
+    tts = PiperTextToSpeech(str(tmp_path / "voice.onnx"))
+    monkeypatch.setattr(app_module, "tts_provider", tts)
+    monkeypatch.setattr(app_module, "tts_cache", cache)
+    try:
+        url = app_module._synthesize_uncached("Hello there.", tts.default_voice)
+        assert url.startswith("/audio/") and url.endswith(".wav")
+        with open(os.path.join(cache.audio_dir, url.rsplit("/", 1)[1]), "rb") as stored:
+            with wave.open(stored, "rb") as wav_file:
+                assert wav_file.readframes(wav_file.getnframes()) == piper["pcm"]
+        assert cache.get("Hello there.", tts.default_voice) == url
+    finally:
+        cache.close()
+
+
+def test_app_inlines_piper_audio_without_a_tts_cache(app_module, piper, monkeypatch, tmp_path):
+    tts = PiperTextToSpeech(str(tmp_path / "voice.onnx"))
+    monkeypatch.setattr(app_module, "tts_provider", tts)
+    monkeypatch.setattr(app_module, "tts_cache", None)
+
+    url = app_module._synthesize_uncached("Hello there.", tts.default_voice)
+
+    prefix = "data:audio/wav;base64,"
+    assert url.startswith(prefix)
+    with wave.open(io.BytesIO(base64.b64decode(url[len(prefix) :])), "rb") as wav_file:
+        assert wav_file.readframes(wav_file.getnframes()) == piper["pcm"]
+
+
+def test_readyz_reports_a_missing_speech_backend_package(app_module, monkeypatch, tmp_path):
+    monkeypatch.setitem(sys.modules, "vosk", None)  # find_spec reports it as not installed
+    monkeypatch.setattr(
+        app_module, "stt_provider", VoskSpeechToText(str(tmp_path), AudioSettings())
+    )
+    monkeypatch.setattr(app_module, "startup_state", {"vector_service": "ready"})
+    monkeypatch.setattr(app_module, "startup_errors", {})
+
+    app_module._load_providers()
+    response = asyncio.run(app_module.readiness())
+
+    assert response["status"] == "degraded"
+    assert response["providers"] == "failed"
+    assert "'vosk' needs vosk installed" in response["errors"]["providers"]
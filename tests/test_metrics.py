@@ -0,0 +1,141 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from services import metrics_service
+from services.metrics_service import (
+    MetricsRegistry,
+    ServerTimingMiddleware,
+    metrics,
+    operation_errors,
+    operation_seconds,
+    stage_seconds,
+    timed,
+)
+
+
+def _count(histogram, *labels: str) -> int:
+    counts, _ = histogram._series.get(labels, ([0], [0.0]))
+    return sum(counts)
+
+
+def test_counter_and_gauge_render_in_prometheus_text_format():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests.", ("route",))
+    requests.inc("/chat")
+    requests.inc("/chat", amount=2)
+    requests.inc('say "hi"\n')
+    queue = registry.gauge(
+        "queue_depth", "Queued jobs.", ("pool",), callback=lambda: {("ingestion",): 3}
+    )
+    queue.set(1, "llm")
+
+    assert registry.counter("requests_total", "Again.") is requests
+    assert registry.render().splitlines() == [
+        "# HELP requests_total Requests.",
+        "# TYPE requests_total counter",
+        'requests_total{route="/chat"} 3.0',
+        'requests_total{route="say \\"hi\\"\\n"} 1.0',
+        "# HELP queue_depth Queued jobs.",
+        "# TYPE queue_depth gauge",
+        'queue_depth{pool="ingestion"} 3',
+        'queue_depth{pool="llm"} 1',
+    ]
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = MetricsRegistry().histogram("latency", "Latency.", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value, "tts")
+
+    assert histogram.render()[2:] == [
+        'latency_bucket{stage="tts",le="0.1"} 2',
+        'latency_bucket{stage="tts",le="1.0"} 3',
+        'latency_bucket{stage="tts",le="+Inf"} 4',
+        'latency_sum{stage="tts"} 2.65',
+        'latency_count{stage="tts"} 4',
+    ]
+
+
+def test_concurrent_increments_are_not_lost():
+    counter = MetricsRegistry().counter("hits_total", "Hits.")
+
+    def hit():
+        for _ in range(1000):
+            counter.inc()
+
+    threads = [threading.Thread(target=hit) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert counter._values[()] == 8000
+
+
+def test_timed_records_durations_and_failures():
+    @timed("test", "sync_op")
+    def sync_op(fail: bool) -> str:
+        if fail:
+            raise ValueError("boom")
+        return "ok"
+
+    @timed("test", "async_op")
+    async def async_op() -> str:
+        return "ok"
+
+    assert sync_op(False) == "ok"
+    with pytest.raises(ValueError):
+        sync_op(True)
+    assert asyncio.run(async_op()) == "ok"
+
+    assert _count(operation_seconds, "test", "sync_op") == 2
+    assert operation_errors._values[("test", "sync_op")] == 1
+    assert _count(operation_seconds, "test", "async_op") == 1
+
+
+def test_disabled_registry_records_nothing(monkeypatch):
+    monkeypatch.setattr(metrics, "enabled", False)
+
+    @timed("test", "disabled_op")
+    def disabled_op() -> None:
+        return None
+
+    disabled_op()
+    with metrics.stage("disabled_stage"):
+        pass
+    assert _count(operation_seconds, "test", "disabled_op") == 0
+    assert _count(stage_seconds, "disabled_stage") == 0
+
+
+def _timed_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(ServerTimingMiddleware)
+
+    @app.get("/turn")
+    async def turn():
+        for stage in ("stt", "llm", "llm"):
+            with metrics.stage(stage):
+                await asyncio.sleep(0.01)
+        return {"ok": True}
+
+    return app
+
+
+def test_server_timing_header_sums_each_stage():
+    response = TestClient(_timed_app()).get("/turn")
+
+    entries = dict(
+        entry.split(";dur=") for entry in response.headers["server-timing"].split(", ")
+    )
+    assert list(entries) == ["stt", "llm", "total"]
+    assert float(entries["llm"]) >= 20
+    assert float(entries["total"]) >= float(entries["stt"]) + float(entries["llm"])
+    assert _count(stage_seconds, "llm") >= 2
+
+
+def test_stage_timings_outside_a_request_are_not_collected():
+    metrics_service.record_server_timing("llm", 1.0)
+    assert metrics_service._server_timing.get() is None
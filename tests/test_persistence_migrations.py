@@ -0,0 +1,93 @@
+import sqlite3
+
+from services.persistence_service import MIGRATIONS, SHARED_NAMESPACE, PersistenceService
+
+# The schema as shipped before migrations existed (user_version 0).
+BASELINE_SCHEMA = """
+CREATE TABLE sessions (
+    session_id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    metadata_json TEXT,
+    created_at TEXT NOT NULL,
+    FOREIGN KEY(session_id) REFERENCES sessions(session_id)
+);
+CREATE TABLE documents (
+    doc_id TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    content_type TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE chunks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    doc_id TEXT NOT NULL,
+    chunk_index INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    metadata_json TEXT,
+    created_at TEXT NOT NULL,
+    FOREIGN KEY(doc_id) REFERENCES documents(doc_id)
+);
+"""
+
+NOW = "2025-01-01T00:00:00+00:00"
+
+
+def _baseline_db(path: str) -> None:
+    conn = sqlite3.connect(path)
+    conn.executescript(BASELINE_SCHEMA)
+    conn.execute("INSERT INTO sessions VALUES ('s1', ?, ?)", (NOW, NOW))
+    conn.executemany(
+        "INSERT INTO messages (session_id, role, content, created_at) VALUES ('s1', ?, ?, ?)",
+        [("user", "where is my parcel", NOW), ("model", "it shipped today", NOW)],
+    )
+    conn.execute("INSERT INTO documents VALUES ('d1', 'faq.md', 'text/markdown', ?)", (NOW,))
+    conn.executemany(
+        "INSERT INTO chunks (doc_id, chunk_index, content, created_at) VALUES ('d1', ?, ?, ?)",
+        [(0, "refunds take five business days", NOW), (1, "parcels ship from Leeds", NOW)],
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_migrates_a_baseline_database_in_place(tmp_path):
+    db_path = str(tmp_path / "app.db")
+    _baseline_db(db_path)
+
+    store = PersistenceService(db_path)
+    try:
+        version = store._writer.execute("PRAGMA user_version").fetchone()[0]
+        assert version == len(MIGRATIONS)
+
+        [document] = store.list_documents()
+        assert document["chunk_count"] == 2
+        assert document["namespace"] == SHARED_NAMESPACE
+        assert [m["parts"][0] for m in store.get_session_messages("s1")] == [
+            "where is my parcel",
+            "it shipped today",
+        ]
+        if store.keyword_search_available:
+            # Existing chunks are indexed by the FTS rebuild, not only new inserts.
+            [hit] = store.keyword_search(["refunds"])
+            assert hit["id"] == "d1:0"
+    finally:
+        store.close()
+
+
+def test_reopening_a_migrated_database_is_a_no_op(tmp_path):
+    db_path = str(tmp_path / "app.db")
+    PersistenceService(db_path).close()
+
+    store = PersistenceService(db_path)
+    try:
+        version = store._writer.execute("PRAGMA user_version").fetchone()[0]
+        assert version == len(MIGRATIONS)
+        store.save_message("s2", "user", "hello")
+        assert store.count_session_messages("s2") == 1
+    finally:
+        store.close()
@@ -0,0 +1,90 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from services.persistence_service import PersistenceService
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = PersistenceService(str(tmp_path / "app.db"))
+    yield store
+    store.close()
+
+
+def _reader_in_thread(store: PersistenceService) -> sqlite3.Connection:
+    readers = []
+    thread = threading.Thread(target=lambda: readers.append(store._reader()))
+    thread.start()
+    thread.join()
+    return readers[0]
+
+
+def test_each_thread_gets_its_own_read_only_connection(store):
+    reader = store._reader()
+    assert store._reader() is reader
+    assert reader is not store._writer
+
+    other = _reader_in_thread(store)
+    assert other is not reader
+    assert len(store._readers) == 2
+    with pytest.raises(sqlite3.OperationalError):
+        reader.execute("DELETE FROM messages")
+
+
+def test_reads_are_not_blocked_by_an_open_write(store):
+    store.save_message("s1", "user", "committed")
+    in_transaction, release = threading.Event(), threading.Event()
+
+    def slow_write():
+        with store._write() as conn:
+            conn.execute(
+                "INSERT INTO messages (session_id, role, content, created_at) "
+                "VALUES ('s1', 'user', 'uncommitted', '2024-01-01T00:00:00Z')"
+            )
+            in_transaction.set()
+            release.wait(5)
+
+    writer = threading.Thread(target=slow_write)
+    writer.start()
+    try:
+        assert in_transaction.wait(5)
+        started = time.monotonic()
+        messages = store.get_session_message_range("s1", 0, -1)
+        assert time.monotonic() - started < 1
+        assert [message["parts"][0] for message in messages] == ["committed"]
+    finally:
+        release.set()
+        writer.join()
+    assert store.count_session_messages("s1") == 2
+
+
+def test_concurrent_writers_are_serialized(store):
+    def save(worker: int):
+        for index in range(25):
+            store.save_message(f"s{worker}", "user", f"message {index}")
+
+    threads = [threading.Thread(target=save, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for worker in range(8):
+        messages = store.get_session_message_range(f"s{worker}", 0, -1)
+        assert [message["parts"][0] for message in messages] == [
+            f"message {index}" for index in range(25)
+        ]
+
+
+def test_close_closes_every_connection(tmp_path):
+    store = PersistenceService(str(tmp_path / "app.db"))
+    readers = [store._reader(), _reader_in_thread(store)]
+    store.close()
+
+    assert store._readers == []
+    for conn in [*readers, store._writer]:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
@@ -0,0 +1,47 @@
+from services.prompt_service import (
+    MIN_PARTIAL_CHUNK_TOKENS,
+    PROMPT_INSTRUCTIONS,
+    PromptBuilder,
+    estimate_tokens,
+)
+
+QUESTION = "what is the refund policy?"
+
+
+def _chunk(chunk_id: str, **scores) -> dict:
+    content = " ".join([chunk_id] * 100)
+    metadata = {"doc_id": chunk_id, "chunk_index": 0, "source": f"{chunk_id}.txt"}
+    return {"id": chunk_id, "content": content, "metadata": metadata, **scores}
+
+
+def _room_for_one_chunk() -> PromptBuilder:
+    """A builder whose context budget fits one chunk, with too little left to trim a second."""
+    fixed = estimate_tokens(PROMPT_INSTRUCTIONS + f"User question:\n{QUESTION}")
+    fixed += estimate_tokens("No prior conversation.")
+    chunk_cost = estimate_tokens(_chunk("xx")["content"]) + 12
+    return PromptBuilder(max_tokens=fixed + chunk_cost + MIN_PARTIAL_CHUNK_TOKENS // 2)
+
+
+def _kept(builder: PromptBuilder, chunks: list[dict]) -> list[str]:
+    return [chunk["id"] for chunk in builder.build(QUESTION, [], chunks).chunks]
+
+
+def test_fused_keyword_hit_survives_a_tight_budget():
+    # BM25-only hits carry no distance, but RRF ranked this one first.
+    chunks = [
+        _chunk("kw", distance=None, rrf_score=0.032),
+        _chunk("vec", distance=0.1, rrf_score=0.016),
+    ]
+    assert _kept(_room_for_one_chunk(), chunks) == ["kw"]
+    assert _kept(_room_for_one_chunk(), list(reversed(chunks))) == ["kw"]
+
+
+def test_keyword_only_hits_keep_the_retriever_order():
+    chunks = [_chunk("first", distance=None), _chunk("second", distance=None)]
+    assert _kept(_room_for_one_chunk(), chunks) == ["first"]
+
+
+def test_vector_hits_are_ranked_by_distance():
+    chunks = [_chunk("far", distance=0.9), _chunk("near", distance=0.2)]
+    assert _kept(_room_for_one_chunk(), chunks) == ["near"]
+    assert _kept(PromptBuilder(), chunks) == ["near", "far"]
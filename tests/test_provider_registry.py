@@ -0,0 +1,89 @@
+import importlib.util
+import threading
+
+import pytest
+
+from services.provider_registry import ProviderRegistry
+
+
+@pytest.fixture
+def registry():
+    registry = ProviderRegistry(
+        assemblyai_api_key="aai-key",
+        gemini_api_key="gemini-key",
+        murf_api_key="murf-key",
+        assemblyai_base_url="https://stt.example.test/v2",
+    )
+    yield registry
+    registry.close()
+
+
+def test_http_clients_are_pooled_per_name(registry):
+    downloads = registry.download_client()
+    assert registry.download_client() is downloads
+    assert registry.http_client("murf") is not downloads
+
+
+def test_concurrent_first_use_builds_one_client(registry):
+    barrier = threading.Barrier(8)
+    clients = []
+
+    def get():
+        barrier.wait()
+        clients.append(registry.http_client("downloads"))
+
+    threads = [threading.Thread(target=get) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(client) for client in clients}) == 1
+
+
+def test_http2_falls_back_when_h2_is_missing(monkeypatch):
+    find_spec = importlib.util.find_spec
+    monkeypatch.setattr(
+        importlib.util, "find_spec", lambda name: None if name == "h2" else find_spec(name)
+    )
+    assert not ProviderRegistry(http2=True).http2
+    assert not ProviderRegistry(http2=False).http2
+
+
+@pytest.mark.skipif(importlib.util.find_spec("h2") is None, reason="h2 is not installed")
+def test_http2_is_used_when_h2_is_installed():
+    assert ProviderRegistry(http2=True).http2
+
+
+def test_transcriber_uses_the_pooled_client_with_sdk_settings(registry):
+    transcriber = registry.transcriber()
+    assert registry.transcriber() is transcriber
+
+    http = transcriber._client.http_client
+    assert http is registry.http_client("assemblyai")
+    assert str(http.base_url).startswith("https://stt.example.test/v2")
+    assert http.headers["authorization"] == "aai-key"
+
+
+def test_llm_models_are_reused_per_model_and_instruction(registry):
+    model = registry.llm_model("gemini-1.5-flash", "Be brief.")
+    assert registry.llm_model("gemini-1.5-flash", "Be brief.") is model
+    assert registry.llm_model("gemini-1.5-flash", "Be verbose.") is not model
+
+
+def test_murf_client_sends_requests_through_the_pool(registry):
+    murf = registry.murf_client()
+    assert registry.murf_client() is murf
+    pooled = registry.http_client("murf")
+    assert murf._client_wrapper.httpx_client.httpx_client is pooled
+    assert "origin" in pooled.params
+
+
+def test_close_closes_pooled_clients():
+    registry = ProviderRegistry()
+    client = registry.download_client()
+    registry.close()
+
+    assert client.is_closed
+    assert registry.download_client() is not client
+    registry.close()
@@ -0,0 +1,106 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from services.vector_service import MicroBatchEmbedder
+
+
+def _vector(text: str) -> list[float]:
+    return [float(len(text)), float(sum(map(ord, text)))]
+
+
+class _Encoder:
+    """Records each batch; holds the first one until released so callers can pile up."""
+
+    def __init__(self, result=None):
+        self.batches: list[list[str]] = []
+        self.result = result
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, texts: list[str]) -> list[list[float]]:
+        self.batches.append(list(texts))
+        if len(self.batches) == 1:
+            self.started.set()
+            self.release.wait(5)
+        if self.result is not None:
+            return self.result(texts)
+        return [_vector(text) for text in texts]
+
+
+def _embed_all(embedder: MicroBatchEmbedder, texts: list[str]) -> list:
+    """Embeds each text on its own thread; returns vectors or the raised exceptions."""
+
+    def embed(text):
+        try:
+            return embedder.embed(text)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=len(texts)) as pool:
+        futures = [pool.submit(embed, text) for text in texts]
+        return [future.result(timeout=5) for future in futures]
+
+
+def test_concurrent_queries_share_one_batch_in_order():
+    encoder = _Encoder()
+    encoder.release.set()
+    embedder = MicroBatchEmbedder(encoder, max_batch_size=32, max_wait_ms=200)
+    texts = [f"question {n}" for n in range(8)]
+
+    assert _embed_all(embedder, texts) == [_vector(text) for text in texts]
+    assert len(encoder.batches) == 1
+    assert sorted(encoder.batches[0]) == sorted(texts)
+    assert embedder.stats()["avg_batch_size"] == 8
+
+
+def test_identical_queries_are_encoded_once_and_then_cached():
+    encoder = _Encoder()
+    encoder.release.set()
+    embedder = MicroBatchEmbedder(encoder, max_wait_ms=200)
+
+    results = _embed_all(embedder, ["Refund policy", "refund  POLICY"] * 3)
+    assert all(result == _vector("refund policy") for result in results)
+    assert encoder.batches == [["refund policy"]]
+
+    assert embedder.embed("REFUND policy") == _vector("refund policy")
+    assert len(encoder.batches) == 1
+    assert embedder.stats()["hits"] == 1
+
+
+def test_batches_are_capped_at_max_batch_size():
+    encoder = _Encoder()
+    embedder = MicroBatchEmbedder(encoder, max_batch_size=3, max_wait_ms=50)
+    first = threading.Thread(target=embedder.embed, args=("first",))
+    first.start()
+    assert encoder.started.wait(5)
+
+    texts = [f"queued {n}" for n in range(7)]
+    pending = threading.Thread(target=_embed_all, args=(embedder, texts))
+    pending.start()
+    encoder.release.set()
+    first.join(5)
+    pending.join(5)
+
+    assert [len(batch) for batch in encoder.batches[1:]] == [3, 3, 1]
+
+
+@pytest.mark.parametrize(
+    "result",
+    [
+        lambda texts: [_vector(text) for text in texts[:-1]],  # one vector short
+        lambda texts: (_ for _ in ()).throw(RuntimeError("model crashed")),
+    ],
+    ids=["short-result", "encoder-raises"],
+)
+def test_a_failed_batch_fails_every_caller_and_the_worker_recovers(result):
+    encoder = _Encoder(result)
+    encoder.release.set()
+    embedder = MicroBatchEmbedder(encoder, max_wait_ms=200)
+
+    results = _embed_all(embedder, ["a", "b", "c"])
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    encoder.result = None
+    assert embedder.embed("a") == _vector("a")
@@ -0,0 +1,104 @@
+import io
+import wave
+from array import array
+
+import pytest
+
+from services.realtime_stt_service import (
+    AssemblyAIStreamingTranscriber,
+    LocalStreamingTranscriber,
+    pcm16_to_wav,
+)
+
+SAMPLE_RATE = 16000
+FRAME_SAMPLES = 320  # 20 ms
+
+
+def _frame(amplitude: int) -> bytes:
+    return array("h", [amplitude if i % 2 else -amplitude for i in range(FRAME_SAMPLES)]).tobytes()
+
+
+def _unexpected_call(pcm: bytes) -> str:
+    raise AssertionError("the transcriber should not run for silence")
+
+
+def _transcriber(transcribe_fn):
+    events = []
+    transcriber = LocalStreamingTranscriber(
+        lambda kind, text: events.append((kind, text)),
+        transcribe_fn=transcribe_fn,
+        sample_rate=SAMPLE_RATE,
+        end_utterance_silence_ms=100,
+    )
+    return transcriber, events
+
+
+def test_silence_after_speech_ends_the_utterance():
+    utterances = []
+
+    def transcribe(pcm: bytes) -> str:
+        utterances.append(pcm)
+        return " hello there "
+
+    transcriber, events = _transcriber(transcribe)
+    for _ in range(3):
+        transcriber.send_audio(_frame(0))
+    for _ in range(10):
+        transcriber.send_audio(_frame(4000))
+    for _ in range(5):
+        transcriber.send_audio(_frame(0))
+
+    assert events == [("final", "hello there")]
+    # Leading silence is dropped; speech plus the trailing silence is kept.
+    assert len(utterances) == 1
+    assert len(utterances[0]) == 15 * FRAME_SAMPLES * 2
+
+
+def test_silence_only_never_calls_the_transcriber():
+    transcriber, events = _transcriber(_unexpected_call)
+    for _ in range(50):
+        transcriber.send_audio(_frame(10))
+    transcriber.end_utterance()
+    # A manual stop is still answered, so the client can leave "processing".
+    assert events == [("empty", "")]
+
+
+def test_unrecognized_speech_is_reported_as_empty():
+    transcriber, events = _transcriber(lambda pcm: "  ")
+    transcriber.send_audio(_frame(4000))
+    transcriber.end_utterance()
+    assert events == [("empty", "")]
+
+
+def test_transcription_errors_are_reported_as_events():
+    def transcribe(pcm: bytes) -> str:
+        raise RuntimeError("provider down")
+
+    transcriber, events = _transcriber(transcribe)
+    transcriber.send_audio(_frame(4000))
+    transcriber.end_utterance()
+    assert events == [("error", "provider down")]
+
+
+def test_pcm16_to_wav_framing():
+    pcm = _frame(1000) * 5
+    with wave.open(io.BytesIO(pcm16_to_wav(pcm, SAMPLE_RATE))) as wav_file:
+        assert wav_file.getnchannels() == 1
+        assert wav_file.getsampwidth() == 2
+        assert wav_file.getframerate() == SAMPLE_RATE
+        assert wav_file.readframes(wav_file.getnframes()) == pcm
+
+
+def test_assemblyai_final_transcripts_always_produce_an_event():
+    aai = pytest.importorskip("assemblyai")
+    events = []
+    # Skips __init__, which would open a realtime session.
+    transcriber = AssemblyAIStreamingTranscriber.__new__(AssemblyAIStreamingTranscriber)
+    transcriber._on_event = lambda kind, text: events.append((kind, text))
+
+    transcriber._handle_data(aai.RealtimePartialTranscript.construct(text=""))
+    transcriber._handle_data(aai.RealtimePartialTranscript.construct(text="turn"))
+    transcriber._handle_data(aai.RealtimeFinalTranscript.construct(text="turn on "))
+    transcriber._handle_data(aai.RealtimeFinalTranscript.construct(text=""))
+
+    assert events == [("partial", "turn"), ("final", "turn on"), ("empty", "")]
@@ -0,0 +1,166 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from services.executor_service import StageExecutor
+from services.resilience import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    ProviderGuard,
+    TurnBudget,
+)
+
+
+@pytest.fixture
+def executor():
+    executor = StageExecutor({"llm": 4, "tts": 4})
+    yield executor
+    executor.shutdown(wait=False)
+
+
+@pytest.fixture
+def release():
+    """Unblocks stalled provider threads at teardown."""
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+def _guard(executor, timeout=1.0, **kwargs) -> ProviderGuard:
+    return ProviderGuard("gemini", "llm", executor, timeout=timeout, **kwargs)
+
+
+def _collect(guard: ProviderGuard, fn, **kwargs) -> list:
+    async def consume():
+        return [chunk async for chunk in guard.stream(fn, **kwargs)]
+
+    return asyncio.run(consume())
+
+
+def test_breaker_opens_fails_fast_and_recovers_through_one_trial():
+    breaker = CircuitBreaker("tts", failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.state == CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN and breaker.opens == 1
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()  # one trial call at a time
+
+    breaker.record_failure()  # a failed trial re-opens at once
+    assert breaker.state == OPEN and breaker.opens == 2
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.allow()
+
+
+def test_released_trial_lets_the_next_call_through():
+    breaker = CircuitBreaker("tts", failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+
+
+def test_guard_fails_fast_while_the_breaker_is_open(executor):
+    calls = []
+    guard = _guard(executor, breaker=CircuitBreaker("gemini", failure_threshold=1))
+    guard.breaker.record_failure()
+
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(guard.call(calls.append, "hello"))
+    assert calls == []
+    assert not guard.available()
+
+
+def test_call_timeout_counts_as_a_breaker_failure(executor, release):
+    guard = _guard(executor, timeout=0.1)
+    with pytest.raises(TimeoutError):
+        asyncio.run(guard.call(release.wait, 5))
+    assert guard.timeouts == 1
+    assert guard.breaker._failures == 1
+
+
+def test_call_without_budget_left_is_not_attempted(executor):
+    calls = []
+    guard = _guard(executor)
+    with pytest.raises(TimeoutError):
+        asyncio.run(guard.call(calls.append, "hello", deadline=time.monotonic() - 1))
+    assert calls == []
+
+
+def test_slow_call_is_hedged_and_the_faster_copy_wins(executor, release):
+    guard = _guard(executor, hedge=True, hedge_min_samples=3)
+    for _ in range(3):
+        guard.latency.add(0.01)
+    attempts = []
+
+    def generate():
+        attempts.append(None)
+        if len(attempts) == 1:
+            release.wait(5)  # the primary request stalls
+            return "primary"
+        return "hedge"
+
+    assert asyncio.run(guard.call(generate)) == "hedge"
+    assert guard.hedges == 1 and guard.hedge_wins == 1
+
+
+def test_stream_yields_chunks_and_records_success(executor):
+    guard = _guard(executor, breaker=CircuitBreaker("gemini", failure_threshold=2))
+    guard.breaker.record_failure()
+    assert _collect(guard, lambda: iter(["a", "b", "c"])) == ["a", "b", "c"]
+    assert guard.breaker._failures == 0
+
+
+def test_stream_errors_propagate_and_count_as_failures(executor):
+    def chunks():
+        yield "a"
+        raise ValueError("provider error")
+
+    guard = _guard(executor)
+    with pytest.raises(ValueError):
+        _collect(guard, chunks)
+    assert guard.breaker._failures == 1
+
+
+def test_stalled_stream_is_cut_off_at_its_deadline(executor, release):
+    def chunks():
+        yield "first"
+        release.wait(5)  # the provider stops sending mid-stream
+        yield "late"
+
+    guard = _guard(executor, timeout=0.5)
+    received = []
+
+    async def consume():
+        async for chunk in guard.stream(chunks):
+            received.append(chunk)
+
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        asyncio.run(consume())
+    assert time.monotonic() - started < 1.5
+    assert received == ["first"]
+    assert guard.timeouts == 1
+
+
+def test_turn_budget():
+    assert TurnBudget(None).remaining() is None
+    assert TurnBudget(None).allows(1000)
+
+    budget = TurnBudget(10)
+    assert 9 < budget.remaining() <= 10
+    assert budget.allows(5) and not budget.allows(11)
+    budget.degrade("text_only")
+    budget.degrade("text_only")
+    assert budget.degraded == ["text_only"]
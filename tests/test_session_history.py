@@ -0,0 +1,63 @@
+import pytest
+
+from services.persistence_service import PersistenceService
+from services.prompt_service import PromptBuilder, SessionSummarizer
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = PersistenceService(str(tmp_path / "app.db"))
+    yield store
+    store.close()
+
+
+def _chat(store: PersistenceService, session_id: str, turns: int) -> None:
+    for turn in range(turns):
+        store.save_message(session_id, "user", f"question {turn}")
+        store.save_message(session_id, "model", f"answer {turn}")
+
+
+def _summarizer(store: PersistenceService, folded: list) -> SessionSummarizer:
+    def summarize(previous: str, messages: list[dict]) -> str:
+        folded.extend(message["parts"][0] for message in messages)
+        return f"{previous} +{len(messages)}".strip()
+
+    return SessionSummarizer(store, summarize, keep_recent=6, min_batch=6)
+
+
+def test_messages_stay_in_the_prompt_until_they_are_summarized(store):
+    folded: list[str] = []
+    summarizer = _summarizer(store, folded)
+    _chat(store, "s1", 5)  # 10 messages: 4 aged out, below the batch of 6
+
+    assert not summarizer.maybe_update("s1")
+    unsummarized = store.get_session_messages_since("s1", 0)
+    assert len(unsummarized) == 10
+
+    prompt = PromptBuilder(history_tokens=1000).build("next?", unsummarized, [])
+    for turn in range(5):
+        assert f"question {turn}" in prompt.prompt
+
+
+def test_history_resumes_right_after_the_summary(store):
+    folded: list[str] = []
+    summarizer = _summarizer(store, folded)
+    _chat(store, "s1", 8)
+
+    assert summarizer.maybe_update("s1")
+    summary = store.get_session_summary("s1")
+    assert summary["summarized_count"] == 10
+    rest = store.get_session_messages_since("s1", summary["summarized_count"])
+
+    assert folded + [m["parts"][0] for m in rest] == [
+        text for turn in range(8) for text in (f"question {turn}", f"answer {turn}")
+    ]
+
+
+def test_queued_write_behind_messages_are_included(tmp_path):
+    store = PersistenceService(str(tmp_path / "wb.db"), write_behind=True, flush_interval_ms=60_000)
+    try:
+        store.save_message("s1", "user", "queued")
+        assert [m["parts"][0] for m in store.get_session_messages_since("s1", 0)] == ["queued"]
+    finally:
+        store.close()
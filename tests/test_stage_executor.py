@@ -0,0 +1,122 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from services.executor_service import DEFAULT_STAGE_LIMITS, StageExecutor
+
+
+@pytest.fixture
+def executor():
+    executor = StageExecutor({"tts": 2, "persistence": 1})
+    yield executor
+    executor.shutdown(wait=False)
+
+
+def test_run_returns_results_off_the_event_loop(executor):
+    loop_thread = threading.get_ident()
+
+    def add(x, y=0):
+        return threading.get_ident(), x + y
+
+    async def main():
+        return await executor.run("persistence", add, 1, y=2)
+
+    worker_thread, value = asyncio.run(main())
+    assert value == 3
+    assert worker_thread != loop_thread
+
+
+def test_unknown_stage_is_rejected(executor):
+    with pytest.raises(ValueError):
+        asyncio.run(executor.run("gpu", print))
+    with pytest.raises(ValueError):
+        executor.submit("gpu", print)
+
+
+def test_a_saturated_stage_does_not_delay_other_stages(executor):
+    release = threading.Event()
+
+    async def main():
+        # Fill the tts pool (2 threads) plus one queued call.
+        stalled = [
+            asyncio.ensure_future(executor.run("tts", release.wait, 5)) for _ in range(3)
+        ]
+        started = time.monotonic()
+        assert await executor.run("persistence", lambda: "saved") == "saved"
+        elapsed = time.monotonic() - started
+        release.set()
+        await asyncio.gather(*stalled)
+        return elapsed
+
+    assert asyncio.run(main()) < 1
+
+
+def test_stage_limits_bound_concurrency(executor):
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def work():
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+        time.sleep(0.05)
+        with lock:
+            active.pop()
+
+    async def main():
+        await asyncio.gather(*(executor.run("tts", work) for _ in range(6)))
+
+    asyncio.run(main())
+    assert max(peak) == 2
+
+
+def test_event_loop_keeps_running_while_a_stage_blocks(executor):
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        await executor.run("tts", time.sleep, 0.2)
+        task.cancel()
+        return ticks
+
+    assert asyncio.run(main()) >= 5
+
+
+def test_submit_runs_in_the_background(executor):
+    future = executor.submit("persistence", lambda: "done")
+    assert future.result(timeout=5) == "done"
+
+
+def test_stream_yields_items_as_they_are_produced(executor):
+    def produce():
+        yield 1
+        yield 2
+        raise RuntimeError("provider failed")
+
+    async def main():
+        received = []
+        with pytest.raises(RuntimeError):
+            async for item in executor.stream("tts", produce):
+                received.append(item)
+        return received
+
+    assert asyncio.run(main()) == [1, 2]
+
+
+def test_from_env_reads_stage_limits(monkeypatch):
+    monkeypatch.setenv("STAGE_CONCURRENCY_LLM", "3")
+    executor = StageExecutor.from_env()
+    try:
+        assert executor.limits["llm"] == 3
+        assert executor.limits["tts"] == DEFAULT_STAGE_LIMITS["tts"]
+    finally:
+        executor.shutdown(wait=False)
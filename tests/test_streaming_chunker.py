@@ -0,0 +1,43 @@
+import random
+
+import pytest
+
+from services.ingestion_service import iter_text_chunks
+
+VOCABULARY = ["voice", "agent", "über", "naïve", "café", "日本語", "x", "retrieval"]
+
+
+def _reference_chunks(text: str, chunk_size: int = 180, overlap: int = 40) -> list[str]:
+    """The original whole-document chunker the streaming one replaced."""
+    words = text.split()
+    step = max(1, chunk_size - overlap)
+    return [" ".join(words[start : start + chunk_size]) for start in range(0, len(words), step)]
+
+
+def _blocks(data: bytes, size: int) -> list[bytes]:
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+def _corpus(words: int, seed: int) -> str:
+    rng = random.Random(seed)
+    separators = [" ", "  ", "\n", "\t", " \n "]
+    return "".join(rng.choice(VOCABULARY) + rng.choice(separators) for _ in range(words))
+
+
+@pytest.mark.parametrize("words", [0, 1, 139, 140, 180, 181, 320, 1000])
+@pytest.mark.parametrize("block_size", [1, 7, 64, 1024 * 1024])
+def test_matches_the_reference_chunker(words, block_size):
+    text = _corpus(words, seed=words)
+    chunks = list(iter_text_chunks(_blocks(text.encode("utf-8"), block_size)))
+    assert chunks == _reference_chunks(text)
+
+
+def test_custom_window_sizes():
+    text = _corpus(97, seed=3)
+    chunks = list(iter_text_chunks(_blocks(text.encode("utf-8"), 5), chunk_size=10, overlap=3))
+    assert chunks == _reference_chunks(text, chunk_size=10, overlap=3)
+
+
+def test_text_without_trailing_whitespace_keeps_the_last_word():
+    chunks = list(iter_text_chunks([b"alpha be", b"ta gam", b"ma"], chunk_size=2, overlap=0))
+    assert chunks == ["alpha beta", "gamma"]
@@ -0,0 +1,104 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from services.resilience import TurnBudget
+from services.streaming_service import SentenceChunker, format_sse
+
+
+def test_chunker_releases_complete_sentences_only():
+    chunker = SentenceChunker(min_chars=0)
+    assert chunker.feed("Refunds take five") == []
+    assert chunker.feed(" days. Shipping is") == ["Refunds take five days."]
+    assert chunker.feed(' free!" Anything') == ['Shipping is free!"']
+    assert chunker.flush() == ["Anything"]
+    assert chunker.flush() == []
+
+
+def test_chunker_merges_short_sentences():
+    chunker = SentenceChunker(min_chars=20)
+    assert chunker.feed("Hi. Yes. ") == []
+    assert chunker.feed("That is all covered. ") == ["Hi. Yes. That is all covered."]
+
+
+def test_chunker_splits_sentences_over_the_tts_limit():
+    chunker = SentenceChunker(min_chars=0, max_chars=20)
+    parts = chunker.feed("one two three four five six seven eight. ")
+    assert parts == ["one two three four", "five six seven", "eight."]
+    assert all(len(part) <= 20 for part in parts)
+
+
+def test_format_sse():
+    event = format_sse("audio", {"index": 0, "text": "Hi."})
+    assert event.startswith("event: audio\ndata: ")
+    assert event.endswith("\n\n")
+    assert json.loads(event.split("data: ", 1)[1]) == {"index": 0, "text": "Hi."}
+
+
+def _fake_turn(app_module, monkeypatch, pieces, delays):
+    async def prepare(session_id, user_message, namespace, budget):
+        return "prompt", []
+
+    async def no_cache(user_message, chunks, kind):
+        return None, None
+
+    async def synthesize(text, budget):
+        # Later sentences finish first, so ordering is up to the pipeline.
+        await asyncio.sleep(delays.get(text, 0))
+        return f"/audio/{text}.mp3"
+
+    class Model:
+        def generate_content(self, prompt, **kwargs):
+            return iter(SimpleNamespace(text=piece) for piece in pieces)
+
+    saved = []
+    monkeypatch.setattr(app_module, "_prepare_turn_context", prepare)
+    monkeypatch.setattr(app_module, "_lookup_cached_answer", no_cache)
+    monkeypatch.setattr(app_module, "_synthesize_turn_audio", synthesize)
+    monkeypatch.setattr(app_module, "_get_llm_model", lambda: Model())
+    monkeypatch.setattr(app_module, "_schedule_summary_update", lambda session_id: None)
+    monkeypatch.setattr(
+        app_module.persistence_service,
+        "save_message",
+        lambda session_id, role, text, metadata=None: saved.append((role, text)),
+    )
+    return saved
+
+
+def _run_turn(app_module) -> list[tuple[str, dict]]:
+    async def consume():
+        return [
+            event
+            async for event in app_module._stream_llm_to_speech(
+                "session", "question", None, TurnBudget(None)
+            )
+        ]
+
+    return asyncio.run(consume())
+
+
+def test_audio_events_stay_in_sentence_order(app_module, monkeypatch):
+    first = "The first sentence is slow to synthesize."
+    second = "The second sentence comes back much sooner."
+    pieces = [first[:10], first[10:] + " ", second[:20], second[20:]]
+    saved = _fake_turn(app_module, monkeypatch, pieces, {first: 0.2})
+
+    events = _run_turn(app_module)
+
+    assert [event for event, _ in events] == ["sources", "audio", "audio", "done"]
+    audio = [data for event, data in events if event == "audio"]
+    assert [(data["index"], data["text"]) for data in audio] == [(0, first), (1, second)]
+    assert audio[0]["audio_url"] == f"/audio/{first}.mp3"
+    assert events[-1][1]["text"] == f"{first} {second}"
+    assert saved == [("model", f"{first} {second}")]
+
+
+def test_empty_llm_answer_speaks_the_error_reply(app_module, monkeypatch):
+    saved = _fake_turn(app_module, monkeypatch, ["", "  "], {})
+
+    events = _run_turn(app_module)
+
+    error_reply = app_module.ERROR_RESPONSES["llm_error"]
+    audio = [data for event, data in events if event == "audio"]
+    assert [data["text"] for data in audio] == [error_reply]
+    assert saved == [("model", error_reply)]
@@ -0,0 +1,68 @@
+import os
+
+import pytest
+
+from services.answer_cache import AnswerCache
+from services.tts_cache import TTSCache
+
+VOICE = "en-US-natalie"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = TTSCache(audio_dir=str(tmp_path / "audio"), max_bytes=250)
+    yield cache
+    cache.close()
+
+
+def _file(cache: TTSCache, url: str) -> str:
+    return os.path.join(cache.audio_dir, url.rsplit("/", 1)[1])
+
+
+def test_store_and_get(cache):
+    url = cache.store_bytes("hello", VOICE, b"x" * 100, ".wav")
+    assert url.startswith("/audio/") and url.endswith(".wav")
+    assert cache.get("hello", VOICE) == url
+    assert cache.get("hello", "other-voice") is None
+
+
+def test_identical_audio_is_stored_once(cache):
+    first = cache.store_bytes("hi", VOICE, b"same", ".wav")
+    second = cache.store_bytes("hi!", VOICE, b"same", ".wav")
+    assert first == second
+    assert cache.stats()["files"] == 1
+
+
+def test_touch_protects_audio_still_referenced_by_a_cached_answer(cache):
+    kept = cache.store_bytes("kept", VOICE, b"a" * 100, ".wav")
+    dropped = cache.store_bytes("dropped", VOICE, b"b" * 100, ".wav")
+    # "kept" is older, but a cached answer has just replayed it.
+    assert cache.touch([kept, "https://provider.example/remote.mp3"])
+
+    cache.store_bytes("new", VOICE, b"c" * 100, ".wav")
+
+    assert os.path.isfile(_file(cache, kept))
+    assert not os.path.isfile(_file(cache, dropped))
+    assert cache.get("dropped", VOICE) is None
+
+
+def test_touch_reports_evicted_audio(cache):
+    url = cache.store_bytes("gone", VOICE, b"a" * 100, ".wav")
+    os.remove(_file(cache, url))
+    assert not cache.touch([url])
+
+
+def test_answer_with_missing_audio_is_a_miss(cache):
+    answers = AnswerCache()
+    chunks = frozenset({"doc:0"})
+    url = cache.store_bytes("answer", VOICE, b"a" * 100, ".wav")
+    answers.store("question", None, chunks, "p", "answer", [("answer", url)], 1.0)
+
+    def audio_available(answer) -> bool:
+        return cache.touch([audio_url for _, audio_url in answer.segments])
+
+    assert answers.lookup("question", None, chunks, "p", validate=audio_available) is not None
+    os.remove(_file(cache, url))
+    assert answers.lookup("question", None, chunks, "p", validate=audio_available) is None
+    # The dead entry is dropped rather than rejected on every lookup.
+    assert answers.stats()["entries"] == 0
@@ -0,0 +1,161 @@
+import asyncio
+import threading
+from multiprocessing.connection import AuthenticationError
+from types import SimpleNamespace
+
+import pytest
+
+from services.vector_server import (
+    RemoteIngestionJobQueue,
+    RemoteVectorError,
+    RemoteVectorService,
+    VectorServer,
+    VectorServiceClient,
+)
+
+AUTHKEY = b"test-key"
+
+
+class FakeVectorService:
+    def __init__(self):
+        self.upserts = []
+        self.query_embedder = SimpleNamespace(stats=lambda: {"batches": 3})
+
+    def warm_up(self) -> None:
+        pass
+
+    def upsert_chunks(self, ids, chunks, metadatas, namespace="shared") -> None:
+        self.upserts.append((ids, chunks, metadatas, namespace))
+
+    def query(self, query_text, top_k=4, namespaces=None):
+        if query_text == "boom":
+            raise ValueError("index is corrupt")
+        return [{"id": f"{query_text}:{top_k}", "namespaces": namespaces}]
+
+    def shard_stats(self):
+        return {"open_shards": 1, "max_open_shards": 64}
+
+
+class FakeJobQueue:
+    def __init__(self):
+        self.jobs = {}
+
+    def submit(self, filename, content_type, spool_path, size, **kwargs):
+        job = SimpleNamespace(to_dict=lambda: {"job_id": filename, "size": size, **kwargs})
+        self.jobs[filename] = job
+        return job
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+
+@pytest.fixture(scope="module")
+def server(tmp_path_factory):
+    address = str(tmp_path_factory.mktemp("vector") / "vector.sock")
+    server = VectorServer(address, FakeVectorService(), FakeJobQueue(), authkey=AUTHKEY)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    VectorServiceClient(address, authkey=AUTHKEY).wait_ready(5)
+    return server
+
+
+@pytest.fixture
+def client(server):
+    return VectorServiceClient(server.address, authkey=AUTHKEY)
+
+
+def test_vector_calls_run_in_the_server_process(server, client):
+    remote = RemoteVectorService(client, connect_timeout=5)
+    remote.warm_up()
+
+    assert remote.query("refunds", top_k=2, namespaces=["acme"]) == [
+        {"id": "refunds:2", "namespaces": ["acme"]}
+    ]
+    remote.upsert_chunks(["doc:0"], ["text"], [{"doc_id": "doc"}], namespace="acme")
+    assert server.vector_service.upserts[-1] == (["doc:0"], ["text"], [{"doc_id": "doc"}], "acme")
+    assert remote.query_embedder.stats() == {"batches": 3}
+
+
+def test_server_errors_are_raised_in_the_caller(client):
+    with pytest.raises(RemoteVectorError, match="ValueError: index is corrupt"):
+        RemoteVectorService(client).query("boom")
+    with pytest.raises(RemoteVectorError, match="Unknown vector server method"):
+        client.call("drop_everything")
+    assert client.call("shard_stats")["open_shards"] == 1  # the connection is still usable
+
+
+def test_ingestion_jobs_are_tracked_by_the_server(client):
+    jobs = RemoteIngestionJobQueue(client)
+    job = jobs.submit("notes.md", "text/markdown", "/tmp/spool", 42, namespace="acme")
+
+    assert job.to_dict()["namespace"] == "acme"
+    assert jobs.get("notes.md").to_dict() == job.to_dict()
+    assert jobs.get("missing") is None
+
+
+def test_each_thread_uses_its_own_connection(client):
+    results, connections = {}, set()
+    barrier = threading.Barrier(8)
+
+    def query(worker: int):
+        barrier.wait()
+        for top_k in range(20):
+            assert client.call("query", f"q{worker}", top_k=top_k)[0]["id"] == f"q{worker}:{top_k}"
+        connections.add(id(client._connection()))
+        results[worker] = True
+
+    threads = [threading.Thread(target=query, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 8 and len(connections) == 8
+
+
+def test_only_idempotent_calls_are_retried_on_a_dropped_connection(client):
+    client.call("shard_stats")
+    client._connection().close()
+    assert client.call("shard_stats")["open_shards"] == 1
+
+    client._connection().close()
+    with pytest.raises(OSError):
+        client.call("submit_job", "retry.md", None, "/tmp/spool", 1)
+    assert client.call("get_job", "retry.md") is None
+
+
+def test_bad_auth_key_is_rejected_and_the_server_keeps_serving(server, client):
+    with pytest.raises(AuthenticationError):
+        VectorServiceClient(server.address, authkey=b"wrong").call("shard_stats")
+    assert client.call("shard_stats")["open_shards"] == 1
+
+
+def test_wait_ready_gives_up_when_no_server_listens(tmp_path):
+    with pytest.raises(TimeoutError):
+        VectorServiceClient(str(tmp_path / "absent.sock")).wait_ready(0.3)
+
+
+def test_app_runs_vector_rpcs_off_the_event_loop(app_module, monkeypatch):
+    threads = []
+
+    def stats():
+        threads.append(threading.current_thread())
+        return {}
+
+    def get_job(job_id):
+        threads.append(threading.current_thread())
+        return None
+
+    remote = SimpleNamespace(query_embedder=SimpleNamespace(stats=stats), shard_stats=stats)
+    jobs = SimpleNamespace(get=get_job)
+    monkeypatch.setattr(app_module, "vector_service", remote)
+    monkeypatch.setattr(app_module, "ingestion_jobs", jobs)
+
+    async def scrape():
+        await app_module.get_stats()
+        with pytest.raises(app_module.HTTPException):
+            await app_module.get_ingestion_job("missing")
+        return threading.current_thread()
+
+    loop_thread = asyncio.run(scrape())
+    assert len(threads) == 3
+    assert loop_thread not in threads
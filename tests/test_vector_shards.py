@@ -0,0 +1,127 @@
+import re
+import sys
+import threading
+from collections import OrderedDict
+from types import ModuleType, SimpleNamespace
+
+import pytest
+
+from services.persistence_service import SHARED_NAMESPACE
+from services.vector_service import VectorService
+
+
+@pytest.fixture
+def missing_collection_error(monkeypatch):
+    """The exception Chroma raises for an unknown collection (a stand-in if not installed)."""
+    try:
+        from chromadb.errors import InvalidCollectionException
+    except ImportError:
+        InvalidCollectionException = type("InvalidCollectionException", (Exception,), {})
+        errors = ModuleType("chromadb.errors")
+        errors.InvalidCollectionException = InvalidCollectionException
+        monkeypatch.setitem(sys.modules, "chromadb", ModuleType("chromadb"))
+        monkeypatch.setitem(sys.modules, "chromadb.errors", errors)
+    return InvalidCollectionException
+
+
+class FakeCollection:
+    def __init__(self, distances: dict[str, float]):
+        self.distances = distances
+
+    def upsert(self, ids, documents, metadatas) -> None:
+        for chunk_id in ids:
+            self.distances.setdefault(chunk_id, 0.5)
+
+    def query(self, query_embeddings, n_results):
+        hits = sorted(self.distances.items(), key=lambda item: item[1])[:n_results]
+        return {
+            "ids": [[chunk_id for chunk_id, _ in hits]],
+            "documents": [[f"text of {chunk_id}" for chunk_id, _ in hits]],
+            "metadatas": [[{} for _ in hits]],
+            "distances": [[distance for _, distance in hits]],
+        }
+
+
+class FakeClient:
+    def __init__(self, error: type[Exception]):
+        self.error = error
+        self.collections: dict[str, FakeCollection] = {}
+        self.opened: list[str] = []
+
+    def get_or_create_collection(self, name, embedding_function, metadata):
+        self.opened.append(name)
+        return self.collections.setdefault(name, FakeCollection({}))
+
+    def get_collection(self, name, embedding_function):
+        self.opened.append(name)
+        if name not in self.collections:
+            raise self.error(name)
+        return self.collections[name]
+
+
+def _service(error: type[Exception], max_open_shards: int = 64) -> VectorService:
+    # Skips __init__, which loads Chroma and the embedding model.
+    service = VectorService.__new__(VectorService)
+    service._client = FakeClient(error)
+    service.collection_name = "rag_chunks"
+    service.max_open_shards = max_open_shards
+    service._shards = OrderedDict()
+    service._shards_lock = threading.Lock()
+    service._embedding_function = None
+    service.query_embedder = SimpleNamespace(embed=lambda text: [0.0])
+    return service
+
+
+def test_shard_names_are_stable_valid_collection_names():
+    service = _service(Exception)
+    assert service.shard_name(SHARED_NAMESPACE) == "rag_chunks"
+
+    names = {service.shard_name(namespace) for namespace in ("tenant a", "tenant/b", "ü" * 500)}
+    assert len(names) == 3
+    for name in names:
+        assert re.fullmatch(r"[a-zA-Z0-9._-]{3,63}", name)
+    assert service.shard_name("tenant a") == service.shard_name("tenant a")
+
+
+def test_shards_are_created_on_first_write_only(missing_collection_error):
+    service = _service(missing_collection_error)
+
+    assert service.query("refunds", namespaces=["acme"]) == []
+    service.delete_by_doc_id("doc", namespace="acme")
+    assert service._client.collections == {}
+
+    service.upsert_chunks(["doc:0"], ["text"], [{}], namespace="acme")
+    assert list(service._client.collections) == [service.shard_name("acme")]
+    assert [row["id"] for row in service.query("refunds", namespaces=["acme"])] == ["doc:0"]
+
+
+def test_query_only_searches_the_requested_shards_and_merges_by_distance(
+    missing_collection_error,
+):
+    service = _service(missing_collection_error)
+    collections = service._client.collections
+    collections["rag_chunks"] = FakeCollection({"shared:0": 0.2, "shared:1": 0.6})
+    collections[service.shard_name("acme")] = FakeCollection({"acme:0": 0.1, "acme:1": 0.4})
+    collections[service.shard_name("other")] = FakeCollection({"other:0": 0.0})
+
+    rows = service.query("refunds", top_k=3, namespaces=[SHARED_NAMESPACE, "acme", "acme"])
+
+    assert [row["id"] for row in rows] == ["acme:0", "shared:0", "acme:1"]
+    assert service.shard_name("other") not in service._client.opened
+
+
+def test_open_shards_are_kept_in_an_lru(missing_collection_error):
+    service = _service(missing_collection_error, max_open_shards=2)
+    for namespace in ("a", "b"):
+        service.upsert_chunks([f"{namespace}:0"], ["text"], [{}], namespace=namespace)
+    service.query("refunds", namespaces=["a"])  # "b" is now least recently used
+    service.upsert_chunks(["c:0"], ["text"], [{}], namespace="c")
+
+    assert list(service._shards) == ["a", "c"]
+    assert service.shard_stats() == {"open_shards": 2, "max_open_shards": 2}
+
+    opened = len(service._client.opened)
+    service.query("refunds", namespaces=["a"])
+    assert len(service._client.opened) == opened  # served from the open handle
+    service.query("refunds", namespaces=["b"])
+    assert service._client.opened[-1] == service.shard_name("b")
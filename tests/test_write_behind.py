@@ -0,0 +1,113 @@
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+
+from services.history_cache import SessionHistoryCache
+from services.persistence_service import PersistenceService
+
+
+@pytest.fixture
+def store(tmp_path):
+    # The flusher thread only runs when told to; tests call flush() themselves.
+    store = PersistenceService(
+        str(tmp_path / "app.db"),
+        write_behind=True,
+        flush_interval_ms=60_000,
+        flush_batch_size=10_000,
+        flush_max_retries=2,
+    )
+    yield store
+    store.close()
+
+
+def _texts(messages: list[dict]) -> list[str]:
+    return [message["parts"][0] for message in messages]
+
+
+def _committed(store: PersistenceService, session_id: str) -> list[str]:
+    return _texts(store.get_session_message_range(session_id, 0, -1))
+
+
+def _hold_commit(store: PersistenceService, after_commit: bool):
+    """Makes the next flush wait inside (or just after) its transaction until released."""
+    entered, release = threading.Event(), threading.Event()
+    write = store._write
+
+    @contextmanager
+    def held_write():
+        with write() as conn:
+            if not after_commit:
+                entered.set()
+                release.wait(5)
+            yield conn
+        if after_commit:
+            entered.set()
+            release.wait(5)
+
+    store._write = held_write
+    return entered, release
+
+
+@pytest.mark.parametrize("after_commit", [False, True], ids=["committing", "committed"])
+def test_saves_and_reads_do_not_wait_for_a_flush(store, after_commit):
+    store.save_message("s1", "user", "first")
+    entered, release = _hold_commit(store, after_commit)
+    flusher = threading.Thread(target=store.flush)
+    flusher.start()
+    try:
+        assert entered.wait(5)
+        started = time.monotonic()
+        store.save_message("s1", "model", "second")
+        history = store.get_session_messages("s1")
+        since = store.get_session_messages_since("s1", 0)
+        assert time.monotonic() - started < 1
+        # Each message exactly once, whether or not its commit has landed.
+        assert _texts(history) == _texts(since) == ["first", "second"]
+    finally:
+        release.set()
+        flusher.join()
+
+    assert _committed(store, "s1") == ["first"]
+    store.flush()
+    assert _committed(store, "s1") == ["first", "second"]
+
+
+def _fail_commits(store: PersistenceService) -> None:
+    @contextmanager
+    def failing_write():
+        raise sqlite3.OperationalError("database or disk is full")
+        yield
+
+    store._write = failing_write
+
+
+def test_failed_batch_is_requeued_ahead_of_newer_messages(store):
+    write = store._write
+    store.save_message("s1", "user", "first")
+    _fail_commits(store)
+    store.flush()
+    store.save_message("s1", "model", "second")
+    assert _texts(store.get_session_messages("s1")) == ["first", "second"]
+
+    store._write = write
+    store.flush()
+    assert _committed(store, "s1") == ["first", "second"]
+    assert store.dropped_messages == 0
+
+
+def test_batch_is_dropped_after_max_retries(store, caplog):
+    store.history_cache = SessionHistoryCache()
+    store.save_message("s1", "user", "lost")
+    _fail_commits(store)
+    for _ in range(store.flush_max_retries):
+        store.flush()
+        assert _texts(store.get_session_messages("s1")) == ["lost"]
+
+    store.flush()
+    assert store.dropped_messages == 1
+    assert store.get_session_messages_since("s1", 0) == []
+    assert store.history_cache.get("s1", 12) is None
+    assert "Dropping 1 write-behind messages" in caplog.text